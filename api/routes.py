@@ -9,15 +9,22 @@ import uuid
 import json
 import discord
 from pathlib import Path
-from flask import Flask, request, jsonify
-from config import API_KEY, UPLOAD_FOLDER, RESPONSE_FOLDER, CHANNEL_ID, HISTORY_SIZE
+from flask import Flask, request, jsonify, g
+from config import API_KEY, UPLOAD_FOLDER, RESPONSE_FOLDER, CHANNEL_ID, HISTORY_SIZE, MAX_CONTENT_LENGTH, MAX_UPLOAD_IMAGES
 from discord_bot.bot import bot
 from discord_bot import send_location_to_discord  # 다시 직접 임포트
 
 from utils.whisper_gen import groq_transcribe_audio, synthesize_text, detect_language
 from utils import search_nearby_places as maps_search_nearby
-from utils.image_resize import resize_image
-from utils.new_utils import get_local_time_by_gps, get_search_results, generate_content_with_history, generate_unique_filename, search_and_extract
+from utils import search_reachable_places
+from utils.isochrone import record_visit
+from utils.image_service import get_image_service
+from utils.image_derivatives import generate_derivatives, choose_variant, choose_media
+from utils.storage import get_content_store, UploadTooLarge
+from utils.analysis_cache import generate_image_analysis
+from utils.janitor import get_janitor, release
+from utils.new_utils import get_local_time_by_gps, get_search_results, generate_content_with_history, search_and_extract
+from utils.web_search import region_for_location, set_search_region, reset_search_region
 
 Global_History = []
 
@@ -25,6 +32,13 @@ Global_History = []
 os.makedirs(RESPONSE_FOLDER, exist_ok=True)
 
 app = Flask(__name__)
+# 요청 본문 크기 제한 (초과 시 Flask가 413 응답)
+app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+
+# Discord 전송 대기용 공유 스레드 풀 (요청마다 새로 만들지 않음)
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="routes")
+# 이미지별 파생본 생성 대기용 스레드 풀 (Discord 전송 대기와 워커를 나눠 서로 막지 않도록 분리)
+_image_executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_UPLOAD_IMAGES, thread_name_prefix="routes-image")
 
 def System_Prompt(latitude, longitude, city, street, user_prompt, now_time, selection):
     """
@@ -335,6 +349,20 @@ Use the user's current location and time from user prompt to make the conversati
    - Present 5 best matches to the user based on distance, rate, name and explain why you recommend them
    - Translate if needed - ensure all information is presented in the {locale_mapper[user_language]}
 
+============================================================
+## Using Reachable Places Function
+============================================================
+1. **Gather Data**: Use this when the user asks what they can reach within some minutes on foot or by car.
+2. **Use search_reachable_places function**: Use function call to retrieve nearby places reachable within the time limit
+   ```
+   Function parameters:
+   - latitude: user's current latitude
+   - longitude: user's current longitude
+   - keyword: Your Keyword (eg. cafe, restaurant, park, etc.)
+   - minutes: travel time limit in minutes
+   - travel_mode: "WALK" or "DRIVE"
+   ```
+
 ============================================================
 ## Recommendation Format
 ============================================================
@@ -406,6 +434,18 @@ You are a specialized function call assistant based on user's current location a
    - Present 5 best matches to the user based on distance, rate, name and explain why you recommend them
    - Translate if needed - ensure all information is presented in the {locale_mapper[user_language]}
 
+## Using Reachable Places Function
+1. **Gather Data**: Use this when the user asks what they can reach within some minutes on foot or by car.
+2. **Use search_reachable_places function**: Use function call to retrieve nearby places reachable within the time limit
+   ```
+   Function parameters:
+   - latitude: user's current latitude
+   - longitude: user's current longitude
+   - keyword: Your Keyword (eg. cafe, restaurant, park, etc.)
+   - minutes: travel time limit in minutes
+   - travel_mode: "WALK" or "DRIVE"
+   ```
+
 ## Recommendation Format
 For each selected restaurant, provide:
 - Use Natural language to user whether you use function or not
@@ -454,32 +494,51 @@ def receive_data():
         street = gps_dict.get("street", "")
         city = gps_dict.get("city", "")
 
+        # 등시선 사전 계산 대상 선정을 위한 방문 기록
+        if latitude and longitude:
+            record_visit(latitude, longitude)
+        # 모델이 호출하는 웹 검색이 요청 위치의 지역 결과를 쓰도록 설정
+        g.search_region_token = set_search_region(region_for_location(latitude, longitude) if latitude and longitude else None)
+
         # 업로드 폴더가 존재하는지 확인
         os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-        # 📸 이미지 파일 처리 (없으면 None)
-        image = request.files.get("image")
-        image_filename = None
+        # 📸 이미지 파일 처리 (여러 장 가능, 없으면 None)
+        images = [image for image in request.files.getlist("image") if image and image.filename]
+        if len(images) > MAX_UPLOAD_IMAGES:
+            return jsonify({"error": f"이미지는 최대 {MAX_UPLOAD_IMAGES}장까지 보낼 수 있습니다."}), 400
+        image_filenames = []
+        image_medias = []  # 작은 업로드는 메모리에 유지되어 리사이즈/Gemini/Discord가 디스크를 다시 읽지 않음
+        resized_image_filename = None
+        preview_image_filename = None
+        resized_image_filenames = []
+        preview_image_filenames = []
+        discord_images = []
         
-        if image and image.filename:
-            # 고유한 이미지 파일 이름 생성 (디스코드에서 온 경우 discord_ 접두사 추가)
-            prefix = "discord_" if is_discord else ""
-            new_image_filename = generate_unique_filename(f"{prefix}image", image.filename)
-            image_filename = os.path.join(UPLOAD_FOLDER, new_image_filename)
-            image.save(image_filename)
-            logging.debug(f"이미지 저장: {image_filename} (원본: {image.filename})")
+        for image in images:
+            # 내용 해시 경로에 스트리밍 저장 (같은 파일은 한 번만 저장)
+            try:
+                stored_image = get_content_store().save_stream(image.stream, image.filename)
+            except UploadTooLarge as e:
+                return jsonify({"error": str(e)}), 413
+            image_filenames.append(stored_image["path"])
+            image_medias.append(stored_image["handle"])
+            _release_after_request(stored_image["path"])
+            logging.debug(f"이미지 저장: {stored_image['path']} (원본: {image.filename}, 중복: {stored_image['deduplicated']})")
+        image_filename = image_filenames[0] if image_filenames else None
 
         # 🎤 음성 파일 처리 (없으면 None)
         audio = request.files.get("voice")
         audio_filename = None
         
         if audio and audio.filename:
-            # 고유한 오디오 파일 이름 생성 (디스코드에서 온 경우 discord_ 접두사 추가)
-            prefix = "discord_" if is_discord else ""
-            new_audio_filename = generate_unique_filename(f"{prefix}audio", audio.filename)
-            audio_filename = os.path.join(UPLOAD_FOLDER, new_audio_filename)
-            audio.save(audio_filename)
-            logging.debug(f"음성 저장: {audio_filename} (원본: {audio.filename})")
+            try:
+                stored_audio = get_content_store().save_stream(audio.stream, audio.filename)
+            except UploadTooLarge as e:
+                return jsonify({"error": str(e)}), 413
+            audio_filename = stored_audio["path"]
+            _release_after_request(audio_filename)
+            logging.debug(f"음성 저장: {audio_filename} (원본: {audio.filename}, 중복: {stored_audio['deduplicated']})")
 
         # 💬 추가 메시지 처리
         extra_message = request.form.get("message", "")
@@ -496,14 +555,15 @@ def receive_data():
             # 시스템 프롬프트 생성
             system_prompt = System_Prompt(latitude, longitude, city, street, extra_message, now_time, 4)
             
-            function_list = [maps_search_nearby, search_and_extract]
+            function_list = [maps_search_nearby, search_and_extract, search_reachable_places]
             
             llm_response = generate_content_with_history(
                 system_prompt=system_prompt,
                 new_message=extra_message,
                 function_list=function_list,
-                image_path=image_filename if image_filename else "",
+                image_path=image_filenames,  # 여러 장이면 모두 한 번의 호출로 전달
                 k=HISTORY_SIZE,
+                history_images=True,  # 이전 사진에 대한 후속 질문일 수 있음
                 history=Global_History
             )
             
@@ -517,8 +577,7 @@ def receive_data():
                         break
             
             # 디스코드로 응답 전송 
-            executor = concurrent.futures.ThreadPoolExecutor()
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,
@@ -533,7 +592,6 @@ def receive_data():
             except Exception as e:
                 logging.error(f"디스코드 메시지 전송 실패: {e}")
             
-            executor.shutdown(wait=True)
             discord_sent = True
             return jsonify({'status': 'success', 'source': 'discord'})
         
@@ -543,7 +601,6 @@ def receive_data():
         # =====================================================================================
         if latitude and longitude and not image_filename and not audio_filename and not extra_message:
             logging.info("케이스 1: GPS 정보만 있는 경우 - 주변 맛집 추천")
-            executor = concurrent.futures.ThreadPoolExecutor()
             now_time = get_local_time_by_gps(latitude, longitude)
             # 시스템 프롬프트 생성
             system_prompt = System_Prompt(latitude, longitude, city, street, None, now_time, 1)
@@ -567,8 +624,7 @@ def receive_data():
                         break
             
             # Discord 메시지 전송: 맛집 텍스트(분석 결과)를 포함하여 한 번에 전송
-            executor = concurrent.futures.ThreadPoolExecutor()
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,
@@ -583,7 +639,6 @@ def receive_data():
             except Exception as e:
                 logging.error(f"디스코드 메시지 전송 실패 (맛집 텍스트): {e}")
 
-            executor.shutdown(wait=True)
             discord_sent = True
             return jsonify({'status': 'success'})
         
@@ -596,18 +651,13 @@ def receive_data():
             # 시스템 프롬프트 생성
             system_prompt = System_Prompt(latitude, longitude, city, street, None, now_time, 2)
             
-            executor = concurrent.futures.ThreadPoolExecutor()
-
-            # 이미지 용량이 8MB 이상일 때만 리사이즈를 수행합니다.
-            if os.path.getsize(image_filename) >= 7.5 * 1024 * 1024:
-                future_resize = executor.submit(resize_image, image_filename, 7.5)
-                resized_image_filename = future_resize.result()
-            else:
-                resized_image_filename = image_filename
+            # 미리보기/용량 목표 WebP(AVIF) 파생본을 만들고 Discord에는 조건에 맞는 가장 작은 변형을 보냅니다.
+            derivatives_list = _prepare_images(image_medias)
+            resized_image_filename = [choose_media(derivatives, "discord") for derivatives in derivatives_list]
 
             # 이미지 먼저 전송
             if resized_image_filename:
-                first_image = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+                first_image = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                     send_location_to_discord(
                         latitude, longitude, street, city,
                         extra_message="입력 이미지",
@@ -624,11 +674,12 @@ def receive_data():
             else:
                 logging.error("이미지 전송 실패")
 
-            # Gemini 분석 호출
-            llm_response = generate_content_with_history(
+            # Gemini 분석 호출 (같은 사진을 같은 위치에서 다시 보내면 캐시된 분석 사용)
+            llm_response = generate_image_analysis(
+                2, latitude, longitude, "",
                 system_prompt=system_prompt,
                 new_message=f"현재 시간 {now_time}, 현재 위치는 위치(위도 {latitude}, 경도 {longitude}) 부가적인 현재 도시와 거리는 {city}, {street}.",
-                image_path=resized_image_filename or "",
+                image_path=[choose_media(derivatives, "gemini") for derivatives in derivatives_list],  # 모델 입력용 축소는 generate_content_with_history에서 별도로 수행
                 k=HISTORY_SIZE,
                 function_list=[],
                 history=Global_History
@@ -644,8 +695,7 @@ def receive_data():
                         break
 
             # Discord 메시지 전송: 텍스트(분석 결과)를 포함하여 한 번에 전송
-            executor = concurrent.futures.ThreadPoolExecutor()
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,
@@ -664,7 +714,7 @@ def receive_data():
             response_audio_filename = os.path.join(RESPONSE_FOLDER, f"response_{int(time.time())}.mp3")
             tts_success = synthesize_text(response_text, response_audio_filename, gender="female", speed=1.1)
             if tts_success:
-                future_audio = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+                future_audio = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                     send_location_to_discord(
                         latitude, longitude, street, city,
                         extra_message="음성 응답",
@@ -681,7 +731,6 @@ def receive_data():
             else:
                 logging.error("TTS 음성 합성 실패")
 
-            executor.shutdown(wait=True)
             discord_sent = True
             return jsonify({'status': 'success'})
         
@@ -693,17 +742,13 @@ def receive_data():
             now_time = get_local_time_by_gps(latitude, longitude)
             # 기본 시스템 프롬프트
             system_prompt = System_Prompt(latitude, longitude, city, street, extra_message, now_time, 3)
-            executor = concurrent.futures.ThreadPoolExecutor()
-            # 이미지 용량이 8MB 이상일 때만 리사이즈를 수행합니다.
-            if os.path.getsize(image_filename) >= 7.5 * 1024 * 1024:
-                future_resize = executor.submit(resize_image, image_filename, 7.5)
-                resized_image_filename = future_resize.result()
-            else:
-                resized_image_filename = image_filename
+            # 미리보기/용량 목표 WebP(AVIF) 파생본을 만들고 Discord에는 조건에 맞는 가장 작은 변형을 보냅니다.
+            derivatives_list = _prepare_images(image_medias)
+            resized_image_filename = [choose_media(derivatives, "discord") for derivatives in derivatives_list]
 
             # 이미지 먼저 전송
             if resized_image_filename:
-                first_image = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+                first_image = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                     send_location_to_discord(
                         latitude, longitude, street, city,
                         extra_message="입력 이미지",
@@ -721,10 +766,11 @@ def receive_data():
                 logging.error("이미지 전송 실패")
 
             # 사용자 메시지를 그대로 프롬프트로 사용
-            llm_response = generate_content_with_history(
+            llm_response = generate_image_analysis(
+                3, latitude, longitude, extra_message,
                 system_prompt=system_prompt,
                 new_message=extra_message,
-                image_path=resized_image_filename or "",
+                image_path=[choose_media(derivatives, "gemini") for derivatives in derivatives_list],
                 function_list=[search_and_extract],
                 k=HISTORY_SIZE,
                 history=Global_History
@@ -740,8 +786,7 @@ def receive_data():
                         break
             
             # Discord 메시지 전송: 텍스트(분석 결과)를 포함하여 한 번에 전송
-            executor = concurrent.futures.ThreadPoolExecutor()
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,
@@ -756,7 +801,6 @@ def receive_data():
             except Exception as e:
                 logging.error(f"디스코드 메시지 전송 실패 (텍스트): {e}")
 
-            executor.shutdown(wait=True)
             discord_sent = True
             return jsonify({'status': 'success'})
 
@@ -775,17 +819,13 @@ def receive_data():
                 
                 # 시스템 프롬프트 생성
                 system_prompt = System_Prompt(latitude, longitude, city, street, transcribed_text, now_time, 3)
-                executor = concurrent.futures.ThreadPoolExecutor()
-                # 이미지 용량이 8MB 이상일 때만 리사이즈를 수행합니다.
-                if os.path.getsize(image_filename) >= 7.5 * 1024 * 1024:
-                    future_resize = executor.submit(resize_image, image_filename, 7.5)
-                    resized_image_filename = future_resize.result()
-                else:
-                    resized_image_filename = image_filename
+                # 미리보기/용량 목표 WebP(AVIF) 파생본을 만들고 Discord에는 조건에 맞는 가장 작은 변형을 보냅니다.
+                derivatives_list = _prepare_images(image_medias)
+                resized_image_filename = [choose_media(derivatives, "discord") for derivatives in derivatives_list]
                 
                 # 이미지 먼저 전송
                 if resized_image_filename:
-                    first_image = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+                    first_image = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                         send_location_to_discord(
                             latitude, longitude, street, city,
                             extra_message="입력 이미지",
@@ -803,10 +843,11 @@ def receive_data():
                     response_text = "음성 메시지를 처리할 수 없습니다. 텍스트로 변환 중 오류가 발생했습니다."
 
                 # LLM 요청 - 사용자 음성 메시지를 그대로 처리
-                llm_response = generate_content_with_history(
+                llm_response = generate_image_analysis(
+                    3, latitude, longitude, transcribed_text,
                     system_prompt=system_prompt,
                     new_message=transcribed_text,
-                    image_path=resized_image_filename or "",
+                    image_path=[choose_media(derivatives, "gemini") for derivatives in derivatives_list],
                     function_list=[search_and_extract],
                     k=HISTORY_SIZE,
                     history=Global_History
@@ -824,8 +865,7 @@ def receive_data():
                 response_text = "음성 메시지를 처리할 수 없습니다. 텍스트로 변환 중 오류가 발생했습니다."
             
             # Discord 메시지 전송: 텍스트(분석 결과)를 포함하여 한 번에 전송
-            executor = concurrent.futures.ThreadPoolExecutor()
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,
@@ -840,7 +880,6 @@ def receive_data():
             except Exception as e:
                 logging.error(f"디스코드 메시지 전송 실패 (텍스트): {e}")
 
-            executor.shutdown(wait=True)
             discord_sent = True
             return jsonify({'status': 'success'})
 
@@ -850,7 +889,6 @@ def receive_data():
         elif latitude and longitude and not image_filename and not audio_filename and extra_message:
             logging.info("케이스 5-1: 메시지 + GPS - 메시지를 그대로 프롬프트로 사용")
             now_time = get_local_time_by_gps(latitude, longitude)
-            executor = concurrent.futures.ThreadPoolExecutor()
             # 시스템 프롬프트 생성
             system_prompt = System_Prompt(latitude, longitude, city, street, extra_message, now_time, 4)
             
@@ -860,9 +898,10 @@ def receive_data():
             llm_response = generate_content_with_history(
                 system_prompt=system_prompt,
                 new_message=extra_message,
-                function_list=[search_and_extract, maps_search_nearby],
+                function_list=[search_and_extract, maps_search_nearby, search_reachable_places],
                 image_path="",
                 k=HISTORY_SIZE,
+                history_images=True,  # 이전 사진에 대한 후속 질문일 수 있음
                 history=Global_History
             )
             print("OUTPUT LLM RESPONSE: ", llm_response)
@@ -880,8 +919,7 @@ def receive_data():
             logging.debug(f"Global_History 길이: {len(Global_History)}개 메시지")
 
             # Discord 메시지 전송: 텍스트(분석 결과)를 포함하여 한 번에 전송
-            executor = concurrent.futures.ThreadPoolExecutor()
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,  # llm_response 대신 response_text 사용
@@ -897,7 +935,6 @@ def receive_data():
             except Exception as e:
                 logging.error(f"Discord 응답 전송 실패: {e}")
             
-            executor.shutdown(wait=True)
             discord_sent = True
             return jsonify({'status': 'success'})
 
@@ -906,7 +943,6 @@ def receive_data():
         # =====================================================================================
         elif latitude and longitude and not image_filename and audio_filename and not extra_message:
             logging.info("케이스 5-2: 오디오 + GPS - 오디오 변환 후 처리")
-            executor = concurrent.futures.ThreadPoolExecutor()
             
             # 음성을 텍스트로 변환
             transcribed_text = groq_transcribe_audio(audio_filename)
@@ -922,9 +958,10 @@ def receive_data():
                 llm_response = generate_content_with_history(
                     system_prompt=system_prompt,
                     new_message=transcribed_text,
-                    function_list=[search_and_extract, maps_search_nearby],
+                    function_list=[search_and_extract, maps_search_nearby, search_reachable_places],
                     image_path="",
                     k=HISTORY_SIZE,
+                    history_images=True,  # 이전 사진에 대한 후속 질문일 수 있음
                     history=Global_History
                 )
                 
@@ -941,8 +978,7 @@ def receive_data():
                 response_text = "음성 메시지를 처리할 수 없습니다. 텍스트로 변환 중 오류가 발생했습니다."
 
             # Discord 메시지 전송: 텍스트(분석 결과)를 포함하여 한 번에 전송
-            executor = concurrent.futures.ThreadPoolExecutor()
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,
@@ -957,7 +993,6 @@ def receive_data():
             except Exception as e:
                 logging.error(f"디스코드 메시지 전송 실패 (텍스트): {e}")
 
-            executor.shutdown(wait=True)
             discord_sent = True
             return jsonify({'status': 'success'})
 
@@ -966,7 +1001,6 @@ def receive_data():
         # =====================================================================================
         else:
             logging.info("기타 케이스: 기본 처리")
-            executor = concurrent.futures.ThreadPoolExecutor()
             # 디스코드로 전송할 기본 메시지 생성
             extra_message_content = f"GPS: {latitude}, {longitude}"
             if street or city:
@@ -980,8 +1014,7 @@ def receive_data():
                 llm_response = "제공된 정보를 처리했습니다."
 
             # Discord 메시지 전송: 텍스트(분석 결과)를 포함하여 한 번에 전송
-            executor = concurrent.futures.ThreadPoolExecutor()
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=llm_response,
@@ -996,7 +1029,6 @@ def receive_data():
             except Exception as e:
                 logging.error(f"디스코드 메시지 전송 실패 (텍스트): {e}")
 
-            executor.shutdown(wait=True)
             discord_sent = True
             return jsonify({'status': 'success'})
 
@@ -1009,21 +1041,21 @@ def receive_data():
             if llm_response:
                 response_text = llm_response
             
-            executor = concurrent.futures.ThreadPoolExecutor()
-
-            # 이미지 용량이 8MB 이상일 때만 리사이즈를 수행합니다.
-            if os.path.getsize(image_filename) >= 7.5 * 1024 * 1024:
-                future_resize = executor.submit(resize_image, image_filename, 7.5)
-                resized_image_filename = future_resize.result()
-            else:
-                resized_image_filename = image_filename
+            # 미리보기/용량 목표 WebP(AVIF) 파생본을 만들고 Discord에는 조건에 맞는 가장 작은 변형을 보냅니다.
+            if image_filename:
+                derivatives_list = _prepare_images(image_medias, ("discord", "api"))
+                resized_image_filenames = [choose_variant(derivatives, "discord") for derivatives in derivatives_list]
+                preview_image_filenames = [choose_variant(derivatives, "api") for derivatives in derivatives_list]
+                discord_images = [choose_media(derivatives, "discord") for derivatives in derivatives_list]
+                resized_image_filename = resized_image_filenames[0]
+                preview_image_filename = preview_image_filenames[0]
 
             # 디스코드로 전송 (비동기) - 맛집 정보는 표시하지 않음
             future = asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,
-                    image_path=resized_image_filename or "",
+                    image_path=discord_images or "",
                     audio_path=response_audio if response_audio else audio_filename,
                     show_places=False  # 주변 장소 정보 표시하지 않음
                 ),
@@ -1039,6 +1071,9 @@ def receive_data():
         return jsonify({
             "status": "success",
             "filename": resized_image_filename,
+            "preview_filename": preview_image_filename,
+            "filenames": resized_image_filenames,
+            "preview_filenames": preview_image_filenames,
             "audio_filename": audio_filename,
             "response_audio": response_audio,
             "message": extra_message,
@@ -1053,10 +1088,52 @@ def receive_data():
         logging.exception("데이터 처리 중 에러:")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics/images', methods=['GET'])
+def image_metrics():
+    """이미지 처리 프로세스 풀의 대기열 지표를 반환하는 API 엔드포인트"""
+    if request.headers.get("X-API-Key") != API_KEY:
+        return jsonify({"error": "Invalid API Key"}), 403
+    return jsonify(get_image_service().stats()), 200
+
+@app.route('/metrics/storage', methods=['GET'])
+def storage_metrics():
+    """업로드/응답 폴더 정리 지표를 반환하는 API 엔드포인트"""
+    if request.headers.get("X-API-Key") != API_KEY:
+        return jsonify({"error": "Invalid API Key"}), 403
+    return jsonify(get_janitor().stats()), 200
+
+def _prepare_images(image_medias, consumers=("discord", "gemini")):
+    """여러 이미지에서 consumers가 사용할 파생본만 병렬로 생성합니다. (입력 순서 유지)"""
+    if len(image_medias) == 1:
+        return [generate_derivatives(image_medias[0], consumers)]
+    return list(_image_executor.map(lambda media: generate_derivatives(media, consumers), image_medias))
+
+def _release_after_request(path):
+    """저장소가 보호해 둔 파일(및 파생본)을 요청이 끝날 때 정리 대상으로 되돌립니다."""
+    g.setdefault("protected_paths", []).append(path)
+
+@app.teardown_request
+def _release_protected(exc):
+    release(*g.pop("protected_paths", []))
+
+@app.teardown_request
+def _reset_search_region(exc):
+    # 재사용되는 워커 스레드의 다음 요청이 이전 사용자의 검색 지역을 물려받지 않도록 되돌림
+    token = g.pop("search_region_token", None)
+    if token is not None:
+        reset_search_region(token)
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """MAX_CONTENT_LENGTH를 넘는 요청에 JSON 오류를 반환합니다."""
+    return jsonify({"error": f"요청 크기 제한 초과: {MAX_CONTENT_LENGTH} 바이트"}), 413
+
 # Discord 메시지 처리 함수
 def process_discord_message(message_content, latitude=0, longitude=0, city="", street="", image_path=None, audio_path=None, channel_id=None):
-    """Discord에서 수신된 메시지를 처리하는 함수"""
+    """Discord에서 수신된 메시지를 처리하는 함수 (image_path는 경로 또는 여러 장의 경로 리스트)"""
     logging.info("Discord 메시지 처리: " + message_content[:50] + "...")
+    image_paths = image_path if isinstance(image_path, (list, tuple)) else [image_path]
+    image_paths = [p for p in image_paths if p and os.path.exists(p)]
     
     # 현재 시간 가져오기
     now_time = get_local_time_by_gps(latitude, longitude)
@@ -1064,21 +1141,21 @@ def process_discord_message(message_content, latitude=0, longitude=0, city="", s
     # 시스템 프롬프트 생성
     system_prompt = System_Prompt(latitude, longitude, city, street, message_content, now_time, 4)
     
-    executor = concurrent.futures.ThreadPoolExecutor()
-    
+    # 모델이 호출하는 웹 검색이 요청 위치의 지역 결과를 쓰도록 설정 (처리가 끝나면 되돌림)
+    search_region_token = set_search_region(region_for_location(latitude, longitude) if latitude and longitude else None)
     try:
         print("INPUT MESSAGE CONTENT: ", message_content)
         print("INPUT SYSTEM PROMPT: ", system_prompt)
         # 이미지 파일이 있는 경우
-        if image_path and os.path.exists(image_path):
-            logging.info("이미지와 함께 메시지 처리")
+        if image_paths:
+            logging.info(f"이미지 {len(image_paths)}장과 함께 메시지 처리")
             
-            # LLM 요청 - 이미지 포함
+            # LLM 요청 - 이미지 포함 (여러 장이면 한 번의 호출로 함께 전달)
             llm_response = generate_content_with_history(
                 system_prompt=system_prompt,
                 new_message=message_content,
                 function_list=[search_and_extract],
-                image_path=image_path,
+                image_path=image_paths,
                 k=HISTORY_SIZE,
                 history=Global_History
             )
@@ -1090,9 +1167,10 @@ def process_discord_message(message_content, latitude=0, longitude=0, city="", s
             llm_response = generate_content_with_history(
                 system_prompt=system_prompt,
                 new_message=message_content,
-                function_list=[search_and_extract, maps_search_nearby],
+                function_list=[search_and_extract, maps_search_nearby, search_reachable_places],
                 image_path="",
                 k=HISTORY_SIZE,
+                history_images=True,  # 이전 사진에 대한 후속 질문일 수 있음
                 history=Global_History
             )
         print("OUTPUT LLM RESPONSE: ", llm_response)
@@ -1114,7 +1192,7 @@ def process_discord_message(message_content, latitude=0, longitude=0, city="", s
         # Discord로 응답 전송 (시스템 프롬프트가 아닌 LLM 응답만 전송)
         if channel_id:
             # 특정 채널로 전송
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_text_to_channel(response_text, channel_id),
                 bot.loop
             ).result())
@@ -1122,7 +1200,7 @@ def process_discord_message(message_content, latitude=0, longitude=0, city="", s
             # 기본 채널로 전송 - 필요할 때만 임포트
             from discord_bot import send_location_to_discord
             
-            future_msg = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+            future_msg = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                 send_location_to_discord(
                     latitude, longitude, street, city,
                     extra_message=response_text,
@@ -1139,7 +1217,6 @@ def process_discord_message(message_content, latitude=0, longitude=0, city="", s
         except Exception as e:
             logging.error(f"Discord 응답 전송 실패: {e}")
         
-        executor.shutdown(wait=True)
         return response_text
         
     except Exception as e:
@@ -1149,7 +1226,7 @@ def process_discord_message(message_content, latitude=0, longitude=0, city="", s
         # 오류 메시지 전송
         if channel_id:
             try:
-                future_err = executor.submit(lambda: asyncio.run_coroutine_threadsafe(
+                future_err = _executor.submit(lambda: asyncio.run_coroutine_threadsafe(
                     send_text_to_channel(error_message, channel_id),
                     bot.loop
                 ).result())
@@ -1157,8 +1234,9 @@ def process_discord_message(message_content, latitude=0, longitude=0, city="", s
             except Exception as send_err:
                 logging.error(f"오류 메시지 전송 실패: {send_err}")
         
-        executor.shutdown(wait=True)
         return error_message
+    finally:
+        reset_search_region(search_region_token)
 
 # 채널에 텍스트 메시지를 안전하게 전송하는 유틸리티 함수
 async def send_text_to_channel(text, channel_id):
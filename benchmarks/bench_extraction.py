@@ -0,0 +1,115 @@
+# %%
+"""
+lxml 단일 파싱 추출(extract_page)과 기존 readability + BeautifulSoup 추출의 속도를 비교하는 벤치마크
+
+사용법:
+    python -m benchmarks.bench_extraction [저장된 HTML 폴더]
+
+폴더를 지정하지 않으면 benchmarks/pages/*.html을 사용하고, 없으면 합성 페이지를 생성해 측정합니다.
+"""
+import os
+import re
+import sys
+import glob
+import time
+import random
+import logging
+from urllib.parse import urlparse, urljoin
+from bs4 import BeautifulSoup
+from utils.web_extract import extract_page
+
+def legacy_extract_text(html_content: str, base_url: str = None) -> tuple:
+    """기존 search_and_extract의 추출 로직 (readability + BeautifulSoup, iframe 탐색용 재파싱 포함)"""
+    if not html_content:
+        return "", []
+    main_text = ""
+    try:
+        from readability import Document
+        doc = Document(html_content)
+        main_html = doc.summary()
+        soup = BeautifulSoup(main_html, "lxml")
+        main_text = soup.get_text(separator=" ", strip=True)
+        main_text = re.sub(r'\s+', ' ', main_text).strip()
+    except Exception:
+        soup = BeautifulSoup(html_content, "lxml")
+        for element in soup(['script', 'style', 'meta', 'noscript', 'head', 'footer', 'nav']):
+            element.decompose()
+        paragraphs = []
+        for tag in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'span', 'article', 'section', 'li', 'td', 'th']):
+            curr_text = tag.get_text(strip=True)
+            if curr_text and len(curr_text) > 1:
+                paragraphs.append(curr_text)
+        remaining_text = soup.get_text(separator=' ', strip=True)
+        if remaining_text:
+            for p in paragraphs:
+                remaining_text = remaining_text.replace(p, '')
+            remaining_parts = [part for part in remaining_text.split() if len(part) > 1]
+            if remaining_parts:
+                paragraphs.append(' '.join(remaining_parts))
+        main_text = ' '.join(paragraphs)
+        main_text = re.sub(r'\s+', ' ', main_text).strip()
+
+    iframe_srcs = []
+    original_soup = BeautifulSoup(html_content, "lxml")
+    for iframe in original_soup.find_all("iframe"):
+        src = iframe.get("src", "")
+        if src:
+            if not bool(urlparse(src).netloc) and base_url:
+                src = urljoin(base_url, src)
+            iframe_srcs.append(src)
+    return main_text, iframe_srcs
+
+def synthetic_page(paragraphs: int) -> str:
+    """메뉴, 광고, 본문 단락, iframe이 섞인 합성 여행 블로그 페이지를 생성합니다."""
+    words = "서울 맛집 추천 여행 코스 카페 전통 시장 야경 명소 travel guide local food street market night view".split()
+    menu = "".join(f'<li><a href="/menu/{i}">메뉴 {i}</a></li>' for i in range(30))
+    body = "".join(
+        f"<p>{' '.join(random.choice(words) for _ in range(random.randint(20, 80)))}</p>"
+        + (f'<div class="ad-banner"><a href="https://ads.example/{i}">광고</a></div>' if i % 7 == 0 else "")
+        for i in range(paragraphs)
+    )
+    return (
+        f"<html><head><title>여행 가이드</title><script>var a = {paragraphs};</script></head><body>"
+        f'<nav><ul>{menu}</ul></nav><div class="content"><h1>여행 가이드</h1>{body}'
+        f'<iframe src="/embed/map"></iframe></div><footer>Copyright</footer></body></html>'
+    )
+
+def load_corpus(folder: str) -> list:
+    files = sorted(glob.glob(os.path.join(folder, "*.html")))
+    pages = []
+    for path in files:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append((os.path.basename(path), f.read()))
+    if not pages:
+        random.seed(0)
+        pages = [(f"synthetic_{n}", synthetic_page(n)) for n in (20, 100, 500, 2000)]
+    return pages
+
+def bench(func, html: str, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(html, "https://example.com/")
+    return (time.perf_counter() - start) / repeats
+
+def main():
+    logging.disable(logging.CRITICAL)
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "pages")
+    pages = load_corpus(folder)
+
+    total_new = total_old = 0.0
+    print(f"{'page':<28}{'size(KB)':>10}{'legacy(ms)':>12}{'lxml(ms)':>10}{'speedup':>9}{'chars old/new':>18}")
+    for name, html in pages:
+        repeats = max(1, min(20, int(2_000_000 / max(len(html), 1))))
+        old = bench(legacy_extract_text, html, repeats)
+        new = bench(extract_page, html, repeats)
+        total_old += old
+        total_new += new
+        old_len = len(legacy_extract_text(html)[0])
+        new_len = len(extract_page(html)["text"])
+        print(f"{name[:27]:<28}{len(html) / 1024:>10.1f}{old * 1000:>12.2f}{new * 1000:>10.2f}{old / new:>8.1f}x{f'{old_len}/{new_len}':>18}")
+    print(f"{'total':<28}{'':>10}{total_old * 1000:>12.2f}{total_new * 1000:>10.2f}{total_old / total_new:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
+
+# %%
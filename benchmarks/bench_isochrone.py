@@ -0,0 +1,67 @@
+# %%
+"""
+등시선 캐시 기반 도달 가능 판정과 경로 API 직접 호출의 비용을 비교하는 벤치마크
+
+사용법:
+    python -m benchmarks.bench_isochrone            # 로컬 폴리곤 판정만 측정
+    python -m benchmarks.bench_isochrone --live     # GMAPS_API_KEY로 실제 경로 API 호출도 측정
+"""
+import sys
+import time
+import random
+from utils import isochrone
+from utils.maps import compute_route_durations
+
+def synthetic_isochrone(latitude, longitude, travel_mode="WALK", speed_mps=1.3):
+    """거리에 비례하는 이동 시간(도로 굴곡 임의 반영)으로 가짜 등시선을 만듭니다."""
+    cell = isochrone.geocell(latitude, longitude)
+    rings = isochrone.RINGS[travel_mode]
+    durations = [
+        [int(r / speed_mps * random.uniform(1.1, 1.6)) for r in rings]
+        for _ in range(isochrone.BEARINGS)
+    ]
+    iso = {
+        "center": list(isochrone.geocell_center(cell)),
+        "mode": travel_mode,
+        "rings": rings,
+        "durations": durations,
+        "computed_at": time.time()
+    }
+    isochrone._isochrones[f"{cell}|{travel_mode}"] = iso
+    return iso
+
+def random_places(latitude, longitude, n, max_distance_m=1500):
+    return [
+        {"name": f"place_{i}", "location": isochrone.destination_point(latitude, longitude, random.uniform(0, 360), random.uniform(0, max_distance_m))}
+        for i in range(n)
+    ]
+
+def main():
+    origin = (37.5665, 126.9780)
+    isochrone._load()
+    synthetic_isochrone(*origin)
+    places = random_places(*origin, n=20)
+
+    # 첫 호출은 폴리곤 생성 포함, 이후는 캐시된 폴리곤으로 판정
+    repeats = 1000
+    start = time.perf_counter()
+    reachable = isochrone.filter_reachable(origin, places, minutes=10, travel_mode="WALK")
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        isochrone.filter_reachable(origin, places, minutes=10, travel_mode="WALK")
+    warm = (time.perf_counter() - start) / repeats
+    print(f"로컬 판정 (후보 {len(places)}개, 도달 {len(reachable)}개): 첫 호출 {first * 1000:.3f}ms, 이후 평균 {warm * 1000:.3f}ms")
+
+    if "--live" in sys.argv:
+        start = time.perf_counter()
+        durations = compute_route_durations(origin, [p["location"] for p in places], travel_mode="WALK")
+        live = time.perf_counter() - start
+        ok = sum(d is not None for d in durations)
+        print(f"경로 API 직접 호출 (후보 {len(places)}개, 성공 {ok}개): {live * 1000:.1f}ms")
+        print(f"로컬 판정 대비 {live / warm:.0f}배")
+
+if __name__ == "__main__":
+    main()
+
+# %%
@@ -0,0 +1,121 @@
+# %%
+"""
+메모리 인코딩 + 품질 이분 탐색 resize_image와 기존 디스크 반복 저장 방식의 속도를 비교하는 벤치마크
+
+사용법:
+    python -m benchmarks.bench_resize [--max-mb 7.5] [이미지 파일 ...]
+
+파일을 지정하지 않으면 12MP/48MP 합성 사진을 생성해 측정합니다.
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import numpy as np
+from PIL import Image, ImageOps
+from utils import image_resize
+
+MAX_LEGACY_ENCODES = 12
+
+def legacy_resize_image(file_path, max_size_mb=7.5, quality=85):
+    """
+    기존 resize_image (매 반복마다 디스크 저장 후 getsize 확인, 품질 10 단위 감소). 인코딩 횟수도 반환합니다.
+    기존 코드는 0.8배 축소 후 품질 40으로도 목표를 넘으면 끝나지 않으므로 MAX_LEGACY_ENCODES회에서 중단합니다.
+    """
+    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    if file_size_mb <= max_size_mb:
+        return file_path, 0
+    filename, ext = os.path.splitext(file_path)
+    output_path = f"{filename}_legacy{ext}"
+    encodes = 0
+    with Image.open(file_path) as img:
+        img = ImageOps.exif_transpose(img)
+        current_quality = quality
+        while True:
+            width, height = img.size
+            new_size = (width, height)
+            if file_size_mb > max_size_mb * 1.5:
+                new_size = (int(width * 0.8), int(height * 0.8))
+            resized_img = img.resize(new_size, Image.LANCZOS)
+            resized_img.save(output_path, format='JPEG', quality=current_quality, optimize=True)
+            encodes += 1
+            if encodes >= MAX_LEGACY_ENCODES:
+                return output_path, encodes
+            new_file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+            if new_file_size_mb <= max_size_mb:
+                return output_path, encodes
+            current_quality -= 10
+            if current_quality < 40:
+                width, height = new_size
+                new_size = (int(width * 0.8), int(height * 0.8))
+                current_quality = 75
+            if width < 300 or current_quality < 20:
+                return output_path, encodes
+
+def synthetic_photo(path, width, height):
+    """그라데이션과 노이즈가 섞인, 실제 사진과 비슷한 압축률의 JPEG를 생성합니다."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        127 + 100 * np.sin(x / 150.0) * np.cos(y / 200.0),
+        127 + 100 * np.cos(x / 90.0 + y / 300.0),
+        127 + 100 * np.sin((x + y) / 250.0)
+    ], axis=-1)
+    noise = rng.normal(0, 28, size=(height, width, 3)).astype(np.float32)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path, format='JPEG', quality=95)
+
+def count_encodes(func, path):
+    """resize_image 실행 중 메모리 인코딩 횟수를 셉니다."""
+    calls = {"n": 0}
+    original = image_resize._encode
+    def counting(*args, **kwargs):
+        calls["n"] += 1
+        return original(*args, **kwargs)
+    image_resize._encode = counting
+    try:
+        func(path)
+    finally:
+        image_resize._encode = original
+    return calls["n"]
+
+def main():
+    logging.disable(logging.CRITICAL)
+    workdir = tempfile.mkdtemp()
+    try:
+        args = sys.argv[1:]
+        max_size_mb = 7.5
+        if args[:1] == ["--max-mb"]:
+            max_size_mb = float(args[1])
+            args = args[2:]
+        paths = args
+        if not paths:
+            for name, size in (("12mp", (4000, 3000)), ("48mp", (8000, 6000))):
+                path = os.path.join(workdir, f"{name}.jpg")
+                synthetic_photo(path, *size)
+                paths.append(path)
+
+        print(f"{'image':<16}{'size(MB)':>10}{'legacy(s)':>11}{'encodes':>9}{'new(s)':>9}{'encodes':>9}{'out(MB)':>9}")
+        for path in paths:
+            local = os.path.join(workdir, "input" + os.path.splitext(path)[1])
+            shutil.copy(path, local)
+            start = time.perf_counter()
+            _, legacy_encodes = legacy_resize_image(local, max_size_mb)
+            legacy_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            output = image_resize.resize_image(local, max_size_mb)
+            new_time = time.perf_counter() - start
+            new_encodes = count_encodes(lambda p: image_resize.resize_image(p, max_size_mb), local)
+            print(f"{os.path.basename(path)[:15]:<16}{os.path.getsize(local) / (1024 * 1024):>10.1f}"
+                  f"{legacy_time:>11.2f}{legacy_encodes:>9}{new_time:>9.2f}{new_encodes:>9}"
+                  f"{os.path.getsize(output) / (1024 * 1024):>9.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
+
+# %%
@@ -15,14 +15,111 @@ CHANNEL_ID = int(os.getenv('CHANNEL_ID'))
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
 RESPONSE_FOLDER = os.getenv('RESPONSE_FOLDER', 'responses')
+CACHE_FOLDER = os.getenv('CACHE_FOLDER', 'cache')
 HOST = os.getenv('HOST', '0.0.0.0')
 PORT = int(os.getenv('PORT', 5000))
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 HISTORY_SIZE = 10
 
+# 업로드 제한 및 저장 설정
+MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 50 * 1024 * 1024))  # 요청/파일 최대 크기 (바이트)
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+ATTACHMENT_DOWNLOAD_TIMEOUT = float(os.getenv('ATTACHMENT_DOWNLOAD_TIMEOUT', 60))  # 디스코드 첨부 파일 다운로드 제한 시간 (초)
+MAX_UPLOAD_IMAGES = int(os.getenv('MAX_UPLOAD_IMAGES', 9))  # 요청 하나의 최대 이미지 수 (Discord 첨부 제한 10개 중 음성 1개 자리 남김)
+MEDIA_MEMORY_LIMIT = int(os.getenv('MEDIA_MEMORY_LIMIT', 8 * 1024 * 1024))  # 이 크기 이하의 미디어는 메모리에 유지해 재사용
+
+# 업로드/응답 폴더 정리 설정
+STORAGE_TTL = int(os.getenv('STORAGE_TTL', 7 * 24 * 3600))  # 마지막 사용 후 보관 시간 (초)
+STORAGE_QUOTA_BYTES = int(os.getenv('STORAGE_QUOTA_BYTES', 2 * 1024 * 1024 * 1024))  # 0이면 용량 제한 없음
+STORAGE_MIN_AGE = int(os.getenv('STORAGE_MIN_AGE', 600))  # 생성 직후 파일은 지우지 않음 (초)
+STORAGE_JANITOR_INTERVAL = int(os.getenv('STORAGE_JANITOR_INTERVAL', 600))
+
+# 장소 검색 캐시 설정 (초)
+PLACES_CACHE_TTL = int(os.getenv('PLACES_CACHE_TTL', 6 * 3600))
+PLACE_HOURS_CACHE_TTL = int(os.getenv('PLACE_HOURS_CACHE_TTL', 7 * 24 * 3600))
+CLOSING_SOON_MINUTES = int(os.getenv('CLOSING_SOON_MINUTES', 30))
+
+# 웹 페이지 수집 설정
+FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', 10))
+FETCH_MAX_RETRIES = int(os.getenv('FETCH_MAX_RETRIES', 2))
+FETCH_GLOBAL_CONCURRENCY = int(os.getenv('FETCH_GLOBAL_CONCURRENCY', 32))
+FETCH_PER_HOST_CONCURRENCY = int(os.getenv('FETCH_PER_HOST_CONCURRENCY', 4))
+FETCH_MAX_BYTES = int(os.getenv('FETCH_MAX_BYTES', 2 * 1024 * 1024))  # 페이지당 최대 다운로드 크기
+FETCH_MAX_DEFER = float(os.getenv('FETCH_MAX_DEFER', 3))  # 백오프 중인 도메인을 기다릴 최대 시간, 넘으면 건너뜀
+FETCH_MAX_BACKOFF = float(os.getenv('FETCH_MAX_BACKOFF', 300))  # 도메인별 백오프(Retry-After 포함) 상한
+EXTRACT_FIRST_K = int(os.getenv('EXTRACT_FIRST_K', 4))  # 0이면 모든 페이지를 기다림
+EXTRACT_DEADLINE = float(os.getenv('EXTRACT_DEADLINE', 12))  # 0이면 제한 없음
+PASSAGES_PER_PAGE = int(os.getenv('PASSAGES_PER_PAGE', 3))  # 페이지당 전달할 최대 단락 수
+SEARCH_RESULT_CHAR_BUDGET = int(os.getenv('SEARCH_RESULT_CHAR_BUDGET', 6000))  # 검색 결과 본문 전체 글자 수 예산
+IFRAME_MAX_DEPTH = int(os.getenv('IFRAME_MAX_DEPTH', 2))  # 0이면 iframe을 따라가지 않음
+IFRAME_MAX_COUNT = int(os.getenv('IFRAME_MAX_COUNT', 6))  # 페이지당 가져올 최대 iframe 수
+IFRAME_TIME_BUDGET = float(os.getenv('IFRAME_TIME_BUDGET', 4))  # 페이지당 iframe 추출 제한 시간 (초)
+IFRAME_SAME_SITE_ONLY = os.getenv('IFRAME_SAME_SITE_ONLY', 'true').lower() == 'true'
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))  # 0이면 프로세스 풀 미사용
+
+# 추출 페이지 캐시 설정
+PAGE_CACHE_MAX_BYTES = int(os.getenv('PAGE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+PAGE_CACHE_FRESH_TTL = int(os.getenv('PAGE_CACHE_FRESH_TTL', 3600))  # 이 시간 동안은 재검증 없이 사용
+PAGE_CACHE_HOT_SIZE = int(os.getenv('PAGE_CACHE_HOT_SIZE', 256))
+
+# 검색 결과 캐시 및 요청 속도 설정
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 1800))
+SEARCH_REGION = os.getenv('SEARCH_REGION', 'wt-wt')  # DuckDuckGo 지역 코드 (캐시 키에 포함)
+SEARCH_RATE_PER_SEC = float(os.getenv('SEARCH_RATE_PER_SEC', 1.0))
+SEARCH_RATE_BURST = int(os.getenv('SEARCH_RATE_BURST', 3))
+SEARCH_RATE_WAIT = float(os.getenv('SEARCH_RATE_WAIT', 1.0))  # 요청 스레드가 속도 제한 토큰을 기다리는 최대 시간 (초)
+SEARCH_STALE_TTL = int(os.getenv('SEARCH_STALE_TTL', 24 * 3600))  # 속도 제한/오류 시 대신 쓸 만료된 결과 보관 시간
+
+# 이미지 역검색용 웹드라이버 풀 설정
+WEBDRIVER_POOL_SIZE = int(os.getenv('WEBDRIVER_POOL_SIZE', 2))
+WEBDRIVER_MAX_USES = int(os.getenv('WEBDRIVER_MAX_USES', 50))  # 이 횟수만큼 사용한 드라이버는 새로 시작
+WEBDRIVER_PAGE_TIMEOUT = float(os.getenv('WEBDRIVER_PAGE_TIMEOUT', 30))
+WEBDRIVER_WARM_ON_START = os.getenv('WEBDRIVER_WARM_ON_START', 'true').lower() == 'true'  # 서버 시작 시 드라이버 예열
+
+# 이미지 처리 프로세스 풀 설정
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', min(4, os.cpu_count() or 1)))  # 0이면 프로세스 풀 미사용
+
+# 모델 입력용 이미지 전처리 설정 (Discord 전송용 사본과 별도)
+GEMINI_IMAGE_LONG_EDGE = int(os.getenv('GEMINI_IMAGE_LONG_EDGE', 1536))  # 긴 변 최대 픽셀, 0이면 원본 그대로 전달
+GEMINI_IMAGE_QUALITY = int(os.getenv('GEMINI_IMAGE_QUALITY', 85))
+
+# Gemini Files API 업로드 재사용 설정
+GEMINI_FILES_BACKEND = os.getenv('GEMINI_FILES_BACKEND', 'genai')  # 'genai' 또는 'local' (테스트용 가짜 백엔드)
+GEMINI_FILE_TTL = int(os.getenv('GEMINI_FILE_TTL', 46 * 3600))  # 서버 보관 기간(48시간)보다 짧게
+GEMINI_HISTORY_IMAGES = int(os.getenv('GEMINI_HISTORY_IMAGES', 2))  # 히스토리에서 다시 참조할 최근 이미지 수
+
+# Gemini 이미지 분석 결과 캐시 설정
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', 3 * 3600))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 1000))
+
+# 소비자별 파생 이미지 설정 (미리보기 / 용량 목표 WebP·AVIF / 원본)
+PREVIEW_LONG_EDGE = int(os.getenv('PREVIEW_LONG_EDGE', 512))
+DERIVATIVE_LONG_EDGE = int(os.getenv('DERIVATIVE_LONG_EDGE', 2048))
+DERIVATIVE_MAX_BYTES = int(os.getenv('DERIVATIVE_MAX_BYTES', 1024 * 1024))
+DISCORD_IMAGE_MAX_BYTES = int(os.getenv('DISCORD_IMAGE_MAX_BYTES', int(7.5 * 1024 * 1024)))  # Discord 첨부 용량 제한
+
+# 유사 이미지 썸네일 다운로드 설정
+THUMBNAIL_SIZE = int(os.getenv('THUMBNAIL_SIZE', 256))  # 긴 변 최대 픽셀
+THUMBNAIL_MAX_BYTES = int(os.getenv('THUMBNAIL_MAX_BYTES', 5 * 1024 * 1024))  # 이미지당 최대 다운로드 크기
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 8))
+
+# 이미지 역검색 결과 캐시 (지각 해시) 설정
+PHASH_CACHE_MAX_ENTRIES = int(os.getenv('PHASH_CACHE_MAX_ENTRIES', 2000))
+PHASH_CACHE_TTL = int(os.getenv('PHASH_CACHE_TTL', 7 * 24 * 3600))
+PHASH_MAX_DISTANCE = int(os.getenv('PHASH_MAX_DISTANCE', 6))  # 64비트 해시 기준, 이하이면 같은 이미지로 간주
+
+# 등시선(도달 가능 영역) 사전 계산 설정
+ISOCHRONE_CELL_DEG = float(os.getenv('ISOCHRONE_CELL_DEG', 0.005))  # 약 500m 격자
+ISOCHRONE_TTL = int(os.getenv('ISOCHRONE_TTL', 7 * 24 * 3600))
+ISOCHRONE_TOP_CELLS = int(os.getenv('ISOCHRONE_TOP_CELLS', 50))
+ISOCHRONE_MIN_VISITS = int(os.getenv('ISOCHRONE_MIN_VISITS', 3))
+ISOCHRONE_MAX_VISIT_CELLS = int(os.getenv('ISOCHRONE_MAX_VISIT_CELLS', 5000))  # 방문 기록을 유지할 최대 지오셀 수
+ISOCHRONE_JOB_INTERVAL = int(os.getenv('ISOCHRONE_JOB_INTERVAL', 3600))
+
 # 업로드 폴더 생성
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESPONSE_FOLDER, exist_ok=True)
+os.makedirs(CACHE_FOLDER, exist_ok=True)
 
 # 로깅 설정
 logging.basicConfig(
@@ -7,6 +7,11 @@ from .bot import bot, get_channel
 from config import CHANNEL_ID
 from utils import search_nearby_places, compute_route_matrix
 from utils.gemini import gemini_bot
+from utils.storage import get_content_store, UploadTooLarge
+from utils.media import media_file
+from utils.janitor import release
+
+MAX_ATTACHMENTS = 10  # Discord 메시지 하나에 첨부할 수 있는 최대 파일 수 (Discord 제한, 이미지는 음성 자리를 빼고 MAX_ATTACHMENTS - 1장)
 
 async def send_location_to_discord(latitude, longitude, street, city, extra_message=None, image_path=None, audio_path=None, show_places=False, message_include=True):
     """위치 정보와 추가 데이터를 디스코드로 전송합니다.
@@ -16,7 +21,7 @@ async def send_location_to_discord(latitude, longitude, street, city, extra_mess
         street: 도로명 주소
         city: 도시명
         extra_message: 추가 메시지 (선택 사항)
-        image_path: 이미지 파일 경로 (선택 사항)
+        image_path: 이미지 파일 경로 또는 MediaHandle, 여러 장이면 그 리스트 (선택 사항, 최대 MAX_ATTACHMENTS - 1장)
         audio_path: 음성 파일 경로 (선택 사항)
         show_places: 주변 장소 정보 표시 여부 (기본값: False)
     """
@@ -57,6 +62,8 @@ async def send_location_to_discord(latitude, longitude, street, city, extra_mess
                 place_info = f"\n\n**장소 {i+1}: {ele['name']}**\n"
                 place_info += f"위치: {ele['location']}\n"
                 place_info += f"영업 여부: {ele['open_now']}\n"
+                if ele.get('closing_soon'):
+                    place_info += f"곧 마감: {ele['closes_at']}\n"
                 place_info += f"평점: {ele['rating']}\n"
                 place_info += f"유형: {ele['types']}\n"
                 place_info += f"거리: {ele['distance']:.2f} km\n"
@@ -82,11 +89,13 @@ async def send_location_to_discord(latitude, longitude, street, city, extra_mess
         message = ""
     files = []
     
-    # 이미지 파일이 있고 실제로 존재하는 경우에만 첨부
-    if image_path and os.path.exists(image_path):
+    # 이미지 파일이 있고 실제로 존재하는 경우에만 첨부 (여러 장이면 한 메시지에 함께 첨부)
+    image_paths = image_path if isinstance(image_path, (list, tuple)) else [image_path]
+    for path in [p for p in image_paths if p and os.path.exists(p)][:MAX_ATTACHMENTS - 1]:
         try:
-            files.append(discord.File(image_path))
-            logging.debug(f"이미지 파일 첨부: {image_path}")
+            # MediaHandle이면 메모리에 있는 내용을 그대로 첨부 (디스크를 다시 읽지 않음)
+            files.append(discord.File(media_file(path), filename=os.path.basename(path)))
+            logging.debug(f"이미지 파일 첨부: {path}")
         except Exception as e:
             logging.error(f"이미지 파일 전송 실패: {e}")
     
@@ -144,41 +153,48 @@ async def on_message(message):
             # 봇 멘션 제거
             clean_content = message.content.replace(f'<@{bot.user.id}>', '').strip()
             
-            # 이미지나 오디오 파일이 있는지 확인하고 저장
-            image_path = None
+            # 이미지(최대 MAX_ATTACHMENTS - 1장)와 오디오 파일을 저장 (내용 해시 경로에 저장되어 같은 이름의 첨부가 서로 덮어쓰지 않음)
+            image_paths = []
             audio_path = None
+            saved_paths = []  # 저장소가 저장 시점에 걸어 둔 정리 보호를 처리 후 해제할 경로
             
-            if message.attachments:
-                for attachment in message.attachments:
-                    # 이미지 파일 처리
-                    if attachment.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                        image_path = f"uploads/discord_{attachment.filename}"
-                        await attachment.save(image_path)
-                        logging.info(f"디스코드로부터 이미지 저장: {image_path}")
-                        break
-                    
-                    # 오디오 파일 처리
-                    elif attachment.filename.lower().endswith(('.mp3', '.wav', '.ogg', '.m4a')):
-                        audio_path = f"uploads/discord_{attachment.filename}"
-                        await attachment.save(audio_path)
-                        logging.info(f"디스코드로부터 오디오 저장: {audio_path}")
-                        break
-            
-            # routes.py의 process_discord_message 함수를 실행 시점에 import하여 호출
             try:
-                # 원형 참조 방지를 위해 필요할 때만 import
-                from api.routes import process_discord_message
+                for attachment in message.attachments:
+                    name = attachment.filename.lower()
+                    is_image = name.endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp'))
+                    is_audio = name.endswith(('.mp3', '.wav', '.ogg', '.m4a'))
+                    if (is_image and len(image_paths) >= MAX_ATTACHMENTS - 1) or (is_audio and audio_path) or not (is_image or is_audio):
+                        continue
+                    try:
+                        path = (await get_content_store().save_attachment(attachment))["path"]
+                    except UploadTooLarge as e:
+                        await message.channel.send(f"첨부 파일이 너무 큽니다: {e}")
+                        return
+                    saved_paths.append(path)
+                    if is_image:
+                        image_paths.append(path)
+                        logging.info(f"디스코드로부터 이미지 저장: {path}")
+                    else:
+                        audio_path = path
+                        logging.info(f"디스코드로부터 오디오 저장: {path}")
                 
-                await asyncio.to_thread(
-                    process_discord_message,
-                    message_content=clean_content,
-                    image_path=image_path,
-                    audio_path=audio_path,
-                    channel_id=message.channel.id
-                )
-            except Exception as e:
-                logging.error(f"routes.py 함수 호출 중 오류: {e}")
-                await message.channel.send(f"죄송합니다, 오류가 발생했습니다: {str(e)}")
+                # routes.py의 process_discord_message 함수를 실행 시점에 import하여 호출
+                try:
+                    # 원형 참조 방지를 위해 필요할 때만 import
+                    from api.routes import process_discord_message
+                    
+                    await asyncio.to_thread(
+                        process_discord_message,
+                        message_content=clean_content,
+                        image_path=image_paths,
+                        audio_path=audio_path,
+                        channel_id=message.channel.id
+                    )
+                except Exception as e:
+                    logging.error(f"routes.py 함수 호출 중 오류: {e}")
+                    await message.channel.send(f"죄송합니다, 오류가 발생했습니다: {str(e)}")
+            finally:
+                release(*saved_paths)
 
     # 답장 메시지 처리 (기존 코드 유지)
     from discord import MessageReference
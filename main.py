@@ -6,15 +6,28 @@
 주변 장소 정보를 함께 제공합니다.
 """
 import logging
-from config import HOST, PORT, DEBUG
+from config import HOST, PORT, DEBUG, ISOCHRONE_JOB_INTERVAL, STORAGE_JANITOR_INTERVAL, WEBDRIVER_WARM_ON_START
 from discord_bot import start_bot
 from api import app
+from utils.isochrone import start_isochrone_job
+from utils.janitor import start_storage_janitor
+from utils.webdriver_pool import start_webdriver_warmup
 
 def main():
     """애플리케이션 메인 함수"""
     # 디스코드 봇 시작
     bot = start_bot()
     
+    # 자주 방문하는 지역의 도달 가능 영역 사전 계산 작업 시작
+    start_isochrone_job(ISOCHRONE_JOB_INTERVAL)
+    
+    # 업로드/응답 폴더의 오래된 파일 정리 작업 시작
+    start_storage_janitor(STORAGE_JANITOR_INTERVAL)
+    
+    # 이미지 역검색용 Chrome 드라이버를 미리 띄워 첫 검색의 시작 지연 제거
+    if WEBDRIVER_WARM_ON_START:
+        start_webdriver_warmup()
+    
     # Flask 서버 실행
     logging.info(f"Flask 서버 시작 - {HOST}:{PORT}")
     app.run(host=HOST, port=PORT, debug=DEBUG, use_reloader=False)
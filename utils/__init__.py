@@ -1,9 +1,13 @@
 # utils 패키지
 from .distance import haversine_distance
-from .maps import search_nearby_places, compute_route_matrix
+from .maps import search_nearby_places, compute_route_matrix, compute_route_durations
+from .isochrone import search_reachable_places, filter_reachable
 
 __all__ = [
     'haversine_distance',
     'search_nearby_places',
-    'compute_route_matrix'
+    'compute_route_matrix',
+    'compute_route_durations',
+    'search_reachable_places',
+    'filter_reachable'
 ]
\ No newline at end of file
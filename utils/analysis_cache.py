@@ -0,0 +1,96 @@
+import os
+import json
+import logging
+import threading
+from .image_hash import PerceptualHashIndex, image_hashes
+from .isochrone import geocell
+from .local_time import get_timezone_by_gps, get_local_datetime
+from .new_utils import generate_content_with_history
+from config import CACHE_FOLDER, ANALYSIS_CACHE_MAX_ENTRIES, ANALYSIS_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_CACHE_FILE = os.path.join(CACHE_FOLDER, "image_analysis.json")
+FAILED_PREFIXES = ("오류:", "응답을 생성할 수 없습니다.")
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_analysis_index() -> PerceptualHashIndex:
+    """이미지 분석 결과 캐시 (지각 해시 기반이라 재인코딩된 같은 사진도 찾음)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PerceptualHashIndex(path=ANALYSIS_CACHE_FILE, max_entries=ANALYSIS_CACHE_MAX_ENTRIES, ttl=ANALYSIS_CACHE_TTL)
+    return _index
+
+def time_bucket(latitude, longitude) -> str:
+    """
+    위치의 현지 시각을 시간 단위로 묶은 값 (예: '2024-05-01 14')
+    응답에 현재 시각이 반영되므로(영업 여부, 지금 할 일 등) 한 시간이 지나면 캐시가 적중하지 않도록 키에 포함합니다.
+    """
+    tz_name = "UTC"
+    if latitude and longitude:
+        try:
+            tz_name = get_timezone_by_gps(latitude, longitude)
+        except (TypeError, ValueError):
+            pass
+    return get_local_datetime(tz_name).strftime("%Y-%m-%d %H")
+
+def analysis_params(selection: int, latitude, longitude, prompt: str = "", extra_hashes: list = None) -> str:
+    """
+    이미지 외 캐시 키 구성요소를 직렬화합니다.
+
+    Parameters:
+        selection: System_Prompt의 selection 값
+        latitude, longitude: 현재 위치 (isochrone 격자 단위로 묶음, 현지 시각은 시간 단위로 묶음)
+        prompt: 사용자 질문 (공백/대소문자 정규화). 분/초 단위 시각처럼 매번 바뀌는 값은 넣지 않습니다.
+        extra_hashes: 여러 장을 함께 분석할 때 두 번째 이후 이미지의 해시 (정확히 일치해야 적중)
+    """
+    cell = geocell(latitude, longitude) if latitude and longitude else ""
+    key = [selection, cell, time_bucket(latitude, longitude), " ".join((prompt or "").split()).lower()]
+    if extra_hashes:
+        key.append([f"{d:016x}{a:016x}" for d, a in extra_hashes])
+    return json.dumps(key, ensure_ascii=False)
+
+def generate_image_analysis(selection: int, latitude, longitude, cache_prompt: str, image_path, history: list, **kwargs) -> list:
+    """
+    캐시를 먼저 확인하고, 없을 때만 generate_content_with_history로 이미지를 분석합니다.
+    캐시 적중 시에도 히스토리에 질문/응답 쌍을 추가해 이후 대화 흐름은 같게 유지합니다.
+
+    Parameters:
+        selection, latitude, longitude, cache_prompt: analysis_params 참고
+        image_path: 분석할 이미지 경로 (여러 장이면 리스트, 첫 장의 지각 해시로 검색)
+        history: 대화 히스토리
+        **kwargs: generate_content_with_history의 나머지 인자 (system_prompt, new_message, k, function_list)
+
+    Returns:
+        generate_content_with_history와 같은 형식의 히스토리
+    """
+    images = list(image_path) if isinstance(image_path, (list, tuple)) else [image_path]
+    try:
+        hashes, *extra_hashes = [image_hashes(image) for image in images]
+    except Exception as e:
+        logger.error(f"분석 캐시용 이미지 해시 계산 실패: {e}")
+        return generate_content_with_history(image_path=image_path, history=history, **kwargs)
+
+    params = analysis_params(selection, latitude, longitude, cache_prompt, extra_hashes)
+    index = get_analysis_index()
+    cached = index.lookup("image_analysis", params, hashes)
+    if cached is not None:
+        logger.info(f"이미지 분석 캐시 사용: selection {selection}")
+        # generate_content_with_history와 같게 최신 k 턴만 유지
+        k = kwargs.get("k", 7)
+        if len(history) > k * 2:
+            history = history[-(k * 2):]
+        paths = [os.fspath(image) for image in images]
+        history.append({"role": "user", "content": kwargs.get("new_message", ""), "image": paths[0] if len(paths) == 1 else paths})
+        history.append({"role": "assistant", "content": cached})
+        return history
+
+    result = generate_content_with_history(image_path=image_path, history=history, **kwargs)
+    if isinstance(result, list) and result and result[-1].get("role") == "assistant":
+        text = result[-1].get("content") or ""
+        if text and not text.startswith(FAILED_PREFIXES):
+            index.put("image_analysis", params, hashes, text)
+    return result
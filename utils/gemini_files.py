@@ -0,0 +1,231 @@
+import os
+import io
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from google import genai
+from google.genai import types
+from .image_resize import prepare_model_image
+from .media import MediaHandle, media_file
+from config import GEMINI_API_KEY, GEMINI_IMAGE_LONG_EDGE, CACHE_FOLDER, GEMINI_FILES_BACKEND, GEMINI_FILE_TTL
+
+logger = logging.getLogger(__name__)
+
+GEMINI_FILES_CACHE_FILE = os.path.join(CACHE_FOLDER, "gemini_files.json")
+LOCAL_FILES_FOLDER = os.path.join(CACHE_FOLDER, "gemini_files")
+EXPIRY_MARGIN = 3600  # 만료 직전의 파일은 참조하지 않음 (초)
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용의 SHA-256을 청크 단위로 계산합니다."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def _guess_mime_type(image_path: str) -> str:
+    ext = os.path.splitext(image_path)[1].lower()
+    return {".png": "image/png", ".webp": "image/webp", ".gif": "image/gif"}.get(ext, "image/jpeg")
+
+class GenaiFileBackend:
+    """Gemini Files API 업로드"""
+    def __init__(self):
+        self._client = None
+
+    def upload(self, data: bytes, mime_type: str, display_name: str) -> dict:
+        if self._client is None:
+            self._client = genai.Client(api_key=GEMINI_API_KEY)
+        uploaded = self._client.files.upload(
+            file=io.BytesIO(data),
+            config=types.UploadFileConfig(mime_type=mime_type, display_name=display_name)
+        )
+        expires = uploaded.expiration_time.timestamp() if getattr(uploaded, "expiration_time", None) else None
+        return {"name": uploaded.name, "uri": uploaded.uri, "mime_type": uploaded.mime_type or mime_type, "expires": expires}
+
+class LocalFileBackend:
+    """
+    테스트/오프라인용 가짜 Files API입니다. 로컬 폴더에 저장하고 file:// URI를 반환하며,
+    file_part는 이 URI를 인라인 바이트로 바꿔 전달합니다.
+    """
+    def __init__(self, root: str = LOCAL_FILES_FOLDER):
+        self.root = root
+        self.uploads = 0
+        os.makedirs(root, exist_ok=True)
+
+    def upload(self, data: bytes, mime_type: str, display_name: str) -> dict:
+        name = f"files/{uuid.uuid4().hex}"
+        path = os.path.join(self.root, name.split("/")[1])
+        with open(path, "wb") as f:
+            f.write(data)
+        self.uploads += 1
+        return {"name": name, "uri": f"file://{os.path.abspath(path)}", "mime_type": mime_type, "expires": None}
+
+def file_part(entry: dict):
+    """레지스트리 항목을 generate_content에 넣을 Part로 변환합니다."""
+    if entry["uri"].startswith("file://"):
+        with open(entry["uri"][len("file://"):], "rb") as f:
+            return types.Part.from_bytes(data=f.read(), mime_type=entry["mime_type"])
+    return types.Part.from_uri(file_uri=entry["uri"], mime_type=entry["mime_type"])
+
+class GeminiFileRegistry:
+    """
+    이미지를 내용 해시별로 Gemini Files API에 한 번만 업로드하고 파일 URI를 재사용하는 레지스트리입니다.
+    업로드된 파일은 서버에서 만료되므로 만료 시각을 기록하고, 만료가 가까우면 다시 업로드합니다.
+    업로드하는 내용은 prepare_model_image로 줄인 사본입니다.
+
+    Parameters:
+        backend: upload(data, mime_type, display_name)를 제공하는 객체 (None이면 GEMINI_FILES_BACKEND 설정에 따름)
+        path: 항목 저장 파일 경로
+        ttl: 업로드 후 재사용할 최대 시간 (초, 서버 만료 시각이 더 이르면 그쪽을 따름)
+    """
+    def __init__(self, backend=None, path: str = GEMINI_FILES_CACHE_FILE, ttl: float = GEMINI_FILE_TTL):
+        if backend is None:
+            backend = LocalFileBackend() if GEMINI_FILES_BACKEND == "local" else GenaiFileBackend()
+        self.backend = backend
+        self.path = path
+        self.ttl = ttl
+        self._entries = None  # {sha256: {"name", "uri", "mime_type", "expires"}}
+        self._digests = {}  # {경로: (mtime, 크기, sha256)} - 같은 파일의 해시 재계산 방지
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _load(self):
+        """저장 파일을 한 번만 불러옵니다. (_lock 보유 상태에서 호출)"""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logger.error(f"Gemini 파일 레지스트리 로드 실패: {e}")
+
+    def _save(self):
+        """항목을 디스크에 저장합니다. (_lock 보유 상태에서 호출)"""
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Gemini 파일 레지스트리 저장 실패: {e}")
+
+    def _digest(self, image_path) -> str:
+        if isinstance(image_path, MediaHandle) and image_path.sha256:
+            return image_path.sha256
+        if isinstance(image_path, MediaHandle) and image_path.in_memory:
+            return hashlib.sha256(image_path.data).hexdigest()
+        image_path = os.fspath(image_path)
+        stat = os.stat(image_path)
+        cached = self._digests.get(image_path)
+        if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+        digest = file_sha256(image_path)
+        self._digests[image_path] = (stat.st_mtime, stat.st_size, digest)
+        return digest
+
+    def _valid(self, entry: dict, now: float) -> bool:
+        return entry is not None and entry["expires"] - EXPIRY_MARGIN > now
+
+    def register(self, image_path: str) -> dict:
+        """
+        이미지의 업로드 항목을 반환합니다. 유효한 항목이 없을 때만 업로드합니다.
+
+        Parameters:
+            image_path: 이미지 파일 경로 또는 MediaHandle
+
+        Returns:
+            {"sha256", "name", "uri", "mime_type", "expires"} 또는 실패 시 None
+        """
+        try:
+            digest = self._digest(image_path)
+        except OSError as e:
+            logger.error(f"이미지 파일을 읽을 수 없습니다: {e}")
+            return None
+
+        with self._lock:
+            self._load()
+            entry = self._entries.get(digest)
+            if self._valid(entry, time.time()):
+                return {"sha256": digest, **entry}
+            key_lock = self._key_locks.setdefault(digest, threading.Lock())
+
+        # 같은 이미지를 동시에 여러 번 업로드하지 않도록 해시별로 직렬화 (실패해도 해시별 잠금은 정리)
+        try:
+            with key_lock:
+                with self._lock:
+                    entry = self._entries.get(digest)
+                    if self._valid(entry, time.time()):
+                        return {"sha256": digest, **entry}
+                data, mime_type = prepare_model_image(image_path) if GEMINI_IMAGE_LONG_EDGE else (None, None)
+                if data is None:
+                    with media_file(image_path) as f:
+                        data = f.read()
+                    mime_type = _guess_mime_type(os.fspath(image_path))
+                try:
+                    start = time.time()
+                    uploaded = self.backend.upload(data, mime_type, digest[:16])
+                    logger.info(f"Gemini 파일 업로드: {uploaded['name']} ({len(data) / 1024:.0f}KB, {time.time() - start:.2f}초)")
+                except Exception as e:
+                    logger.error(f"Gemini 파일 업로드 실패: {e}")
+                    return None
+                expires = time.time() + self.ttl
+                if uploaded.get("expires"):
+                    expires = min(expires, uploaded["expires"])
+                entry = {"name": uploaded["name"], "uri": uploaded["uri"], "mime_type": uploaded["mime_type"], "expires": expires}
+                with self._lock:
+                    now = time.time()
+                    self._entries = {k: v for k, v in self._entries.items() if self._valid(v, now)}
+                    self._entries[digest] = entry
+                    self._save()
+                return {"sha256": digest, **entry}
+        finally:
+            with self._lock:
+                self._key_locks.pop(digest, None)
+
+    def lookup(self, image_path: str) -> dict:
+        """
+        유효한 업로드 항목이 있으면 반환합니다. register와 달리 업로드하지 않습니다.
+
+        Returns:
+            register와 같은 형식 또는 항목이 없거나 만료가 가까우면 None
+        """
+        try:
+            digest = self._digest(image_path)
+        except OSError:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._entries.get(digest)
+            if self._valid(entry, time.time()):
+                return {"sha256": digest, **entry}
+        return None
+
+    def part_for(self, image_path: str, upload: bool = True):
+        """
+        이미지를 참조하는 Part를 반환합니다. (업로드 실패 시 None)
+        upload가 False이면 이미 업로드된 유효한 항목만 사용하고, 없으면 업로드하지 않고 None을 반환합니다.
+        """
+        entry = self.register(image_path) if upload else self.lookup(image_path)
+        if entry is None:
+            return None
+        try:
+            return file_part(entry)
+        except Exception as e:
+            logger.error(f"Gemini 파일 참조 생성 실패: {e}")
+            return None
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_file_registry() -> GeminiFileRegistry:
+    """모듈 단위로 공유되는 Gemini 파일 레지스트리를 반환합니다."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = GeminiFileRegistry()
+    return _registry
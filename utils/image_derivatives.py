@@ -0,0 +1,146 @@
+import os
+import logging
+import threading
+from contextlib import nullcontext
+from PIL import Image, features
+from .image_service import get_image_service, shared_buffer
+from .media import MediaHandle, media_file
+from config import (PREVIEW_LONG_EDGE, DERIVATIVE_LONG_EDGE, DERIVATIVE_MAX_BYTES,
+                    DISCORD_IMAGE_MAX_BYTES, GEMINI_IMAGE_LONG_EDGE)
+
+logger = logging.getLogger(__name__)
+
+# 소비자별 허용 형식과 최소 조건. 조건을 만족하는 변형 중 가장 작은 파일을 사용합니다.
+CONSUMERS = {
+    "discord": {"formats": ("WEBP", "JPEG", "PNG", "GIF"), "max_bytes": DISCORD_IMAGE_MAX_BYTES, "min_long_edge": 1280},
+    "gemini": {"formats": ("WEBP", "JPEG", "PNG"), "max_bytes": None, "min_long_edge": GEMINI_IMAGE_LONG_EDGE},
+    "api": {"formats": ("AVIF", "WEBP", "JPEG", "PNG"), "max_bytes": None, "min_long_edge": PREVIEW_LONG_EDGE},
+}
+
+def avif_supported() -> bool:
+    """설치된 Pillow가 AVIF 인코딩을 지원하는지 확인합니다."""
+    try:
+        return bool(features.check("avif"))
+    except Exception:
+        return False
+
+def _file_variant(source) -> dict:
+    """이미 저장된 이미지(경로 또는 MediaHandle)의 변형 정보 (헤더만 읽음)"""
+    handle = source if isinstance(source, MediaHandle) else MediaHandle.from_path(source)
+    with media_file(handle) as f, Image.open(f) as img:
+        img_format, size = img.format, img.size
+    return {"path": handle.path, "format": img_format, "bytes": handle.size, "long_edge": max(size), "handle": handle}
+
+def _write_variant(path: str, data: bytes, img_format: str, size) -> dict:
+    # 같은 내용의 동시 요청이 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return {"path": path, "format": img_format, "bytes": len(data), "long_edge": max(size), "handle": MediaHandle(path, data)}
+
+def _fits(variant: dict, consumer: str) -> bool:
+    """변형(주로 원본)을 다시 인코딩하지 않고 소비자에게 그대로 보낼 수 있는지 확인합니다."""
+    rule = CONSUMERS[consumer]
+    return variant["format"] in rule["formats"] and not (rule["max_bytes"] and variant["bytes"] > rule["max_bytes"])
+
+def _within_target(variant: dict) -> bool:
+    """원본이 이미 WebP 파생본의 목표(DERIVATIVE_MAX_BYTES, DERIVATIVE_LONG_EDGE)보다 작은지 확인합니다."""
+    return variant["bytes"] <= DERIVATIVE_MAX_BYTES and variant["long_edge"] <= DERIVATIVE_LONG_EDGE
+
+def generate_derivatives(image_path, consumers=("discord", "gemini")) -> dict:
+    """
+    업로드 이미지의 파생본 중 consumers가 실제로 사용할 것만 이미지 서비스에서 병렬로 생성해 원본 옆에 저장합니다.
+    디스코드로 보낼 크기 목표 WebP는 원본이 이미 목표보다 작을 때만 건너뛰고(그 밖의 소비자는 원본 형식을 받지 못할 때만 생성),
+    미리보기와 AVIF는 "api" 소비자가 있을 때만 만듭니다.
+    업로드는 내용 해시 경로에 저장되므로, 같은 파일이 다시 올라오면 이미 만든 파생본을 재사용합니다.
+    원본이 메모리에 있는 MediaHandle이면 공유 메모리로 워커에 넘겨 디스크를 다시 읽지 않고,
+    디스크에만 있는 큰 원본은 경로를 넘겨 각 워커가 파일을 직접 읽습니다.
+
+    Parameters:
+        image_path: 원본 이미지 경로 또는 MediaHandle
+        consumers: 결과를 사용할 CONSUMERS 키 목록
+
+    Returns:
+        {"original", "preview", "webp", "avif"} 키의 변형 정보 딕셔너리
+        각 값은 {"path", "format", "bytes", "long_edge", "handle"} (생성에 실패한 변형은 빠짐)
+    """
+    try:
+        derivatives = {"original": _file_variant(image_path)}
+    except Exception as e:
+        logger.error(f"원본 이미지 정보를 읽는 중 오류 발생: {e}")
+        path = os.fspath(image_path)
+        return {"original": {"path": path, "format": None, "bytes": 0, "long_edge": 0, "handle": MediaHandle(path)}}
+
+    original = derivatives["original"]["handle"]
+    filename, _ = os.path.splitext(original.path)
+    specs = {}
+    if "api" in consumers:
+        specs["preview"] = ("JPEG", f"{filename}_preview.jpg", PREVIEW_LONG_EDGE, 75)
+    # 디스코드로 나가는 바이트를 줄이도록 목표 크기 WebP를 만들고, 원본이 더 작으면 _choose가 원본을 고름
+    if ("discord" in consumers and not _within_target(derivatives["original"])) or \
+            any(not _fits(derivatives["original"], consumer) for consumer in consumers):
+        specs["webp"] = ("WEBP", f"{filename}_web.webp", DERIVATIVE_LONG_EDGE, 85)
+    if "api" in consumers and avif_supported():
+        specs["avif"] = ("AVIF", f"{filename}_web.avif", DERIVATIVE_LONG_EDGE, 70)
+
+    service = get_image_service()
+    pending = {}
+    for name, spec in specs.items():
+        if os.path.exists(spec[1]):
+            try:
+                derivatives[name] = _file_variant(spec[1])
+                continue
+            except Exception as e:
+                logger.warning(f"기존 {name} 파생 이미지를 읽지 못해 다시 생성합니다: {e}")
+        pending[name] = spec
+
+    # 공유 메모리는 모든 작업이 끝날 때까지 유지
+    with shared_buffer(original.data) if pending and original.in_memory else nullcontext(original.path) as source:
+        jobs = {name: (img_format, path, service.submit("encode_to_size", source, img_format, DERIVATIVE_MAX_BYTES,
+                                                        long_edge=long_edge, quality=quality))
+                for name, (img_format, path, long_edge, quality) in pending.items()}
+        for name, (img_format, path, future) in jobs.items():
+            try:
+                result = future.result()
+                derivatives[name] = _write_variant(path, result["data"], img_format, result["size"])
+            except Exception as e:
+                logger.error(f"{name} 파생 이미지 생성 중 오류 발생: {e}")
+
+    summary = ", ".join(f"{name} {v['bytes'] / 1024:.0f}KB" for name, v in derivatives.items())
+    logger.info(f"파생 이미지 생성: {summary}")
+    return derivatives
+
+def _choose(derivatives: dict, consumer: str) -> dict:
+    rule = CONSUMERS[consumer]
+    original = derivatives["original"]
+    candidates = []
+    for variant in derivatives.values():
+        if variant["format"] not in rule["formats"]:
+            continue
+        if rule["max_bytes"] and variant["bytes"] > rule["max_bytes"]:
+            continue
+        if variant["long_edge"] < min(rule["min_long_edge"], original["long_edge"]):
+            continue
+        candidates.append(variant)
+    if not candidates:
+        return original
+    return min(candidates, key=lambda v: v["bytes"])
+
+def choose_variant(derivatives: dict, consumer: str) -> str:
+    """
+    소비자가 받을 수 있는 변형 중 가장 작은 파일의 경로를 반환합니다.
+    원본보다 해상도가 낮은 변형은 min_long_edge를 만족해야 하며, 조건에 맞는 변형이 없으면 원본을 사용합니다.
+
+    Parameters:
+        derivatives: generate_derivatives의 반환값
+        consumer: CONSUMERS의 키 ("discord", "gemini", "api")
+
+    Returns:
+        선택된 이미지 파일 경로
+    """
+    return _choose(derivatives, consumer)["path"]
+
+def choose_media(derivatives: dict, consumer: str) -> MediaHandle:
+    """choose_variant와 같은 기준으로 고른 변형의 MediaHandle (메모리에 있으면 디스크를 다시 읽지 않음)"""
+    return _choose(derivatives, consumer)["handle"]
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import logging
+import functools
+import threading
+import numpy as np
+from PIL import Image, ImageOps
+from .media import MediaHandle
+from config import CACHE_FOLDER, PHASH_CACHE_MAX_ENTRIES, PHASH_CACHE_TTL, PHASH_MAX_DISTANCE
+
+logger = logging.getLogger(__name__)
+
+PHASH_CACHE_FILE = os.path.join(CACHE_FOLDER, "image_hashes.json")
+HASH_SIZE = 8  # 8x8 = 64비트 해시
+
+def _grayscale(image: Image.Image) -> Image.Image:
+    """해시 계산용 흑백 이미지. JPEG는 draft 모드로 작은 해상도만 디코딩합니다."""
+    image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+    return ImageOps.exif_transpose(image).convert("L")
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int("".join("1" if b else "0" for b in bits.flatten()), 2)
+
+def average_hash(image: Image.Image) -> int:
+    """평균 해시 (aHash): 8x8로 축소한 뒤 각 픽셀이 평균보다 밝은지 여부"""
+    pixels = np.asarray(image.resize((HASH_SIZE, HASH_SIZE), Image.BOX), dtype=np.float32)
+    return _bits_to_int(pixels > pixels.mean())
+
+def difference_hash(image: Image.Image) -> int:
+    """차이 해시 (dHash): 9x8로 축소한 뒤 가로로 인접한 픽셀의 밝기 증감"""
+    pixels = np.asarray(image.resize((HASH_SIZE + 1, HASH_SIZE), Image.BOX), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+def image_hashes(image_path: str) -> tuple:
+    """
+    이미지 파일의 지각 해시를 계산합니다.
+
+    Parameters:
+        image_path: 파일 경로, 파일 객체 또는 MediaHandle (메모리에 있으면 디스크를 읽지 않음)
+
+    Returns:
+        (dHash, aHash) 64비트 정수
+    """
+    source = image_path.open() if isinstance(image_path, MediaHandle) else image_path
+    with Image.open(source) as image:
+        gray = _grayscale(image)
+    return difference_hash(gray), average_hash(gray)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+class PerceptualHashIndex:
+    """
+    지각 해시로 거의 같은 이미지의 검색 결과를 찾는 캐시입니다.
+    dHash와 aHash의 해밍 거리가 모두 max_distance 이하이면 같은 이미지로 간주하며,
+    JSON 파일에 저장해 재시작 후에도 유지합니다.
+
+    Parameters:
+        path: 저장 파일 경로
+        max_entries: 최대 항목 수 (초과 시 오래 사용되지 않은 항목부터 제거)
+        ttl: 항목 유효 시간 (초)
+        max_distance: 같은 이미지로 볼 최대 해밍 거리 (64비트 기준)
+    """
+    def __init__(self, path: str = PHASH_CACHE_FILE, max_entries: int = PHASH_CACHE_MAX_ENTRIES,
+                 ttl: float = PHASH_CACHE_TTL, max_distance: int = PHASH_MAX_DISTANCE):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._entries = []  # {"kind", "params", "dhash", "ahash", "result", "created", "accessed"}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        """저장 파일을 한 번만 불러옵니다. (_lock 보유 상태에서 호출)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            for entry in entries:
+                entry["dhash"] = int(entry["dhash"], 16)
+                entry["ahash"] = int(entry["ahash"], 16)
+            self._entries = entries
+            logger.info(f"이미지 해시 캐시 로드: {len(entries)}개")
+        except Exception as e:
+            logger.error(f"이미지 해시 캐시 로드 실패: {e}")
+
+    def _save(self):
+        """항목을 디스크에 저장합니다. (_lock 보유 상태에서 호출)"""
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump([{**entry, "dhash": f"{entry['dhash']:016x}", "ahash": f"{entry['ahash']:016x}"}
+                           for entry in self._entries], f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"이미지 해시 캐시 저장 실패: {e}")
+
+    def lookup(self, kind: str, params: str, hashes: tuple):
+        """
+        같은 종류/인자로 검색된 거의 같은 이미지의 결과를 찾습니다.
+
+        Parameters:
+            kind: 검색 종류 (예: "similar_images")
+            params: 이미지 외 검색 인자를 직렬화한 문자열
+            hashes: image_hashes의 반환값
+
+        Returns:
+            캐시된 결과 또는 None
+        """
+        dhash, ahash = hashes
+        now = time.time()
+        with self._lock:
+            self._load()
+            self._entries = [e for e in self._entries if now - e["created"] < self.ttl]
+            best, best_distance = None, None
+            for entry in self._entries:
+                if entry["kind"] != kind or entry["params"] != params:
+                    continue
+                distance = hamming_distance(dhash, entry["dhash"])
+                if distance > self.max_distance or hamming_distance(ahash, entry["ahash"]) > self.max_distance:
+                    continue
+                if best is None or distance < best_distance:
+                    best, best_distance = entry, distance
+            if best is None:
+                return None
+            best["accessed"] = now
+            logger.info(f"이미지 해시 캐시 사용: {kind}, 거리 {best_distance}")
+            return best["result"]
+
+    def put(self, kind: str, params: str, hashes: tuple, result):
+        """검색 결과를 저장합니다. 항목 수가 max_entries를 넘으면 오래 사용되지 않은 항목부터 제거합니다."""
+        now = time.time()
+        with self._lock:
+            self._load()
+            self._entries.append({"kind": kind, "params": params, "dhash": hashes[0], "ahash": hashes[1],
+                                  "result": result, "created": now, "accessed": now})
+            if len(self._entries) > self.max_entries:
+                self._entries.sort(key=lambda e: e["accessed"], reverse=True)
+                del self._entries[self.max_entries:]
+            self._save()
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_phash_index() -> PerceptualHashIndex:
+    """모듈 단위로 공유되는 이미지 해시 캐시를 반환합니다."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PerceptualHashIndex()
+    return _index
+
+def phash_cached(kind: str, should_cache=bool, resolve_path=None):
+    """
+    첫 번째 인자로 이미지 경로를 받는 검색 함수에 지각 해시 캐시를 적용하는 데코레이터입니다.
+    해시 계산이나 캐시 조회/저장에 실패하면 캐시 없이 검색 함수를 그대로 실행합니다.
+
+    Parameters:
+        kind: 캐시 구분용 검색 종류
+        should_cache: 결과를 저장할지 판단하는 함수 (기본값: 빈 결과는 저장하지 않음)
+        resolve_path: 해시 계산 전에 경로를 정규화하는 함수 (검색 함수가 상대 경로를 자체 기준으로 바꾸는 경우)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(image_path, *args, **kwargs):
+            if resolve_path is not None:
+                image_path = resolve_path(image_path)
+            try:
+                hashes = image_hashes(image_path)
+                params = json.dumps([args, kwargs], sort_keys=True, default=str)
+                index = get_phash_index()
+                cached = index.lookup(kind, params, hashes)
+            except Exception as e:
+                logger.error(f"이미지 해시 캐시 조회 실패, 캐시 없이 검색합니다: {e}")
+                return func(image_path, *args, **kwargs)
+            if cached is not None:
+                return cached
+            result = func(image_path, *args, **kwargs)
+            if should_cache(result):
+                try:
+                    index.put(kind, params, hashes, result)
+                except Exception as e:
+                    logger.error(f"이미지 해시 캐시 저장 실패: {e}")
+            return result
+        return wrapper
+    return decorator
@@ -1,16 +1,76 @@
+import io
 import os
+import math
 import logging
 from PIL import Image
 from PIL import ImageOps
+from .media import media_file, media_size
+from config import GEMINI_IMAGE_LONG_EDGE, GEMINI_IMAGE_QUALITY
+
+MIN_QUALITY = 40       # 품질 탐색 하한
+QUALITY_TOLERANCE = 4  # 품질 이분 탐색 종료 간격
+SIZE_MARGIN = 0.92     # 해상도 추정 시 목표 용량 대비 여유
+UNDERSHOOT_RATIO = 0.7  # 결과가 목표 용량의 이 비율보다 작으면 해상도를 키워 한 번 더 시도
+MIN_WIDTH = 300
+LOSSY_FORMATS = ('JPEG', 'WEBP', 'AVIF')
+PROBE_STRIPS = 8       # 용량 추정에 사용할 가로 띠 개수 (전체 높이의 1/4)
+
+def _encode(img, img_format, quality):
+    """이미지를 메모리 버퍼에 인코딩해 바이트로 반환합니다."""
+    buffer = io.BytesIO()
+    if img_format in LOSSY_FORMATS:
+        img.save(buffer, format=img_format, quality=quality, optimize=True)
+    else:
+        img.save(buffer, format=img_format)
+    return buffer.getvalue()
+
+def _estimate_bytes(img, img_format, quality):
+    """
+    원본 해상도에서 고르게 뽑은 가로 띠들만 인코딩해 전체 인코딩 용량을 추정합니다.
+    원본 파일 용량은 저장 품질이 달라 픽셀당 바이트 수 추정에 쓰기 어렵기 때문입니다.
+    """
+    width, height = img.size
+    strip_height = height // (PROBE_STRIPS * 4)
+    if strip_height < 8:
+        return len(_encode(img, img_format, quality))
+    probe = Image.new(img.mode, (width, strip_height * PROBE_STRIPS))
+    step = height // PROBE_STRIPS
+    for i in range(PROBE_STRIPS):
+        top = i * step + (step - strip_height) // 2
+        probe.paste(img.crop((0, top, width, top + strip_height)), (0, i * strip_height))
+    return len(_encode(probe, img_format, quality)) * height / probe.size[1]
+
+def _search_quality(img, img_format, target_bytes, low, high):
+    """
+    목표 용량 이하가 되는 가장 높은 품질을 이분 탐색합니다.
+
+    Returns:
+        (인코딩된 바이트, 품질) 또는 low 품질로도 넘으면 (None, None)
+    """
+    best, best_quality = None, None
+    while high - low >= 0:
+        mid = (low + high) // 2
+        data = _encode(img, img_format, mid)
+        logging.debug(f"품질 탐색: {mid}, 용량: {len(data) / (1024 * 1024):.2f}MB")
+        if len(data) <= target_bytes:
+            best, best_quality = data, mid
+            low = mid + 1
+        else:
+            high = mid - 1
+        if best is not None and high - low < QUALITY_TOLERANCE:
+            break
+    return best, best_quality
 
 def resize_image(file_path, max_size_mb=7.5, quality=85):
     """
     이미지 파일 크기를 지정된 MB 이하로 줄이는 함수
+    일부 영역을 인코딩해 얻은 픽셀당 바이트 수로 필요한 축소 비율을 먼저 추정하고, 메모리에서 인코딩하며
+    품질은 이분 탐색으로 맞춘 뒤 결과를 디스크에 한 번만 저장합니다.
     
     Parameters:
         file_path: 원본 이미지 파일 경로
         max_size_mb: 최대 파일 크기 (MB)
-        quality: 압축 품질 (1-100)
+        quality: 압축 품질 (1-100), 탐색할 최대 품질
         
     Returns:
         변환된 이미지 파일 경로
@@ -21,7 +81,8 @@ def resize_image(file_path, max_size_mb=7.5, quality=85):
         return None
     
     # 원본 파일 크기 확인
-    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    file_size = os.path.getsize(file_path)
+    file_size_mb = file_size / (1024 * 1024)
     
     # 이미 충분히 작으면 원본 반환
     if file_size_mb <= max_size_mb:
@@ -31,62 +92,93 @@ def resize_image(file_path, max_size_mb=7.5, quality=85):
     # 출력 파일 경로 생성 - 원본 파일명에 _resized 추가
     filename, ext = os.path.splitext(file_path)
     output_path = f"{filename}_resized{ext}"
+    target_bytes = int(max_size_mb * 1024 * 1024)
     
-    # 이미지 불러와서 크기 조정
     try:
         with Image.open(file_path) as img:
+            img_format = Image.registered_extensions().get(ext.lower()) or img.format or 'JPEG'
             # Adjust image orientation according to EXIF
             img = ImageOps.exif_transpose(img)
-            # 이미지 정보 로깅
+            if img_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            width, height = img.size
             logging.debug(f"원본 이미지: {file_path}, 크기: {img.size}, 용량: {file_size_mb:.2f}MB")
             
-            # 초기 품질 설정
-            current_quality = quality
-            img_format = ext.lower().replace('.', '') or 'JPEG'
-            
-            # 반복적으로 크기와 품질 조정
-            while True:
-                # 비율 유지하며 크기 조정 (기본: 원본 크기)
-                width, height = img.size
-                new_size = (width, height)
-                
-                # 파일이 너무 크면 해상도 줄이기
-                if file_size_mb > max_size_mb * 1.5:
-                    scale_factor = 0.8
-                    new_size = (int(width * scale_factor), int(height * scale_factor))
-                    
-                # 이미지 리사이즈 및 저장
-                resized_img = img.resize(new_size, Image.LANCZOS)
-                resized_img.save(output_path, format=img_format, quality=current_quality, optimize=True)
-                
-                # 새 파일 크기 확인
-                new_file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-                logging.debug(f"리사이즈 후: {new_size}, 품질: {current_quality}, 용량: {new_file_size_mb:.2f}MB")
+            # 같은 품질에서 용량은 픽셀 수에 거의 비례하므로 픽셀당 바이트 수로 필요한 축소 비율을 추정
+            estimated = _estimate_bytes(img, img_format, quality)
+            scale = 1.0 if estimated <= target_bytes else math.sqrt(target_bytes * SIZE_MARGIN / estimated)
+            data = best = None
+            grown = False
+            for _ in range(5):
+                new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+                resized_img = img if new_size == img.size else img.resize(new_size, Image.LANCZOS)
+                data = _encode(resized_img, img_format, quality)
+                logging.debug(f"리사이즈 후: {new_size}, 품질: {quality}, 용량: {len(data) / (1024 * 1024):.2f}MB")
+                if len(data) <= target_bytes:
+                    best = data
+                    # 축소하면 노이즈가 줄어 추정보다 작아지므로, 목표보다 많이 작으면 한 번만 해상도를 키워 재시도
+                    if scale >= 1.0 or grown or len(data) >= target_bytes * UNDERSHOOT_RATIO:
+                        break
+                    scale = min(1.0, scale * math.sqrt(target_bytes * SIZE_MARGIN / len(data)))
+                    grown = True
+                    continue
+                if best is not None:
+                    break
                 
-                # 목표 크기 이하면 완료
-                if new_file_size_mb <= max_size_mb:
-                    logging.info(f"이미지 리사이즈 완료: {file_size_mb:.2f}MB -> {new_file_size_mb:.2f}MB")
-                    return output_path
+                # 조금 넘는 경우에는 해상도를 유지하고 품질만 낮춤
+                if img_format in LOSSY_FORMATS and len(data) <= target_bytes * 1.5:
+                    fitted, fitted_quality = _search_quality(resized_img, img_format, target_bytes, MIN_QUALITY, quality - 1)
+                    if fitted is not None:
+                        best = fitted
+                        logging.debug(f"품질 조정: {fitted_quality}")
+                        break
                 
-                # 품질 더 낮추기
-                current_quality -= 10
-                
-                # 품질이 너무 낮아지면 해상도 조정
-                if current_quality < 40:
-                    width, height = new_size
-                    new_size = (int(width * 0.8), int(height * 0.8))
-                    current_quality = 75
-                
-                # 최대 10회 시도
-                if width < 300 or current_quality < 20:
-                    logging.warning(f"최소 크기에 도달: {new_file_size_mb:.2f}MB, 그대로 반환")
-                    return output_path
+                # 측정된 용량으로 축소 비율을 다시 추정
+                if new_size[0] <= MIN_WIDTH:
+                    logging.warning(f"최소 크기에 도달: {len(data) / (1024 * 1024):.2f}MB, 그대로 반환")
+                    break
+                scale *= math.sqrt(target_bytes * SIZE_MARGIN / len(data))
+                scale = max(scale, MIN_WIDTH / width)
+            data = best or data
+        
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        logging.info(f"이미지 리사이즈 완료: {file_size_mb:.2f}MB -> {len(data) / (1024 * 1024):.2f}MB")
+        return output_path
     
     except Exception as e:
         logging.error(f"이미지 리사이즈 중 오류: {e}")
         return file_path
+
+def prepare_model_image(file_path, long_edge=GEMINI_IMAGE_LONG_EDGE, quality=GEMINI_IMAGE_QUALITY):
+    """
+    모델 입력용 이미지를 메모리에서 만드는 함수 (디스크와 Discord 전송용 사본은 건드리지 않음)
+    모델은 내부적으로 이미지를 축소하므로 긴 변을 long_edge 이하로 줄여 업로드 크기와 디코딩 비용을 줄입니다.
+    JPEG는 draft 모드로 1/2, 1/4, 1/8 배율 디코딩을 사용해 필요한 만큼의 픽셀만 읽습니다.
+    
+    Parameters:
+        file_path: 원본 이미지 파일 경로 또는 MediaHandle
+        long_edge: 긴 변 최대 픽셀
+        quality: JPEG 압축 품질
         
-    return output_path
+    Returns:
+        (JPEG 바이트, MIME 타입) 또는 실패 시 (None, None)
+    """
+    try:
+        with media_file(file_path) as f, Image.open(f) as img:
+            ratio = min(1.0, long_edge / max(img.size))
+            img.draft('RGB', (math.ceil(img.size[0] * ratio), math.ceil(img.size[1] * ratio)))
+            # Adjust image orientation according to EXIF
+            img = ImageOps.exif_transpose(img)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            img.thumbnail((long_edge, long_edge), Image.LANCZOS)
+            data = _encode(img, 'JPEG', quality)
+        logging.debug(f"모델 입력 이미지: {img.size}, {len(data) / 1024:.0f}KB (원본 {media_size(file_path) / 1024:.0f}KB)")
+        return data, 'image/jpeg'
+    except Exception as e:
+        logging.error(f"모델 입력 이미지 전처리 중 오류: {e}")
+        return None, None
 
 def compress_audio(file_path, max_size_mb=7.5):
     """
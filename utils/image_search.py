@@ -1,114 +1,204 @@
 # %%
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-import time
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+from utils.webdriver_pool import get_webdriver_pool
+from utils.image_hash import phash_cached
+from config import THUMBNAIL_SIZE, THUMBNAIL_MAX_BYTES, THUMBNAIL_WORKERS
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 import os
+import base64
+import binascii
+import threading
 import requests
 from PIL import Image
 from io import BytesIO
 
-def search_similar_images(image_path, num_results=5):
+_thumbnail_session = None
+_thumbnail_session_lock = threading.Lock()
+
+def _get_thumbnail_session():
+    """썸네일 다운로드용 공유 세션 (워커 수만큼 커넥션을 재사용)"""
+    global _thumbnail_session
+    with _thumbnail_session_lock:
+        if _thumbnail_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=THUMBNAIL_WORKERS, pool_maxsize=THUMBNAIL_WORKERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+            _thumbnail_session = session
+    return _thumbnail_session
+
+def _read_image_bytes(url, max_bytes, timeout):
+    """이미지 URL(또는 base64 data URL)의 바이트를 max_bytes까지만 메모리로 읽습니다. 넘으면 None."""
+    if url.startswith("data:"):
+        header, _, data = url.partition(",")
+        if ";base64" not in header or len(data) * 3 // 4 > max_bytes:
+            return None
+        return base64.b64decode(data)
+    with _get_thumbnail_session().get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        if int(response.headers.get("Content-Length") or 0) > max_bytes:
+            return None
+        buffer = BytesIO()
+        for chunk in response.iter_content(64 * 1024):
+            buffer.write(chunk)
+            if buffer.tell() > max_bytes:
+                return None
+        return buffer.getvalue()
+
+def _make_thumbnail(url, size, max_bytes, timeout):
+    """이미지 하나를 받아 썸네일 JPEG data URL로 변환합니다. (디스크에 쓰지 않음)"""
+    result = {"url": url if not url.startswith("data:") else None, "thumbnail": None, "width": None, "height": None}
+    try:
+        data = _read_image_bytes(url, max_bytes, timeout)
+        if data is None:
+            return result
+        with Image.open(BytesIO(data)) as image:
+            result["width"], result["height"] = image.size
+            # JPEG는 draft 모드로 목표 크기에 가까운 해상도만 디코딩
+            image.draft("RGB", (size, size))
+            image = image.convert("RGB")
+            image.thumbnail((size, size))
+            output = BytesIO()
+            image.save(output, format="JPEG", quality=80)
+        result["thumbnail"] = "data:image/jpeg;base64," + base64.b64encode(output.getvalue()).decode("ascii")
+    except (requests.RequestException, OSError, binascii.Error, ValueError) as e:
+        print(f"썸네일 생성 실패 ({(url or '')[:80]}): {e}")
+    return result
+
+def fetch_thumbnails(urls, size=THUMBNAIL_SIZE, max_bytes=THUMBNAIL_MAX_BYTES, timeout=10):
+    """
+    검색 결과 이미지들을 동시에 받아 썸네일로 변환합니다.
+
+    Args:
+        urls (list): 이미지 URL 또는 base64 data URL 목록
+        size (int): 썸네일 긴 변 최대 픽셀
+        max_bytes (int): 이미지 하나당 최대 다운로드 크기 (넘으면 건너뜀)
+        timeout (float): 요청 타임아웃 (초)
+
+    Returns:
+        list: urls와 같은 순서의 {"url", "thumbnail"(JPEG data URL 또는 None), "width", "height"} 목록
+    """
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(THUMBNAIL_WORKERS, len(urls))) as executor:
+        return list(executor.map(lambda url: _make_thumbnail(url, size, max_bytes, timeout), urls))
+
+def wait_for_any_selector(driver, selectors, timeout=15):
+    """
+    여러 CSS 선택자 중 하나라도 요소가 나타날 때까지 기다립니다. (고정 대기 대신 사용)
+
+    Args:
+        driver: Selenium 웹드라이버
+        selectors (list): 시도할 CSS 선택자 목록 (앞쪽이 우선)
+        timeout (float): 최대 대기 시간 (초)
+
+    Returns:
+        list: 처음으로 요소가 발견된 선택자의 요소 목록 (시간 초과 시 빈 목록)
+    """
+    def first_match(d):
+        for selector in selectors:
+            elements = d.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                print(f"선택자 '{selector}'로 {len(elements)}개 이미지 발견")
+                return elements
+        return False
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.2).until(first_match)
+    except TimeoutException:
+        return []
+
+def search_similar_images(image_path, num_results=5, thumbnails=False):
     """
     이미지 파일을 기반으로 구글 이미지 검색을 수행하고 가장 유사한 이미지 결과를 반환합니다.
     
     Args:
         image_path (str): 검색할 이미지 파일의 경로
         num_results (int): 반환할 결과 개수 (기본값: 5)
+        thumbnails (bool): True이면 결과 이미지를 받아 썸네일까지 반환 (base64 data URL 결과 포함)
         
     Returns:
-        list: 유사 이미지 URL 목록
+        list: 유사 이미지 URL 목록 (thumbnails=True이면 fetch_thumbnails 결과 목록)
     """
-    # Chrome Driver 설정
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # 브라우저 창 없이 실행
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--window-size=1920,1080")  # 화면 크기 설정
+    image_urls = _search_similar_image_urls(image_path, num_results, include_data_urls=thumbnails)
+    # 드라이버를 풀에 반환한 뒤 결과 이미지를 동시에 다운로드
+    if thumbnails:
+        return fetch_thumbnails(image_urls)
+    return image_urls
 
-    # ChromeDriverManager를 사용하여 자동으로 드라이버 설치 및 경로 설정
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+def _resolve_image_path(image_path):
+    """상대 경로를 프로젝트 루트(utils/..) 기준 절대 경로로 바꿉니다."""
+    image_path = os.fspath(image_path)
+    if not os.path.isabs(image_path):
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        image_path = os.path.abspath(os.path.join(current_dir, "..", image_path))
+    return image_path
 
-    try:
+# 캐시 키용 해시도 검색과 같은 기준으로 해석한 경로에서 계산
+@phash_cached("similar_images", resolve_path=_resolve_image_path)
+def _search_similar_image_urls(image_path, num_results=5, include_data_urls=False):
+    """search_similar_images의 브라우저 검색 단계. 유사 이미지 URL 목록을 반환합니다."""
+    # 이미지 파일 경로 확인
+    image_path = _resolve_image_path(image_path)
+
+    print(f"검색할 이미지 경로: {image_path}")
+
+    # 공유 풀의 드라이버 사용 (매 검색마다 브라우저를 새로 띄우지 않음)
+    with get_webdriver_pool().driver() as driver:
         # Google 이미지 검색 페이지 열기
         driver.get("https://www.google.com/imghp")
-        time.sleep(2)  # 페이지 로딩 대기
-
-        # 이미지 파일 경로 확인
-        if not os.path.isabs(image_path):
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            image_path = os.path.abspath(os.path.join(current_dir, "..", image_path))
-        
-        print(f"검색할 이미지 경로: {image_path}")
 
         # 구글 이미지 검색 페이지에서 이미지 검색 버튼 찾기
         try:
-            # 카메라 아이콘 찾기 (새로운 UI)
-            search_by_image_btn = driver.find_element(By.CSS_SELECTOR, ".nDcEnd")
+            # 카메라 아이콘 찾기 (새로운 UI, 다른 가능한 선택자 포함)
+            search_by_image_btn = WebDriverWait(driver, 10).until(EC.element_to_be_clickable(
+                (By.CSS_SELECTOR, ".nDcEnd, div[aria-label='이미지로 검색'], div[aria-label='Search by image']")
+            ))
             search_by_image_btn.click()
-            time.sleep(1)
-        except:
-            try:
-                # 다른 가능한 선택자 시도
-                search_by_image_btn = driver.find_element(By.XPATH, "//div[@aria-label='이미지로 검색' or @aria-label='Search by image']")
-                search_by_image_btn.click()
-                time.sleep(1)
-            except Exception as e:
-                print(f"카메라 아이콘을 찾을 수 없습니다: {e}")
+        except TimeoutException as e:
+            print(f"카메라 아이콘을 찾을 수 없습니다: {e}")
 
         # 이미지 업로드 입력 필드 찾기
         try:
-            upload_input = driver.find_element(By.CSS_SELECTOR, "input[type='file']")
+            upload_input = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='file']"))
+            )
             upload_input.send_keys(image_path)
             print("이미지 업로드 완료")
-            
-            # 검색 결과 로딩 대기
-            time.sleep(7)
-            
-            # 검색 결과 이미지 가져오기 (여러 선택자 시도)
-            similar_images = []
-            
-            # 다양한 CSS 선택자 시도
+
+            # 검색 결과 이미지 가져오기 (여러 선택자 중 먼저 나타나는 것 사용)
             selectors = [
-                "img.Q4LuWd", 
-                ".rg_i", 
-                "img.rg_i", 
-                ".isv-r img", 
+                "img.Q4LuWd",
+                ".rg_i",
+                "img.rg_i",
+                ".isv-r img",
                 ".PNCib img"
             ]
-            
-            for selector in selectors:
-                image_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                if image_elements:
-                    print(f"선택자 '{selector}'로 {len(image_elements)}개 이미지 발견")
-                    break
-            
+            image_elements = wait_for_any_selector(driver, selectors, timeout=15)
+
             # 상위 결과 추출
+            similar_images = []
             for i, img in enumerate(image_elements[:num_results]):
                 try:
                     # 이미지 URL 가져오기 (src 또는 data-src 속성)
                     img_url = img.get_attribute("src") or img.get_attribute("data-src")
-                    
-                    if img_url and not img_url.startswith("data:"):  # base64 인코딩된 이미지 제외
+
+                    # base64 인코딩된 이미지는 썸네일을 만들 때만 포함
+                    if img_url and (include_data_urls or not img_url.startswith("data:")):
                         similar_images.append(img_url)
-                        print(f"유사 이미지 {i+1}: {img_url}")
+                        print(f"유사 이미지 {i+1}: {img_url[:100]}")
                 except Exception as e:
                     print(f"이미지 URL 추출 중 오류: {e}")
-            
-            return similar_images[:num_results]
-            
+
         except Exception as e:
             print(f"이미지 업로드 중 오류 발생: {e}")
             return []
-            
-    finally:
-        # 브라우저 종료
-        driver.quit()
-        print("브라우저 세션 종료")
+
+    return similar_images[:num_results]
 
 # 테스트 실행
 if __name__ == "__main__":
@@ -204,13 +294,12 @@ import random
 import os
 import json
 from pathlib import Path
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
+from utils.webdriver_pool import get_webdriver_pool
+from utils.image_hash import phash_cached
 import base64
 import logging
 
@@ -225,6 +314,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 같은(또는 거의 같은) 이미지는 브라우저 검색 없이 캐시된 제목을 반환
+@phash_cached("reverse_titles", should_cache=lambda titles: bool(titles) and titles != ["검색 결과를 가져올 수 없습니다."])
 def google_reverse_image_search(image_path, top_k=5, max_retries=3):
     """
     로컬 이미지를 Selenium을 사용하여 Google 이미지 검색에 업로드하고,
@@ -239,149 +330,117 @@ def google_reverse_image_search(image_path, top_k=5, max_retries=3):
         list: 유사 이미지 제목의 리스트.
     """
     logger.info(f"이미지 검색 시작: {image_path}")
-    
-    # 크롬 옵션 설정
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # 헤드리스 모드
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-    
-    driver = None
-    try:
-        # 웹드라이버 초기화
-        logger.info("웹드라이버 초기화 중...")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Google 이미지 검색 페이지 열기
-        driver.get("https://www.google.com/imghp?hl=ko")
-        logger.info("Google 이미지 검색 페이지 로드됨")
-        
-        # 쿠키 동의 처리 (필요한 경우)
+    pool = get_webdriver_pool()
+
+    for attempt in range(max_retries):
         try:
-            cookie_button = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(., '동의함') or contains(., 'I agree') or contains(., 'Accept')]"))
-            )
-            cookie_button.click()
-            logger.info("쿠키 동의 버튼 클릭됨")
+            # 공유 풀에서 드라이버를 빌림 (오류가 나면 해당 드라이버는 폐기되고 다음 시도에서 새로 받음)
+            with pool.driver() as driver:
+                try:
+                    results = _reverse_image_search_once(driver, image_path, top_k)
+                except Exception:
+                    driver.save_screenshot(f"error_screenshot_{attempt}.png")
+                    logger.info(f"오류 스크린샷 저장: error_screenshot_{attempt}.png")
+                    raise
+
+            if results:
+                return results[:top_k]
+            logger.warning(f"검색 결과를 찾을 수 없음, 재시도 중... ({attempt+1}/{max_retries})")
+            time.sleep(1 + random.random())
+
         except Exception as e:
-            logger.info(f"쿠키 동의 버튼 없음 또는 클릭 실패: {e}")
-        
-        # 이미지 검색 버튼 클릭
-        for attempt in range(max_retries):
-            try:
-                # 이미지 검색 아이콘 클릭
-                search_by_image = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[@aria-label='이미지로 검색' or @aria-label='Search by image' or contains(@title, 'Search by image')]"))
-                )
-                search_by_image.click()
-                logger.info("이미지 검색 아이콘 클릭됨")
-                
-                # 파일 업로드 탭 클릭
-                upload_tab = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), '파일 업로드') or contains(text(), 'Upload an image')]"))
-                )
-                upload_tab.click()
-                logger.info("파일 업로드 탭 클릭됨")
-                
-                # 파일 업로드 입력 필드 찾기
-                file_input = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.XPATH, "//input[@type='file']"))
-                )
-                
-                # 이미지 파일 업로드
-                absolute_path = os.path.abspath(image_path)
-                file_input.send_keys(absolute_path)
-                logger.info(f"이미지 파일 업로드됨: {absolute_path}")
-                
-                # 검색 결과 로딩 대기
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, ".g, .rg_bx, .isv-r"))
-                )
-                logger.info("검색 결과 로드됨")
-                
-                # 결과 추출
-                results = []
-                
-                # 유사 이미지 제목 추출 시도
-                selectors = [
-                    ".isv-r .VFACy", # 이미지 결과 제목
-                    ".g h3", # 웹 결과 제목
-                    ".LC20lb", # 일반 검색 결과 제목
-                    ".DKV0Md" # 이미지 결과 설명
-                ]
-                
-                for selector in selectors:
-                    try:
-                        elements = WebDriverWait(driver, 5).until(
-                            EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-                        )
-                        logger.info(f"선택자 '{selector}'로 {len(elements)}개 요소 발견")
-                        
-                        for element in elements[:top_k]:
-                            title = element.text.strip()
-                            if title and title not in results:
-                                results.append(title)
-                                logger.info(f"제목 추출: {title}")
-                        
-                        if results:
-                            break
-                    except Exception as e:
-                        logger.warning(f"선택자 '{selector}' 처리 중 오류: {e}")
-                
-                # 결과가 없으면 페이지 소스에서 추출 시도
-                if not results:
-                    logger.info("선택자로 결과를 찾지 못함. 페이지 소스에서 추출 시도")
-                    page_source = driver.page_source
-                    
-                    # 디버깅을 위해 페이지 소스 저장
-                    with open("page_source_debug.html", "w", encoding="utf-8") as f:
-                        f.write(page_source)
-                    logger.info("페이지 소스를 'page_source_debug.html'에 저장함")
-                    
-                    # 스크린샷 저장
-                    driver.save_screenshot("search_result_debug.png")
-                    logger.info("스크린샷을 'search_result_debug.png'에 저장함")
-                    
-                    # 페이지 제목 추출 (대안)
-                    try:
-                        title_element = driver.find_element(By.TAG_NAME, "title")
-                        if title_element.text and "이미지" in title_element.text:
-                            results.append(title_element.text.replace(" - Google 검색", "").strip())
-                            logger.info(f"페이지 제목에서 추출: {results[-1]}")
-                    except Exception as e:
-                        logger.warning(f"페이지 제목 추출 실패: {e}")
-                
-                if results:
-                    return results[:top_k]
-                else:
-                    logger.warning(f"검색 결과를 찾을 수 없음, 재시도 중... ({attempt+1}/{max_retries})")
-                    time.sleep(3 + random.random() * 2)
-            
-            except Exception as e:
-                logger.error(f"검색 과정 중 오류 발생: {e}, 재시도 중... ({attempt+1}/{max_retries})")
-                driver.save_screenshot(f"error_screenshot_{attempt}.png")
-                logger.info(f"오류 스크린샷 저장: error_screenshot_{attempt}.png")
-                time.sleep(5 + random.random() * 5)
-                
-                # 드라이버 재시작
-                if driver:
-                    driver.quit()
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-                driver.get("https://www.google.com/imghp?hl=ko")
-        
-        # 모든 재시도 실패 후
-        logger.error("모든 재시도 실패. 대체 결과 반환")
-        return ["검색 결과를 가져올 수 없습니다."]
-        
-    finally:
-        # 브라우저 종료
-        if driver:
-            driver.quit()
-            logger.info("웹드라이버 종료됨")
+            logger.error(f"검색 과정 중 오류 발생: {e}, 재시도 중... ({attempt+1}/{max_retries})")
+            time.sleep(2 + random.random() * 2)
+
+    # 모든 재시도 실패 후
+    logger.error("모든 재시도 실패. 대체 결과 반환")
+    return ["검색 결과를 가져올 수 없습니다."]
+
+def _reverse_image_search_once(driver, image_path, top_k):
+    """google_reverse_image_search의 단일 시도. 결과가 없으면 빈 리스트를 반환합니다."""
+    # Google 이미지 검색 페이지 열기
+    driver.get("https://www.google.com/imghp?hl=ko")
+    logger.info("Google 이미지 검색 페이지 로드됨")
+
+    # 쿠키 동의 처리 (필요한 경우, 재사용된 드라이버는 이미 동의한 상태)
+    try:
+        cookie_button = WebDriverWait(driver, 2).until(
+            EC.element_to_be_clickable((By.XPATH, "//button[contains(., '동의함') or contains(., 'I agree') or contains(., 'Accept')]"))
+        )
+        cookie_button.click()
+        logger.info("쿠키 동의 버튼 클릭됨")
+    except TimeoutException:
+        logger.info("쿠키 동의 버튼 없음")
+
+    # 이미지 검색 아이콘 클릭
+    search_by_image = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, "//a[@aria-label='이미지로 검색' or @aria-label='Search by image' or contains(@title, 'Search by image')]"))
+    )
+    search_by_image.click()
+    logger.info("이미지 검색 아이콘 클릭됨")
+
+    # 파일 업로드 탭 클릭
+    upload_tab = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), '파일 업로드') or contains(text(), 'Upload an image')]"))
+    )
+    upload_tab.click()
+    logger.info("파일 업로드 탭 클릭됨")
+
+    # 파일 업로드 입력 필드 찾기
+    file_input = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.XPATH, "//input[@type='file']"))
+    )
+
+    # 이미지 파일 업로드
+    absolute_path = os.path.abspath(image_path)
+    file_input.send_keys(absolute_path)
+    logger.info(f"이미지 파일 업로드됨: {absolute_path}")
+
+    # 검색 결과 로딩 대기
+    WebDriverWait(driver, 30).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, ".g, .rg_bx, .isv-r"))
+    )
+    logger.info("검색 결과 로드됨")
+
+    # 유사 이미지 제목 추출 시도 (결과 페이지가 로드된 뒤이므로 선택자별로 바로 조회)
+    results = []
+    selectors = [
+        ".isv-r .VFACy", # 이미지 결과 제목
+        ".g h3", # 웹 결과 제목
+        ".LC20lb", # 일반 검색 결과 제목
+        ".DKV0Md" # 이미지 결과 설명
+    ]
+    for selector in selectors:
+        elements = driver.find_elements(By.CSS_SELECTOR, selector)
+        if not elements:
+            continue
+        logger.info(f"선택자 '{selector}'로 {len(elements)}개 요소 발견")
+        for element in elements[:top_k]:
+            title = element.text.strip()
+            if title and title not in results:
+                results.append(title)
+                logger.info(f"제목 추출: {title}")
+        if results:
+            break
+
+    # 결과가 없으면 페이지 소스에서 추출 시도
+    if not results:
+        logger.info("선택자로 결과를 찾지 못함. 페이지 소스에서 추출 시도")
+
+        # 디버깅을 위해 페이지 소스와 스크린샷 저장
+        with open("page_source_debug.html", "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+        logger.info("페이지 소스를 'page_source_debug.html'에 저장함")
+        driver.save_screenshot("search_result_debug.png")
+        logger.info("스크린샷을 'search_result_debug.png'에 저장함")
+
+        # 페이지 제목 추출 (대안)
+        title = driver.title
+        if title and "이미지" in title:
+            results.append(title.replace(" - Google 검색", "").strip())
+            logger.info(f"페이지 제목에서 추출: {results[-1]}")
+
+    return results
 
 if __name__ == "__main__":
     image_path = "../uploads/gogh.jpg"
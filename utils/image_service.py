@@ -0,0 +1,248 @@
+import io
+import time
+import atexit
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from PIL import Image, ImageOps
+from .image_resize import resize_image, prepare_model_image, _encode, _search_quality, MIN_QUALITY
+from .image_hash import image_hashes
+from config import IMAGE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WARN_FACTOR = 4  # 대기 작업이 워커 수의 이 배수를 넘으면 경고
+
+def _open_source(source):
+    """
+    작업 입력을 PIL이 열 수 있는 형태로 변환합니다.
+
+    Parameters:
+        source: 파일 경로 또는 {"shm": 공유 메모리 이름, "size": 바이트 수}
+
+    Returns:
+        파일 경로 또는 BytesIO
+    """
+    if isinstance(source, dict):
+        shm = shared_memory.SharedMemory(name=source["shm"])
+        try:
+            # 작업 도중 공유 메모리가 해제될 수 있으므로 워커 쪽 사본으로 디코딩
+            return io.BytesIO(bytes(shm.buf[:source["size"]]))
+        finally:
+            shm.close()
+    return source
+
+def _load_image(source, img_format, long_edge=None):
+    """입력을 열어 EXIF 방향을 적용하고, long_edge가 있으면 draft 디코딩 후 축소한 이미지를 반환합니다."""
+    with Image.open(_open_source(source)) as img:
+        if long_edge:
+            ratio = min(1.0, long_edge / max(img.size))
+            img.draft('RGB', (int(img.size[0] * ratio) + 1, int(img.size[1] * ratio) + 1))
+        img = ImageOps.exif_transpose(img)
+    if img_format in ('JPEG', 'AVIF') and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    if long_edge:
+        img.thumbnail((long_edge, long_edge), Image.LANCZOS)
+    return img
+
+def transcode_image(source, img_format="WEBP", quality=80, long_edge=None):
+    """
+    이미지를 다른 형식으로 변환합니다. (워커 프로세스에서 실행)
+
+    Parameters:
+        source: 파일 경로 또는 공유 메모리 정보
+        img_format: 출력 형식 (PIL 형식 이름)
+        quality: 압축 품질
+        long_edge: 지정하면 긴 변을 이 크기 이하로 축소
+
+    Returns:
+        인코딩된 바이트
+    """
+    return _encode(_load_image(source, img_format, long_edge), img_format, quality)
+
+def encode_to_size(source, img_format="WEBP", max_bytes=1024 * 1024, long_edge=None, quality=85):
+    """
+    목표 용량 이하가 되도록 품질을 탐색하고, 최저 품질로도 넘으면 해상도를 줄여 인코딩합니다. (워커 프로세스에서 실행)
+
+    Returns:
+        {"data": 인코딩된 바이트, "size": (너비, 높이)}
+    """
+    img = _load_image(source, img_format, long_edge)
+    data = _encode(img, img_format, quality)
+    while len(data) > max_bytes:
+        fitted, _ = _search_quality(img, img_format, max_bytes, MIN_QUALITY, quality - 1)
+        if fitted is not None:
+            data = fitted
+            break
+        if max(img.size) <= 256:
+            break
+        img = img.resize((max(1, int(img.size[0] * 0.75)), max(1, int(img.size[1] * 0.75))), Image.LANCZOS)
+        data = _encode(img, img_format, quality)
+    return {"data": data, "size": img.size}
+
+def thumbnail_image(source, size=256, img_format="JPEG", quality=80):
+    """썸네일을 만들어 바이트로 반환합니다. (워커 프로세스에서 실행)"""
+    return transcode_image(source, img_format, quality, long_edge=size)
+
+def hash_image(source):
+    """지각 해시 (dHash, aHash)를 계산합니다. (워커 프로세스에서 실행)"""
+    return image_hashes(_open_source(source))
+
+# 이름으로 호출할 수 있는 작업 (모두 모듈 최상위 함수여야 워커 프로세스로 전달 가능)
+OPERATIONS = {
+    "resize": resize_image,
+    "transcode": transcode_image,
+    "encode_to_size": encode_to_size,
+    "thumbnail": thumbnail_image,
+    "hash": hash_image,
+    "model_image": prepare_model_image,
+}
+
+def _run_operation(op, args, kwargs):
+    """워커에서 작업을 실행하고 결과와 시작/종료 시각을 반환합니다."""
+    started = time.time()
+    result = OPERATIONS[op](*args, **kwargs)
+    return result, started, time.time()
+
+@contextmanager
+def shared_buffer(data: bytes):
+    """
+    바이트를 공유 메모리에 올려 작업마다 pickle로 직렬화하지 않고 워커에 전달할 수 있는 입력을 만듭니다.
+    (공유 메모리에 한 번 복사하고, 각 워커가 디코딩용으로 한 번 더 복사합니다)
+    블록이 끝나면 공유 메모리를 해제하므로, 결과를 받은 뒤에 블록을 벗어나야 합니다.
+
+    Yields:
+        작업 입력으로 쓸 {"shm", "size"} 딕셔너리
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        shm.buf[:len(data)] = data
+        yield {"shm": shm.name, "size": len(data)}
+    finally:
+        shm.close()
+        shm.unlink()
+
+class ImageService:
+    """
+    리사이즈, 변환, 썸네일, 해시 같은 CPU 작업을 전용 프로세스 풀에서 실행하는 이미지 서비스입니다.
+    요청 스레드와 GIL을 두고 경합하지 않도록 하며, 대기/실행 시간 지표를 기록합니다.
+
+    Parameters:
+        workers: 워커 프로세스 수 (0이면 프로세스 풀 없이 스레드에서 실행)
+    """
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._metrics = {"submitted": 0, "completed": 0, "failed": 0, "in_flight": 0,
+                         "wait_time": 0.0, "run_time": 0.0, "max_in_flight": 0}
+
+    def _get_pool(self):
+        """풀을 지연 생성합니다. (_lock 보유 상태에서 호출)"""
+        if self._pool is None:
+            if self.workers > 0:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+                logger.info(f"이미지 처리 프로세스 풀 시작: {self.workers}개 워커")
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-service")
+        return self._pool
+
+    def submit(self, op: str, *args, **kwargs) -> Future:
+        """
+        작업을 제출합니다.
+
+        Parameters:
+            op: OPERATIONS의 작업 이름 ("resize", "transcode", "encode_to_size", "thumbnail", "hash", "model_image")
+            *args, **kwargs: 작업 함수의 인자 (입력은 파일 경로 또는 shared_buffer가 만든 딕셔너리)
+
+        Returns:
+            작업 결과를 담는 Future
+        """
+        if op not in OPERATIONS:
+            raise ValueError(f"알 수 없는 이미지 작업: {op}")
+        result_future = Future()
+        submitted = time.time()
+        with self._lock:
+            try:
+                inner = self._get_pool().submit(_run_operation, op, args, kwargs)
+            except BrokenProcessPool:
+                logger.error("이미지 처리 프로세스 풀이 중단되어 재생성합니다.")
+                self._pool = None
+                inner = self._get_pool().submit(_run_operation, op, args, kwargs)
+            self._metrics["submitted"] += 1
+            self._metrics["in_flight"] += 1
+            in_flight = self._metrics["in_flight"]
+            self._metrics["max_in_flight"] = max(self._metrics["max_in_flight"], in_flight)
+        if in_flight > max(1, self.workers) * QUEUE_WARN_FACTOR:
+            logger.warning(f"이미지 작업 대기열 증가: 진행 중 {in_flight}개")
+
+        def on_done(inner_future):
+            try:
+                result, started, finished = inner_future.result()
+            except BaseException as e:
+                with self._lock:
+                    self._metrics["in_flight"] -= 1
+                    self._metrics["failed"] += 1
+                    if isinstance(e, BrokenProcessPool) and self._pool is not None:
+                        self._pool = None
+                result_future.set_exception(e)
+                return
+            with self._lock:
+                self._metrics["in_flight"] -= 1
+                self._metrics["completed"] += 1
+                self._metrics["wait_time"] += max(0.0, started - submitted)
+                self._metrics["run_time"] += finished - started
+            result_future.set_result(result)
+
+        inner.add_done_callback(on_done)
+        return result_future
+
+    def run(self, op: str, *args, timeout: float = None, **kwargs):
+        """작업을 제출하고 결과를 기다리는 동기 버전"""
+        return self.submit(op, *args, **kwargs).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        """
+        대기열 지표를 반환합니다.
+
+        Returns:
+            {"workers", "submitted", "completed", "failed", "in_flight", "queued", "max_in_flight",
+             "avg_wait", "avg_run"} (시간 단위는 초)
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+        done = metrics["completed"] or 1
+        return {
+            "workers": self.workers,
+            "submitted": metrics["submitted"],
+            "completed": metrics["completed"],
+            "failed": metrics["failed"],
+            "in_flight": metrics["in_flight"],
+            "queued": max(0, metrics["in_flight"] - max(1, self.workers)),
+            "max_in_flight": metrics["max_in_flight"],
+            "avg_wait": round(metrics.pop("wait_time") / done, 4),
+            "avg_run": round(metrics.pop("run_time") / done, 4),
+        }
+
+    def close(self):
+        """풀을 종료합니다."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_image_service() -> ImageService:
+    """모듈 단위로 공유되는 이미지 서비스를 반환합니다."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ImageService()
+            atexit.register(_service.close)
+    return _service
@@ -0,0 +1,308 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+from collections import Counter
+from .cache import TTLCache
+from .maps import search_nearby_places, compute_route_durations
+from config import (CACHE_FOLDER, ISOCHRONE_CELL_DEG, ISOCHRONE_TTL, ISOCHRONE_TOP_CELLS, ISOCHRONE_MIN_VISITS,
+                    ISOCHRONE_MAX_VISIT_CELLS)
+
+EARTH_RADIUS_M = 6371000
+ISOCHRONE_FILE = os.path.join(CACHE_FOLDER, "isochrones.json")
+
+# 방위각 개수와 이동 방식별 샘플링 링 반경 (미터)
+BEARINGS = 16
+RINGS = {
+    "WALK": [150, 300, 500, 700, 900, 1200, 1600, 2000],
+    "DRIVE": [500, 1000, 2000, 3000, 4500, 6000, 8000, 10000],
+}
+# 주변 장소 검색 반경 추정용 직선 거리 기준 최대 이동 속도 (미터/분)
+MAX_SPEED_M_PER_MIN = {"WALK": 90, "DRIVE": 700}
+MIN_SEARCH_RADIUS = 300
+
+_lock = threading.Lock()
+_visits = Counter()       # 지오셀 -> 방문 횟수
+_isochrones = {}          # "지오셀|이동방식" -> 샘플링 결과
+_loaded = False
+# (지오셀, 이동방식, 분) -> 폴리곤 꼭짓점 목록 (중심 기준 미터 좌표)
+_polygon_cache = TTLCache(maxsize=2048, ttl=ISOCHRONE_TTL)
+
+def geocell(latitude: float, longitude: float) -> str:
+    """좌표가 속한 지오셀 키를 반환합니다."""
+    lat_idx = math.floor(float(latitude) / ISOCHRONE_CELL_DEG)
+    lng_idx = math.floor(float(longitude) / ISOCHRONE_CELL_DEG)
+    return f"{lat_idx}:{lng_idx}"
+
+def geocell_center(cell: str) -> tuple:
+    """지오셀 키의 중심 좌표를 반환합니다."""
+    lat_idx, lng_idx = (int(v) for v in cell.split(":"))
+    return ((lat_idx + 0.5) * ISOCHRONE_CELL_DEG, (lng_idx + 0.5) * ISOCHRONE_CELL_DEG)
+
+def destination_point(latitude: float, longitude: float, bearing_deg: float, distance_m: float) -> tuple:
+    """시작점에서 방위각과 거리만큼 떨어진 지점의 좌표를 계산합니다."""
+    lat1 = math.radians(latitude)
+    lng1 = math.radians(longitude)
+    bearing = math.radians(bearing_deg)
+    angular = distance_m / EARTH_RADIUS_M
+    lat2 = math.asin(math.sin(lat1) * math.cos(angular) + math.cos(lat1) * math.sin(angular) * math.cos(bearing))
+    lng2 = lng1 + math.atan2(math.sin(bearing) * math.sin(angular) * math.cos(lat1),
+                             math.cos(angular) - math.sin(lat1) * math.sin(lat2))
+    return (math.degrees(lat2), math.degrees(lng2))
+
+def _to_local_xy(origin: tuple, point: tuple) -> tuple:
+    """origin 기준 평면 좌표 (미터, 동쪽 x / 북쪽 y)로 변환합니다."""
+    x = math.radians(point[1] - origin[1]) * EARTH_RADIUS_M * math.cos(math.radians(origin[0]))
+    y = math.radians(point[0] - origin[0]) * EARTH_RADIUS_M
+    return (x, y)
+
+def point_in_polygon(x: float, y: float, polygon: list) -> bool:
+    """레이 캐스팅 방식으로 점이 폴리곤 내부에 있는지 판정합니다."""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i]
+        xj, yj = polygon[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+def _load():
+    """디스크에 저장된 방문 기록과 등시선 데이터를 한 번만 불러옵니다."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    if not os.path.exists(ISOCHRONE_FILE):
+        return
+    try:
+        with open(ISOCHRONE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        _visits.update(data.get("visits", {}))
+        _isochrones.update(data.get("isochrones", {}))
+        _trim_visits()
+        logging.info(f"등시선 캐시 로드: {len(_isochrones)}개")
+    except Exception as e:
+        logging.error(f"등시선 캐시 로드 실패: {e}")
+
+def _save():
+    """방문 기록과 등시선 데이터를 디스크에 저장합니다. (_lock 보유 상태에서 호출)"""
+    _trim_visits()
+    tmp_path = ISOCHRONE_FILE + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"visits": dict(_visits), "isochrones": _isochrones}, f)
+        os.replace(tmp_path, ISOCHRONE_FILE)
+    except Exception as e:
+        logging.error(f"등시선 캐시 저장 실패: {e}")
+
+def _trim_visits():
+    """방문 기록이 ISOCHRONE_MAX_VISIT_CELLS를 넘으면 방문이 많은 지오셀만 남깁니다. (_lock 보유 상태에서 호출)"""
+    if len(_visits) <= ISOCHRONE_MAX_VISIT_CELLS:
+        return
+    kept = _visits.most_common(ISOCHRONE_MAX_VISIT_CELLS)
+    _visits.clear()
+    _visits.update(dict(kept))
+
+def record_visit(latitude, longitude):
+    """요청 위치의 지오셀 방문 횟수를 기록합니다. 사전 계산 대상 선정에 사용됩니다."""
+    try:
+        cell = geocell(latitude, longitude)
+    except (TypeError, ValueError):
+        return
+    with _lock:
+        _load()
+        _visits[cell] += 1
+        # 매 요청마다 정렬하지 않도록 한도를 조금 넘었을 때 한 번에 줄임
+        if len(_visits) > ISOCHRONE_MAX_VISIT_CELLS * 1.2:
+            _trim_visits()
+
+def compute_isochrone(cell: str, travel_mode: str) -> dict:
+    """
+    지오셀 중심에서 방사형 격자로 목적지를 샘플링하고 이동 시간을 배치 호출로 계산합니다.
+
+    Parameters:
+        cell: 지오셀 키
+        travel_mode: 이동 방식 ("WALK" 또는 "DRIVE")
+
+    Returns:
+        {"center", "mode", "rings", "durations"(방위각 x 링, 초 또는 None), "computed_at"}
+    """
+    center = geocell_center(cell)
+    rings = RINGS[travel_mode]
+    destinations = [
+        destination_point(center[0], center[1], 360 * b / BEARINGS, r)
+        for b in range(BEARINGS) for r in rings
+    ]
+    flat = compute_route_durations(center, destinations, travel_mode=travel_mode)
+    durations = [flat[b * len(rings):(b + 1) * len(rings)] for b in range(BEARINGS)]
+    return {
+        "center": list(center),
+        "mode": travel_mode,
+        "rings": rings,
+        "durations": durations,
+        "computed_at": time.time()
+    }
+
+def get_isochrone(latitude, longitude, travel_mode: str):
+    """위치가 속한 지오셀의 사전 계산된 등시선 데이터를 반환합니다. 없거나 만료되면 None."""
+    key = f"{geocell(latitude, longitude)}|{travel_mode}"
+    with _lock:
+        _load()
+        iso = _isochrones.get(key)
+    if iso is None or time.time() - iso["computed_at"] > ISOCHRONE_TTL:
+        return None
+    return iso
+
+def isochrone_polygon(iso: dict, minutes: float) -> list:
+    """
+    샘플링 결과에서 주어진 시간 안에 도달 가능한 영역의 폴리곤을 만듭니다.
+    각 방위각마다 도달 가능한 가장 먼 거리를 링 사이 선형 보간으로 구해 꼭짓점으로 사용합니다.
+
+    Returns:
+        중심 기준 평면 좌표 (미터) 꼭짓점 목록
+    """
+    cache_key = (tuple(iso["center"]), iso["mode"], iso["computed_at"], minutes)
+    polygon = _polygon_cache.get(cache_key)
+    if polygon is not None:
+        return polygon
+
+    budget = minutes * 60
+    polygon = []
+    for b, ring_durations in enumerate(iso["durations"]):
+        reach = 0.0
+        prev_r, prev_d = 0.0, 0.0
+        for r, d in zip(iso["rings"], ring_durations):
+            if d is None:
+                continue
+            if d <= budget:
+                reach = r
+                prev_r, prev_d = r, d
+                continue
+            # 다음 링에서 예산을 넘으면 두 링 사이를 보간하고 종료
+            if d > prev_d:
+                reach = prev_r + (r - prev_r) * (budget - prev_d) / (d - prev_d)
+            break
+        angle = math.radians(360 * b / BEARINGS)
+        polygon.append((reach * math.sin(angle), reach * math.cos(angle)))
+
+    _polygon_cache.set(cache_key, polygon)
+    return polygon
+
+def filter_reachable(origin: tuple, places: list, minutes: float, travel_mode: str = "WALK") -> list:
+    """
+    후보 장소 중 주어진 시간 안에 도달 가능한 장소만 남깁니다.
+    사전 계산된 등시선이 있으면 로컬 폴리곤 판정을, 없으면 경로 API를 직접 호출합니다.
+
+    Parameters:
+        origin: 출발지 좌표 (위도, 경도)
+        places: "location" 키 (위도, 경도)를 가진 장소 목록
+        minutes: 이동 시간 제한 (분)
+        travel_mode: 이동 방식 ("WALK" 또는 "DRIVE")
+
+    Returns:
+        도달 가능한 장소 목록
+    """
+    iso = get_isochrone(origin[0], origin[1], travel_mode)
+    if iso is not None:
+        # 지오셀 안에서는 도달 영역의 모양이 같다고 보고 폴리곤을 실제 출발지로 평행 이동
+        polygon = isochrone_polygon(iso, minutes)
+        return [
+            place for place in places
+            if point_in_polygon(*_to_local_xy(origin, place["location"]), polygon)
+        ]
+
+    durations = compute_route_durations(origin, [place["location"] for place in places], travel_mode=travel_mode)
+    return [place for place, d in zip(places, durations) if d is not None and d <= minutes * 60]
+
+def search_radius(minutes: float, travel_mode: str) -> int:
+    """
+    이동 시간 안에 닿을 수 있는 최대 직선 거리로 주변 장소 검색 반경을 정합니다.
+    등시선 샘플링의 가장 먼 링을 넘지 않으므로, 사전 계산된 링 범위 밖은 검색하지 않습니다.
+
+    Returns:
+        검색 반경 (미터)
+    """
+    distance = float(minutes) * MAX_SPEED_M_PER_MIN[travel_mode]
+    return int(min(max(distance, MIN_SEARCH_RADIUS), RINGS[travel_mode][-1]))
+
+def search_reachable_places(latitude: float, longitude: float, keyword: str, minutes: int, travel_mode: str) -> list:
+    """
+    주어진 위치에서 지정한 시간 안에 도보 또는 차량으로 갈 수 있는 주변 장소를 검색합니다.
+
+    Parameters:
+        latitude, longitude: 현재 위치의 위도와 경도
+        keyword: 검색 키워드
+        minutes: 이동 시간 제한 (분)
+        travel_mode: 이동 방식 ("WALK" 또는 "DRIVE")
+
+    Returns:
+        가까운 순서대로 정렬된 도달 가능한 장소 목록
+    """
+    travel_mode = travel_mode.upper() if travel_mode and travel_mode.upper() in RINGS else "WALK"
+    record_visit(latitude, longitude)
+    try:
+        radius = search_radius(minutes, travel_mode)
+    except (TypeError, ValueError):
+        radius = RINGS[travel_mode][-1]
+    places = search_nearby_places(latitude, longitude, keyword, radius=radius)
+    try:
+        return filter_reachable((float(latitude), float(longitude)), places, float(minutes), travel_mode)
+    except Exception as e:
+        logging.error(f"도달 가능 장소 필터링 오류: {e}")
+        return places
+
+def precompute_isochrones(top_n: int = ISOCHRONE_TOP_CELLS, min_visits: int = ISOCHRONE_MIN_VISITS) -> int:
+    """
+    방문이 많은 지오셀에 대해 도보/차량 등시선을 미리 계산해 저장합니다.
+
+    Parameters:
+        top_n: 계산할 최대 지오셀 수
+        min_visits: 계산 대상이 되기 위한 최소 방문 횟수
+
+    Returns:
+        새로 계산한 등시선 개수
+    """
+    with _lock:
+        _load()
+        cells = [cell for cell, count in _visits.most_common(top_n) if count >= min_visits]
+
+    computed = 0
+    for cell in cells:
+        center = geocell_center(cell)
+        for travel_mode in RINGS:
+            if get_isochrone(center[0], center[1], travel_mode) is not None:
+                continue
+            iso = compute_isochrone(cell, travel_mode)
+            # 샘플 대부분이 실패했다면 저장하지 않음
+            valid = sum(d is not None for row in iso["durations"] for d in row)
+            if valid < BEARINGS:
+                logging.warning(f"등시선 계산 결과 부족: {cell} {travel_mode} ({valid}개)")
+                continue
+            with _lock:
+                _isochrones[f"{cell}|{travel_mode}"] = iso
+            computed += 1
+
+    with _lock:
+        _save()
+    if computed:
+        logging.info(f"등시선 사전 계산 완료: {computed}개")
+    return computed
+
+def start_isochrone_job(interval_seconds: int = 3600):
+    """등시선 사전 계산을 주기적으로 수행하는 백그라운드 스레드를 시작합니다."""
+    def run():
+        while True:
+            try:
+                precompute_isochrones()
+            except Exception as e:
+                logging.error(f"등시선 사전 계산 중 오류: {e}")
+            time.sleep(interval_seconds)
+
+    job_thread = threading.Thread(target=run, name="isochrone-job")
+    job_thread.daemon = True
+    job_thread.start()
+    return job_thread
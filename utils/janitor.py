@@ -0,0 +1,218 @@
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from config import (UPLOAD_FOLDER, RESPONSE_FOLDER, STORAGE_TTL, STORAGE_QUOTA_BYTES,
+                    STORAGE_MIN_AGE, STORAGE_JANITOR_INTERVAL)
+
+logger = logging.getLogger(__name__)
+
+QUOTA_LOW_WATER = 0.9  # 용량 초과 시 할당량의 이 비율까지 줄임
+
+_protected = Counter()  # 처리 중인 파일 경로(확장자 제외) -> 참조 수
+_protected_lock = threading.Lock()
+
+def _protect_key(path) -> str:
+    # 내용 해시 경로의 파생본(<해시>_web.webp 등)도 함께 보호되도록 확장자를 뺀 경로를 키로 사용
+    return os.path.splitext(os.path.abspath(os.fspath(path)))[0]
+
+def protect(*paths):
+    """처리 중인 파일을 정리 대상에서 제외합니다. (release로 해제)"""
+    with _protected_lock:
+        for path in paths:
+            if path:
+                _protected[_protect_key(path)] += 1
+
+def release(*paths):
+    """protect로 등록한 파일의 보호를 해제합니다."""
+    with _protected_lock:
+        for path in paths:
+            if path:
+                key = _protect_key(path)
+                _protected[key] -= 1
+                if _protected[key] <= 0:
+                    del _protected[key]
+
+@contextmanager
+def protected(*paths):
+    """블록이 실행되는 동안 파일을 정리 대상에서 제외하는 컨텍스트 매니저"""
+    protect(*paths)
+    try:
+        yield
+    finally:
+        release(*paths)
+
+def _is_protected(path: str, keys: set) -> bool:
+    stem = os.path.splitext(path)[0]
+    return stem in keys or any(stem.startswith(key + "_") for key in keys)
+
+class StorageJanitor:
+    """
+    업로드/응답 폴더의 오래된 파일을 정리하는 백그라운드 작업입니다.
+    ttl이 지난 파일을 지우고, 전체 크기가 quota를 넘으면 가장 오래 사용되지 않은 파일부터 지웁니다.
+    처리 중(protect)이거나 min_age보다 새 파일은 지우지 않습니다.
+
+    Parameters:
+        folders: 정리할 폴더 목록
+        ttl: 마지막 사용 후 보관 시간 (초)
+        quota: 폴더 전체 최대 크기 (바이트, 0이면 제한 없음)
+        min_age: 생성/사용 직후 보호 시간 (초)
+    """
+    def __init__(self, folders: list = None, ttl: float = STORAGE_TTL, quota: int = STORAGE_QUOTA_BYTES, min_age: float = STORAGE_MIN_AGE):
+        self.folders = folders or [UPLOAD_FOLDER, RESPONSE_FOLDER]
+        self.ttl = ttl
+        self.quota = quota
+        self.min_age = min_age
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._metrics = {"runs": 0, "files_deleted": 0, "bytes_reclaimed": 0, "expired": 0, "evicted": 0,
+                         "protected_skipped": 0, "total_bytes": 0, "total_files": 0, "last_run": None, "last_duration": 0.0}
+
+    def _scan(self) -> list:
+        """정리 대상 파일 목록 [(경로, 크기, 마지막 사용 시각)]"""
+        files = []
+        for folder in self.folders:
+            for root, _, names in os.walk(folder):
+                for name in names:
+                    path = os.path.abspath(os.path.join(root, name))
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((path, stat.st_size, max(stat.st_mtime, stat.st_atime)))
+        return files
+
+    def _remove_empty_dirs(self, now: float):
+        """비어 있는 샤드 폴더를 지웁니다. 방금 만든 폴더(저장 직전일 수 있음)와 숨김 폴더는 남깁니다."""
+        for folder in self.folders:
+            for root, dirs, names in os.walk(folder, topdown=False):
+                if root == folder or dirs or names or os.path.basename(root).startswith("."):
+                    continue
+                try:
+                    if now - os.path.getmtime(root) >= self.min_age:
+                        os.rmdir(root)
+                except OSError:
+                    pass
+
+    def sweep(self) -> dict:
+        """
+        정리를 한 번 수행합니다.
+
+        Returns:
+            {"deleted", "bytes_reclaimed", "total_bytes"} 이번 실행 결과
+        """
+        start = time.time()
+        with _protected_lock:
+            keys = set(_protected)
+        files = self._scan()
+        total = sum(size for _, size, _ in files)
+        deleted = reclaimed = expired = evicted = skipped = 0
+
+        def remove(path, size, last_used):
+            nonlocal deleted, reclaimed, total, skipped
+            # 스캔 이후 다시 사용(중복 업로드의 utime 등)되었거나 보호된 파일은 지우지 않음
+            # protect와 경합하지 않도록 확인과 삭제를 같은 잠금 안에서 수행
+            with _protected_lock:
+                if _is_protected(path, set(_protected)):
+                    skipped += 1
+                    return False
+                try:
+                    stat = os.stat(path)
+                    if max(stat.st_mtime, stat.st_atime) > last_used:
+                        return False
+                    os.remove(path)
+                except FileNotFoundError:
+                    return False
+                except OSError as e:
+                    logger.warning(f"파일 삭제 실패: {path} ({e})")
+                    return False
+            deleted += 1
+            reclaimed += size
+            total -= size
+            return True
+
+        candidates = []
+        for path, size, last_used in sorted(files, key=lambda f: f[2]):
+            if start - last_used < self.min_age:
+                continue
+            if _is_protected(path, keys):
+                skipped += 1
+                continue
+            if start - last_used > self.ttl:
+                expired += remove(path, size, last_used)
+            else:
+                candidates.append((path, size, last_used))
+
+        # 할당량 초과 시 가장 오래 사용되지 않은 파일부터 제거 (candidates는 이미 오래된 순)
+        if self.quota and total > self.quota:
+            target = self.quota * QUOTA_LOW_WATER
+            for path, size, last_used in candidates:
+                if total <= target:
+                    break
+                evicted += remove(path, size, last_used)
+            if total > self.quota:
+                logger.warning(f"저장소 용량이 할당량을 넘었지만 더 지울 수 있는 파일이 없습니다: {total / (1024 * 1024):.0f}MB")
+
+        self._remove_empty_dirs(start)
+        duration = time.time() - start
+        with self._lock:
+            m = self._metrics
+            m["runs"] += 1
+            m["files_deleted"] += deleted
+            m["bytes_reclaimed"] += reclaimed
+            m["expired"] += expired
+            m["evicted"] += evicted
+            m["protected_skipped"] += skipped
+            m["total_bytes"] = total
+            m["total_files"] = len(files) - deleted
+            m["last_run"] = start
+            m["last_duration"] = round(duration, 3)
+        if deleted:
+            logger.info(f"저장소 정리: {deleted}개 파일, {reclaimed / (1024 * 1024):.1f}MB 회수 (만료 {expired}, 용량 {evicted}), {duration:.2f}초")
+        return {"deleted": deleted, "bytes_reclaimed": reclaimed, "total_bytes": total}
+
+    def stats(self) -> dict:
+        """누적 정리 지표를 반환합니다."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        with _protected_lock:
+            metrics["protected"] = len(_protected)
+        metrics["quota"] = self.quota
+        return metrics
+
+    def start(self, interval: float = STORAGE_JANITOR_INTERVAL):
+        """interval초마다 sweep을 수행하는 백그라운드 스레드를 시작합니다."""
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"저장소 정리 중 오류: {e}")
+                self._stop.wait(interval)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=run, name="storage-janitor")
+            self._thread.daemon = True
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+_janitor = None
+_janitor_lock = threading.Lock()
+
+def get_janitor() -> StorageJanitor:
+    """모듈 단위로 공유되는 저장소 정리 작업을 반환합니다."""
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = StorageJanitor()
+    return _janitor
+
+def start_storage_janitor(interval_seconds: int = STORAGE_JANITOR_INTERVAL):
+    """업로드/응답 폴더 정리 백그라운드 스레드를 시작합니다."""
+    return get_janitor().start(interval_seconds)
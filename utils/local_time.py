@@ -0,0 +1,108 @@
+import threading
+from datetime import datetime
+from timezonefinder import TimezoneFinder
+import pytz
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# TimezoneFinder는 초기화 비용이 크므로 한 번만 생성해서 재사용
+_tz_finder = None
+_tz_finder_lock = threading.Lock()
+
+def get_timezone_by_gps(lat, lng) -> str:
+    """
+    GPS 좌표에 해당하는 타임존 이름을 반환합니다.
+
+    Parameters:
+        lat, lng: 위도와 경도
+
+    Returns:
+        타임존 이름 (예: 'Asia/Seoul'), 찾지 못하면 'UTC'
+    """
+    global _tz_finder
+    with _tz_finder_lock:
+        if _tz_finder is None:
+            _tz_finder = TimezoneFinder()
+        tz_name = _tz_finder.timezone_at(lng=float(lng), lat=float(lat))
+    return tz_name or "UTC"  # 기본값: UTC
+
+def _week_minute(point: dict) -> int:
+    """Google Places의 {'day': 0-6 (일요일=0), 'time': 'HHMM'} 형식을 주 단위 분으로 변환합니다."""
+    time_str = point.get("time", "0000")
+    return int(point.get("day", 0)) * MINUTES_PER_DAY + int(time_str[:2]) * 60 + int(time_str[2:4])
+
+def parse_opening_periods(opening_hours: dict) -> list:
+    """
+    Google Places 상세 정보의 opening_hours.periods를 주 단위 분 구간 목록으로 변환합니다.
+
+    Parameters:
+        opening_hours: Places API의 opening_hours 딕셔너리
+
+    Returns:
+        [(시작 분, 종료 분), ...] 형태의 구간 목록 (0 ~ 10080, 일요일 00:00 기준)
+        영업 시간 정보가 없으면 빈 리스트
+    """
+    periods = (opening_hours or {}).get("periods") or []
+    intervals = []
+    for period in periods:
+        open_point = period.get("open")
+        if not open_point:
+            continue
+        close_point = period.get("close")
+        # close가 없으면 24시간 영업
+        if not close_point:
+            return [(0, MINUTES_PER_WEEK)]
+        start = _week_minute(open_point)
+        end = _week_minute(close_point)
+        if end <= start:
+            # 토요일 밤 -> 일요일 새벽처럼 주가 넘어가는 구간은 둘로 분할
+            intervals.append((start, MINUTES_PER_WEEK))
+            if end > 0:
+                intervals.append((0, end))
+        else:
+            intervals.append((start, end))
+    intervals.sort()
+    return intervals
+
+def compute_open_status(intervals: list, tz_name: str, now: datetime = None, closing_soon_minutes: int = 30) -> dict:
+    """
+    캐시된 영업 구간과 현지 시간으로 현재 영업 여부를 계산합니다.
+
+    Parameters:
+        intervals: parse_opening_periods의 결과
+        tz_name: 장소의 타임존 이름
+        now: 기준 시각 (기본값: 현재 시각)
+        closing_soon_minutes: 곧 마감으로 간주할 남은 시간 (분)
+
+    Returns:
+        {"open_now": bool 또는 None, "closing_soon": bool, "closes_at": "HH:MM" 또는 None}
+    """
+    if not intervals:
+        return {"open_now": None, "closing_soon": False, "closes_at": None}
+
+    local_now = (now or datetime.now(pytz.utc)).astimezone(pytz.timezone(tz_name or "UTC"))
+    # Python은 월요일=0, Google Places는 일요일=0
+    day = (local_now.weekday() + 1) % 7
+    minute = day * MINUTES_PER_DAY + local_now.hour * 60 + local_now.minute
+
+    for start, end in intervals:
+        if start <= minute < end:
+            # 자정을 넘어 이어지는 구간은 연결해서 실제 마감 시각을 구함
+            close_minute = end
+            if close_minute == MINUTES_PER_WEEK and intervals[0][0] == 0:
+                close_minute += intervals[0][1]
+            if close_minute - minute >= MINUTES_PER_WEEK:
+                return {"open_now": True, "closing_soon": False, "closes_at": None}
+            remaining = close_minute - minute
+            closes_at = close_minute % MINUTES_PER_DAY
+            return {
+                "open_now": True,
+                "closing_soon": remaining <= closing_soon_minutes,
+                "closes_at": f"{closes_at // 60:02d}:{closes_at % 60:02d}"
+            }
+    return {"open_now": False, "closing_soon": False, "closes_at": None}
+
+def get_local_datetime(tz_name: str) -> datetime:
+    """타임존의 현재 시각을 반환합니다."""
+    return datetime.now(pytz.timezone(tz_name))
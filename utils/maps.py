@@ -2,45 +2,131 @@ import json
 import requests
 import logging
 import googlemaps
+from concurrent.futures import ThreadPoolExecutor
 from .distance import haversine_distance
-from config import GMAPS_API_KEY
+from .cache import TTLCache
+from .local_time import get_timezone_by_gps, parse_opening_periods, compute_open_status
+from config import GMAPS_API_KEY, PLACES_CACHE_TTL, PLACE_HOURS_CACHE_TTL, CLOSING_SOON_MINUTES
 import numpy as np
 
-def search_nearby_places(latitude: float, longitude: float, keyword: str) -> list:
+# 클라이언트와 캐시는 모듈 단위로 재사용
+_gmaps_client = None
+# (반올림한 위도, 경도, 키워드) -> 장소 목록. 영업 여부는 요청 시점에 다시 계산하므로 오래 보관 가능
+_places_cache = TTLCache(maxsize=512, ttl=PLACES_CACHE_TTL)
+# place_id -> {"intervals": 영업 구간, "timezone": 타임존}
+_place_hours_cache = TTLCache(maxsize=5000, ttl=PLACE_HOURS_CACHE_TTL)
+PLACES_MAX_RADIUS = 50000  # Places Nearby Search가 허용하는 최대 반경 (미터)
+
+def _get_gmaps_client():
+    global _gmaps_client
+    if _gmaps_client is None:
+        _gmaps_client = googlemaps.Client(key=GMAPS_API_KEY)
+    return _gmaps_client
+
+def get_place_opening_hours(place_id: str, latitude: float, longitude: float) -> dict:
+    """
+    장소의 주간 영업 구간과 타임존을 가져옵니다. 장소별로 한 번만 조회하여 캐시합니다.
+
+    Parameters:
+        place_id: Google Places의 장소 ID
+        latitude, longitude: 장소의 위도와 경도 (타임존 계산용)
+
+    Returns:
+        {"intervals": [(시작 분, 종료 분), ...], "timezone": 타임존 이름}
+    """
+    cached = _place_hours_cache.get(place_id)
+    if cached is not None:
+        return cached
+
+    hours = {"intervals": [], "timezone": get_timezone_by_gps(latitude, longitude)}
+    try:
+        details = _get_gmaps_client().place(place_id, fields=["opening_hours"])
+        hours["intervals"] = parse_opening_periods(details.get("result", {}).get("opening_hours"))
+    except Exception as e:
+        logging.error(f"장소 영업 시간 조회 오류 ({place_id}): {e}")
+        # 실패한 경우는 짧게만 캐시하여 다음 요청에서 재시도
+        _place_hours_cache.set(place_id, hours, ttl=300)
+        return hours
+
+    _place_hours_cache.set(place_id, hours)
+    return hours
+
+def _fetch_nearby_places(latitude: float, longitude: float, keyword: str, radius: int, language: str) -> list:
+    """Places API로 주변 장소를 검색하고 영업 구간 정보를 붙여 반환합니다."""
+    places_result = _get_gmaps_client().places_nearby(location=(latitude, longitude), radius=radius, language=language, keyword=keyword)
+    places = []
+    for place in places_result.get('results', []):
+        loc_data = place.get("geometry", {}).get("location", {})
+        lat2 = loc_data.get('lat')
+        lng2 = loc_data.get('lng')
+
+        if lat2 is None or lng2 is None:
+            continue
+
+        places.append({
+            "place_id": place.get("place_id"),
+            "name": place.get("name", ""),
+            "location": (lat2, lng2),
+            "rating": place.get("rating", None),
+            "types": place.get("types", []),
+        })
+
+    # 영업 구간은 장소별로 캐시되므로 처음 보는 장소만 실제 API 호출이 발생
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        hours_list = list(executor.map(
+            lambda p: get_place_opening_hours(p["place_id"], *p["location"]) if p["place_id"] else {"intervals": [], "timezone": "UTC"},
+            places
+        ))
+    for place, hours in zip(places, hours_list):
+        place["hours"] = hours
+    return places
+
+def search_nearby_places(latitude: float, longitude: float, keyword: str, radius: int = 1000) -> list:
     """
     주어진 위치 주변의 장소들을 검색합니다.
     
     Parameters:
         latitude, longitude: 중심 위치의 위도와 경도
         keyword: 검색 키워드
+        radius: 검색 반경 (미터, 최대 50000)
         
     Returns:
         가까운 순서대로 정렬된 장소 목록
     """
-    radius=1000
+    try:
+        radius = int(min(max(float(radius), 1), PLACES_MAX_RADIUS))
+    except (TypeError, ValueError):
+        # 모델이 "1km"처럼 숫자가 아닌 반경을 넘기면 기본 반경으로 검색
+        logging.warning(f"잘못된 검색 반경, 기본값 사용: {radius}")
+        radius = 1000
     k=20
     language='ko'
 
     try:
-        gmaps = googlemaps.Client(key=GMAPS_API_KEY)
-        location = (latitude, longitude)
-        places_result = gmaps.places_nearby(location=location, radius=radius, language=language, keyword=keyword)
+        latitude, longitude = float(latitude), float(longitude)
+        # 약 100m 격자 단위로 캐시 (검색 반경 1km 이상 대비 충분히 작음)
+        cache_key = (round(latitude, 3), round(longitude, 3), keyword, radius, language)
+        places = _places_cache.get(cache_key)
+        if places is None:
+            places = _fetch_nearby_places(latitude, longitude, keyword, radius, language)
+            _places_cache.set(cache_key, places)
+        else:
+            logging.debug(f"주변 장소 캐시 사용: {cache_key}")
+
         temp_places = []
-        
-        for place in places_result.get('results', []):
-            loc_data = place.get("geometry", {}).get("location", {})
-            lat2 = loc_data.get('lat')
-            lng2 = loc_data.get('lng')
-            
-            if lat2 is None or lng2 is None:
-                continue
-                
+        for place in places:
+            lat2, lng2 = place["location"]
+            hours = place["hours"]
+            # 영업 여부는 캐시된 영업 구간으로 요청 시점에 계산
+            status = compute_open_status(hours["intervals"], hours["timezone"], closing_soon_minutes=CLOSING_SOON_MINUTES)
             filtered_place = {
-                "name": place.get("name", ""),
+                "name": place["name"],
                 "location": (lat2, lng2),
-                "open_now": place.get("opening_hours", {}).get("open_now", None),
-                "rating": place.get("rating", None),
-                "types": place.get("types", []),
+                "open_now": status["open_now"],
+                "closing_soon": status["closing_soon"],
+                "closes_at": status["closes_at"],
+                "rating": place["rating"],
+                "types": place["types"],
                 "distance": haversine_distance(latitude, longitude, lat2, lng2)
             }
             temp_places.append(filtered_place)
@@ -131,4 +217,48 @@ def compute_route_matrix(origin, destinations, travel_mode="DRIVE", waypoints=No
         return filtered_list
     except Exception as e:
         logging.error(f"경로 계산 오류: {e}")
-        return []
\ No newline at end of file
+        return []
+
+ROUTE_MATRIX_BATCH_SIZE = 25  # 한 번의 computeRouteMatrix 호출에 보낼 최대 목적지 수
+
+def compute_route_durations(origin, destinations, travel_mode="DRIVE") -> list:
+    """
+    출발지에서 각 목적지까지의 이동 시간을 목적지 순서대로 계산합니다.
+    목적지가 많으면 여러 번의 배치 호출로 나누어 요청합니다.
+
+    Parameters:
+        origin: 출발지 좌표 (위도, 경도)
+        destinations: 목적지 좌표 목록 [(위도1, 경도1), (위도2, 경도2), ...]
+        travel_mode: 이동 방식 ("DRIVE", "WALK" 등)
+
+    Returns:
+        목적지별 이동 시간 목록 (초), 경로가 없거나 실패한 목적지는 None
+    """
+    url = 'https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix'
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Goog-Api-Key': GMAPS_API_KEY,
+        'X-Goog-FieldMask': 'originIndex,destinationIndex,duration,condition'
+    }
+    durations = [None] * len(destinations)
+
+    for offset in range(0, len(destinations), ROUTE_MATRIX_BATCH_SIZE):
+        batch = destinations[offset:offset + ROUTE_MATRIX_BATCH_SIZE]
+        payload = {
+            "origins": [{"waypoint": {"location": {"latLng": {"latitude": origin[0], "longitude": origin[1]}}}}],
+            "destinations": [
+                {"waypoint": {"location": {"latLng": {"latitude": dest[0], "longitude": dest[1]}}}}
+                for dest in batch
+            ],
+            "travelMode": travel_mode
+        }
+        try:
+            response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=30)
+            for element in response.json():
+                if element.get('condition') != 'ROUTE_EXISTS' or 'duration' not in element:
+                    continue
+                durations[offset + element.get('destinationIndex', 0)] = int(element['duration'].rstrip('s'))
+        except Exception as e:
+            logging.error(f"경로 시간 계산 오류: {e}")
+
+    return durations
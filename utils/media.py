@@ -0,0 +1,85 @@
+import io
+import os
+import logging
+from config import MEDIA_MEMORY_LIMIT
+
+logger = logging.getLogger(__name__)
+
+class MediaHandle:
+    """
+    업로드/파생 미디어를 한 번 읽은 뒤 여러 소비자(리사이즈, Gemini, discord.File)가 공유하기 위한 핸들입니다.
+    작은 파일은 바이트를 메모리에 들고 있고, 큰 파일은 디스크 경로만 들고 있다가 소비자가 필요할 때 파일로 엽니다.
+    os.PathLike를 구현하므로 경로를 받는 기존 함수에도 그대로 넘길 수 있습니다.
+
+    Parameters:
+        path: 디스크에 저장된 경로
+        data: 메모리에 들고 있을 내용 (None이면 디스크에서 읽음)
+        filename: 첨부 등에 표시할 파일 이름 (기본값: 경로의 파일 이름)
+        sha256: 알고 있는 내용 해시 (있으면 소비자가 다시 계산하지 않음)
+    """
+    def __init__(self, path: str, data: bytes = None, filename: str = None, sha256: str = None):
+        self.path = path
+        self.data = data
+        self.filename = filename or os.path.basename(path)
+        self.sha256 = sha256
+
+    @classmethod
+    def from_path(cls, path: str, sha256: str = None, limit: int = MEDIA_MEMORY_LIMIT):
+        """디스크 파일의 핸들. limit 이하이면 한 번 읽어 메모리에 둡니다."""
+        data = None
+        if os.path.getsize(path) <= limit:
+            with open(path, "rb") as f:
+                data = f.read()
+        return cls(path, data, sha256=sha256)
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data is not None else os.path.getsize(self.path)
+
+    def open(self):
+        """읽기용 파일 객체. 메모리에 있으면 복사 없이 BytesIO로 감쌉니다."""
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        return open(self.path, "rb")
+
+    def read_bytes(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def exists(self) -> bool:
+        return self.data is not None or os.path.exists(self.path)
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __str__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"MediaHandle({self.path!r}, {'memory' if self.in_memory else 'disk'}, {self.size} bytes)"
+
+def media_file(source):
+    """
+    경로 또는 MediaHandle을 읽기용 파일 객체로 엽니다.
+
+    Parameters:
+        source: 파일 경로 또는 MediaHandle
+
+    Returns:
+        바이너리 파일 객체 (with 문으로 사용)
+    """
+    if isinstance(source, MediaHandle):
+        return source.open()
+    return open(source, "rb")
+
+def media_size(source) -> int:
+    """경로 또는 MediaHandle의 크기 (메모리에 있으면 stat 호출 없음)"""
+    if isinstance(source, MediaHandle):
+        return source.size
+    return os.path.getsize(source)
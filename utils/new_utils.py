@@ -1,18 +1,27 @@
 import PIL.Image
 from google import genai
-from config import GEMINI_API_KEY
-from duckduckgo_search import DDGS
-from datetime import datetime
-from timezonefinder import TimezoneFinder
-import pytz
+from google.genai import types
+from config import GEMINI_API_KEY, GEMINI_IMAGE_LONG_EDGE, GEMINI_HISTORY_IMAGES, EXTRACT_FIRST_K, EXTRACT_DEADLINE, PASSAGES_PER_PAGE, SEARCH_RESULT_CHAR_BUDGET
+from utils.local_time import get_timezone_by_gps, get_local_datetime
+from utils.web_extract import extract_urls_sync
+from utils.web_search import ddg_text_search
+from utils.passages import select_passages
+from utils.image_resize import prepare_model_image
+from utils.gemini_files import get_file_registry
 import os
-import time
+import json
+import uuid
+import logging
+import concurrent.futures
 
-def get_search_results(query: str):
+logger = logging.getLogger(__name__)
+
+def get_search_results(query: str, region: str = None):
     results = []
     pages = 2
+    seen_domains = set()
     try:
-        ddg_results = DDGS().text(query, max_results=pages * 20)
+        ddg_results = ddg_text_search(query, max_results=pages * 20, region=region)
         for item in ddg_results:
             href = item.get("href")
             if not href:
@@ -27,19 +36,16 @@ def get_search_results(query: str):
                 "displayLink": domain
             }
             # 동일 도메인 결과 제외
-            if all(r['displayLink'] != domain for r in results):
+            if domain not in seen_domains:
+                seen_domains.add(domain)
                 results.append(result_item)
     except Exception as e:
         print(f"DuckDuckGo 검색 오류: {e}")
     return results
 
 def get_local_time_by_gps(lat, lng):
-    tf = TimezoneFinder()
-    tz_name = tf.timezone_at(lng=float(lng), lat=float(lat))
-    if not tz_name:
-        tz_name = "UTC"  # 기본값: UTC
-    local_tz = pytz.timezone(tz_name)
-    return datetime.now(local_tz).strftime("%Y-%m-%d %H:%M:%S")
+    tz_name = get_timezone_by_gps(lat, lng)
+    return get_local_datetime(tz_name).strftime("%Y-%m-%d %H:%M:%S")
 
 def generate_unique_filename(prefix, original_filename):
     """
@@ -55,14 +61,51 @@ def generate_unique_filename(prefix, original_filename):
     # 확장자 추출
     _, file_extension = os.path.splitext(original_filename)
     
-    # 현재 시간과 UUID를 사용하여 고유한 번호 생성
-    unique_id = int(time.time() * 1000) % 100000
+    # UUID를 사용하여 동시 요청에서도 겹치지 않는 고유 번호 생성
+    unique_id = uuid.uuid4().hex
     
-    # 새 파일 이름 형식: image_12345.jpg 또는 audio_12345.mp3
     return f"{prefix}_{unique_id}{file_extension}"
 
-def generate_content_with_history(system_prompt: str, new_message: str, function_list: list = None, image_path: str = None, k: int = 7, history: list = None):
-    
+def _as_image_list(image_path) -> list:
+    """image_path(경로, MediaHandle 또는 그 리스트)를 빈 값을 뺀 리스트로 변환합니다."""
+    paths = image_path if isinstance(image_path, (list, tuple)) else [image_path]
+    return [p for p in paths if p]
+
+def _image_part(image_path):
+    """이미지 하나를 모델 입력 Part로 변환합니다."""
+    # 내용 해시별로 한 번만 업로드한 파일 URI로 참조 (업로드 실패 시 축소 사본을 인라인으로, 그것도 실패하면 원본 사용)
+    image = get_file_registry().part_for(image_path)
+    if image is None:
+        image_bytes, mime_type = prepare_model_image(image_path) if GEMINI_IMAGE_LONG_EDGE else (None, None)
+        if image_bytes:
+            image = types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+        else:
+            image = PIL.Image.open(image_path)
+    return image
+
+def _image_parts(image_paths: list) -> list:
+    """여러 이미지의 전처리/업로드를 병렬로 수행해 입력 순서대로 Part 목록을 반환합니다."""
+    if len(image_paths) == 1:
+        return [_image_part(image_paths[0])]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(4, len(image_paths))) as executor:
+        return list(executor.map(_image_part, image_paths))
+
+def generate_content_with_history(system_prompt: str, new_message: str, function_list: list = None, image_path=None, k: int = 7, history: list = None,
+                                  history_images: bool = None):
+    """
+    대화 히스토리와 함께 Gemini 응답을 생성하고, 질문/응답 쌍을 추가한 히스토리를 반환합니다.
+
+    Parameters:
+        system_prompt: 시스템 프롬프트
+        new_message: 새 사용자 메시지
+        function_list: 모델이 호출할 수 있는 함수 목록
+        image_path: 이번 턴의 이미지 (경로, MediaHandle 또는 그 리스트)
+        k: 유지할 최근 턴 수
+        history: 대화 히스토리
+        history_images: 최근 이미지 턴의 사진을 다시 참조할지 여부 (None이면 이번 턴에 이미지가 있을 때만)
+                        사진에 대한 후속 질문일 수 있는 자유 입력 턴에서 True로 지정합니다.
+    """
+
     # 히스토리 초기화: 전달된 히스토리가 없으면 빈 리스트로 생성
     if history is None:
         history = []
@@ -80,11 +123,24 @@ def generate_content_with_history(system_prompt: str, new_message: str, function
     # 시스템 메시지 추가
     gemini_messages.append(system_prompt)
     
+    # 히스토리에서 다시 참조할 최근 이미지 (이미지/후속 질문 턴에서만, 업로드된 파일 URI를 재사용하므로 픽셀을 다시 보내지 않음)
+    if history_images is None:
+        history_images = bool(_as_image_list(image_path))
+    image_turns = []
+    if history_images and GEMINI_HISTORY_IMAGES > 0:
+        image_turns = [i for i in range(0, len(history), 2) if history[i].get('image')][-GEMINI_HISTORY_IMAGES:]
+    
     # 기존 대화 히스토리 추가
     for i in range(0, len(history), 2):
         if i+1 < len(history):  # 쌍이 완성된 경우만
             user_msg = history[i]['content']
             assistant_msg = history[i+1]['content']
+            if i in image_turns:
+                # 다시 업로드하지 않고, 유효한 업로드 항목이 없는 이미지는 건너뜀
+                image_parts = [get_file_registry().part_for(p, upload=False) for p in _as_image_list(history[i]['image']) if os.path.exists(p)]
+                image_parts = [part for part in image_parts if part is not None]
+                if image_parts:
+                    user_msg = [user_msg, *image_parts]
             gemini_messages.append(user_msg)
             gemini_messages.append(assistant_msg)
     
@@ -94,8 +150,12 @@ def generate_content_with_history(system_prompt: str, new_message: str, function
     print("히스토리 길이:", len(history))
     print("API에 보내는 메시지 수:", len(gemini_messages))
     
+    # 여러 장의 이미지도 한 번의 호출로 함께 전달
+    image_paths = _as_image_list(image_path)
+    existing_images = [p for p in image_paths if os.path.exists(p)]
+    
     try:
-        if image_path is None or image_path == "":
+        if not image_paths:
             print("No image conversation")
             
             if function_list is not None:
@@ -116,15 +176,15 @@ def generate_content_with_history(system_prompt: str, new_message: str, function
         else:
             print("Image conversation")
             # 이미지 파일이 존재하는지 확인
-            if os.path.exists(image_path):
-                image = PIL.Image.open(image_path)
+            if existing_images:
+                images = _image_parts(existing_images)
                 
                 # 이미지가 포함된 메시지는 히스토리의 마지막 메시지와 병합해야 함
                 # 마지막 메시지를 제외한 히스토리 구성
                 image_messages = gemini_messages[:-1]
                 
                 # 이미지와 마지막 텍스트 메시지를 함께 추가
-                final_message = [new_message, image]
+                final_message = [new_message, *images]
                 
                 if function_list is not None:
                     print("Function list with image")
@@ -156,9 +216,13 @@ def generate_content_with_history(system_prompt: str, new_message: str, function
                         contents=gemini_messages  # 전체 대화 히스토리 포함
                     )
         
-        # 히스토리 업데이트
+        # 히스토리 업데이트 (이미지 턴은 이후 질문에서 다시 참조할 수 있도록 경로를 함께 기록)
+        user_entry = {"role": "user", "content": new_message}
+        if existing_images:
+            paths = [os.fspath(p) for p in existing_images]
+            user_entry["image"] = paths[0] if len(paths) == 1 else paths
         try:
-            history.append({"role": "user", "content": new_message})
+            history.append(user_entry)
             history.append({"role": "assistant", "content": response.text})
             
             print(response.text)
@@ -166,7 +230,7 @@ def generate_content_with_history(system_prompt: str, new_message: str, function
         except AttributeError:
             # response.text가 없는 경우
             print("응답에 text 속성이 없습니다.")
-            history.append({"role": "user", "content": new_message})
+            history.append(user_entry)
             history.append({"role": "assistant", "content": "응답을 생성할 수 없습니다."})
             return history
     except ValueError as ve:
@@ -182,130 +246,12 @@ def generate_content_with_history(system_prompt: str, new_message: str, function
     
 def search_and_extract(query: str) -> str:
     max_results = 10
-    max_workers = 10
-    # 로깅 설정
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    logger = logging.getLogger(__name__)
-    
-    # 상수 설정
-    HEADERS = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Cache-Control': 'max-age=0'
-    }
-    TIMEOUT = 30      # 초
-    MAX_RETRIES = 3
-    RETRY_DELAY = 1   # 초
-    
-    def fetch_url(url: str, session: requests.Session, retry: int = 0) -> str:
-        """단일 URL에서 HTML 콘텐츠를 가져옴 (재시도 로직 포함)."""
-        try:
-            logger.debug(f"Fetching {url}")
-            response = session.get(url, headers=HEADERS, timeout=TIMEOUT, verify=False)
-            if response.status_code == 200:
-                return response.text
-            elif response.status_code in (429, 503) and retry < MAX_RETRIES:
-                wait_time = RETRY_DELAY * (2 ** retry)
-                logger.warning(f"Rate limited on {url}. Retrying in {wait_time}s...")
-                time.sleep(wait_time)
-                return fetch_url(url, session, retry + 1)
-            else:
-                logger.error(f"Error fetching {url}: Status code {response.status_code}")
-                return ""
-        except requests.Timeout:
-            if retry < MAX_RETRIES:
-                wait_time = RETRY_DELAY * (2 ** retry)
-                logger.warning(f"Timeout on {url}. Retrying in {wait_time}s...")
-                time.sleep(wait_time)
-                return fetch_url(url, session, retry + 1)
-            logger.error(f"Timeout fetching {url} after {MAX_RETRIES} retries")
-            return ""
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return ""
-    
-    def extract_text_from_html_sync(html_content: str, session: requests.Session = None, visited: set = None, base_url: str = None) -> str:
-        """
-        HTML 콘텐츠에서 메인 텍스트를 추출합니다.
-        readability 라이브러리를 우선 사용하며 실패시 BeautifulSoup을 통해 재시도합니다.
-        그리고, 페이지 내 <iframe> 태그의 콘텐츠도 함께 추출합니다.
-        """
-        if visited is None:
-            visited = set()
-        main_text = ""
-        try:
-            from readability import Document
-            doc = Document(html_content)
-            main_html = doc.summary()
-            soup = BeautifulSoup(main_html, "lxml")
-            main_text = soup.get_text(separator=" ", strip=True)
-            main_text = re.sub(r'\s+', ' ', main_text).strip()
-        except Exception as e:
-            logger.error(f"Readability 추출 실패: {e}. 기존 방식으로 재시도합니다.")
-            if not html_content:
-                return ""
-            soup = BeautifulSoup(html_content, "lxml")
-            for element in soup(['script', 'style', 'meta', 'noscript', 'head', 'footer', 'nav']):
-                element.decompose()
-            paragraphs = []
-            for tag in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'span', 'article', 'section', 'li', 'td', 'th']):
-                curr_text = tag.get_text(strip=True)
-                if curr_text and len(curr_text) > 1:
-                    paragraphs.append(curr_text)
-            remaining_text = soup.get_text(separator=' ', strip=True)
-            if remaining_text:
-                for p in paragraphs:
-                    remaining_text = remaining_text.replace(p, '')
-                remaining_parts = [part for part in remaining_text.split() if len(part) > 1]
-                if remaining_parts:
-                    paragraphs.append(' '.join(remaining_parts))
-            main_text = ' '.join(paragraphs)
-            main_text = re.sub(r'\s+', ' ', main_text).strip()
-    
-        if session is not None:
-            original_soup = BeautifulSoup(html_content, "lxml")
-            iframe_texts = []
-            for iframe in original_soup.find_all("iframe"):
-                src = iframe.get("src", "")
-                if src:
-                    if not bool(urlparse(src).netloc) and base_url:
-                        src = urljoin(base_url, src)
-                    if src not in visited:
-                        visited.add(src)
-                        iframe_html = fetch_url(src, session)
-                        if iframe_html:
-                            iframe_content = extract_text_from_html_sync(iframe_html, session, visited, base_url=src)
-                            if iframe_content:
-                                iframe_texts.append(iframe_content)
-            if iframe_texts:
-                main_text += " " + " ".join(iframe_texts)
-                main_text = re.sub(r'\s+', ' ', main_text).strip()
-    
-        return main_text
-    
-    def process_url(url: str, session: requests.Session) -> dict:
-        """URL에서 본문 텍스트를 추출하는 함수."""
-        start_time = time.time()
-        result = {"url": url, "text": "", "success": False, "time": 0}
-        html_content = fetch_url(url, session)
-        if not html_content:
-            result["time"] = time.time() - start_time
-            return result
-        text = extract_text_from_html_sync(html_content, session, base_url=url)
-        result["text"] = text
-        result["success"] = True
-        result["time"] = time.time() - start_time
-        result["length"] = len(text)
-        return result
-    
+
     # DuckDuckGo 검색 수행
     results = []
+    seen_links = set()
     try:
-        ddg = DDGS()
-        ddg_results = ddg.text(query, max_results=max_results)
+        ddg_results = ddg_text_search(query, max_results=max_results)
         for item in ddg_results:
             href = item.get("href", "").strip()
             if not href:
@@ -316,27 +262,28 @@ def search_and_extract(query: str) -> str:
                 "snippet": item.get("body", "").strip(),
                 "main": ""
             }
-            if all(r.get('link') != href for r in results):
+            if href not in seen_links:
+                seen_links.add(href)
                 results.append(result_item)
     except Exception as e:
         logger.error(f"DuckDuckGo 검색 오류: {e}")
     
-    # 검색 결과의 각 링크에 대해 본문 텍스트 추출 (병렬 처리)
+    # 검색 결과의 각 링크에 대해 본문 텍스트 추출 (공유 비동기 페치 엔진에서 병렬 처리)
+    # 앞선 EXTRACT_FIRST_K개 페이지가 추출되거나 EXTRACT_DEADLINE이 지나면 나머지는 제외
+    dropped = []
     if results:
         links = [item["link"] for item in results]
-        session = requests.Session()
-        extracted = {}
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_url = {executor.submit(process_url, url, session): url for url in links}
-            for future in future_to_url:
-                url = future_to_url[future]
-                try:
-                    resp = future.result()
-                    extracted[url] = resp["text"] if resp["success"] else ""
-                except Exception as exc:
-                    logger.error(f"Error processing {url}: {exc}")
-                    extracted[url] = ""
+        try:
+            extracted, dropped = extract_urls_sync(links, first_k=EXTRACT_FIRST_K or None, deadline=EXTRACT_DEADLINE or None)
+        except Exception as exc:
+            logger.error(f"본문 추출 오류: {exc}")
+            extracted = {}
+        texts = []
         for item in results:
-            item["main"] = extracted.get(item["link"], "")
-    result_str = json.dumps(results, ensure_ascii=False)
-    return result_str
\ No newline at end of file
+            resp = extracted.get(item["link"])
+            texts.append(resp["text"] if resp and resp["success"] else "")
+        # 전체 본문 대신 쿼리와 관련도가 높은 단락만 전달하여 모델 입력 크기를 제한
+        for item, main in zip(results, select_passages(query, texts, per_page=PASSAGES_PER_PAGE, budget_chars=SEARCH_RESULT_CHAR_BUDGET)):
+            item["main"] = main
+    result_str = json.dumps({"results": results, "dropped": dropped}, ensure_ascii=False)
+    return result_str
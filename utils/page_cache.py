@@ -0,0 +1,146 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from .cache import TTLCache
+from config import CACHE_FOLDER, PAGE_CACHE_MAX_BYTES, PAGE_CACHE_FRESH_TTL, PAGE_CACHE_HOT_SIZE
+
+logger = logging.getLogger(__name__)
+
+PAGE_CACHE_FILE = os.path.join(CACHE_FOLDER, "pages.db")
+EVICT_EVERY = 50  # 저장 N회마다 용량 확인
+
+class PageCache:
+    """
+    URL별 추출 텍스트를 저장하는 디스크 캐시입니다.
+    SQLite(WAL) 파일을 사용하므로 여러 워커 프로세스가 같은 캐시를 공유하며,
+    프로세스마다 자주 쓰는 항목을 메모리(hot tier)에도 보관합니다.
+
+    Parameters:
+        path: SQLite 파일 경로
+        max_bytes: 디스크에 보관할 본문 총 크기 (초과 시 오래 사용되지 않은 항목부터 제거)
+        hot_size: 메모리에 보관할 최대 항목 수
+    """
+    def __init__(self, path: str = PAGE_CACHE_FILE, max_bytes: int = PAGE_CACHE_MAX_BYTES, hot_size: int = PAGE_CACHE_HOT_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._hot = TTLCache(maxsize=hot_size, ttl=PAGE_CACHE_FRESH_TTL)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._puts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """연결을 지연 생성합니다. (_lock 보유 상태에서 호출)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        return self._conn
+
+    def _with_freshness(self, entry: dict) -> dict:
+        return {**entry, "fresh": time.time() - entry["fetched_at"] < PAGE_CACHE_FRESH_TTL}
+
+    def peek(self, url: str):
+        """
+        메모리(hot) 계층만 조회합니다. SQLite를 건드리지 않으므로 이벤트 루프에서 바로 호출할 수 있습니다.
+
+        Returns:
+            get과 같은 형식 또는 메모리에 없으면 None
+        """
+        entry = self._hot.get(url)
+        return self._with_freshness(entry) if entry is not None else None
+
+    def get(self, url: str):
+        """
+        캐시된 항목을 반환합니다. (메모리에 없으면 SQLite를 조회하는 블로킹 호출)
+
+        Returns:
+            {"text", "etag", "last_modified", "fetched_at", "fresh"} 또는 None
+        """
+        entry = self._hot.get(url)
+        if entry is None:
+            try:
+                with self._lock:
+                    row = self._connect().execute(
+                        "SELECT text, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            except sqlite3.Error as e:
+                logger.error(f"페이지 캐시 조회 실패: {e}")
+                return None
+            entry = {"text": row[0], "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+            self._hot.set(url, entry)
+        return self._with_freshness(entry)
+
+    def put(self, url: str, text: str, etag: str = None, last_modified: str = None):
+        """추출 텍스트와 검증용 헤더를 저장합니다."""
+        now = time.time()
+        entry = {"text": text, "etag": etag, "last_modified": last_modified, "fetched_at": now}
+        self._hot.set(url, entry)
+        try:
+            with self._lock:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO pages (url, text, etag, last_modified, size, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, text, etag, last_modified, len(text.encode("utf-8")), now, now)
+                )
+                self._puts += 1
+                if self._puts % EVICT_EVERY == 0:
+                    self._evict()
+        except sqlite3.Error as e:
+            logger.error(f"페이지 캐시 저장 실패: {e}")
+
+    def refresh(self, url: str):
+        """304 Not Modified 응답을 받은 항목의 수집 시각을 갱신합니다."""
+        now = time.time()
+        entry = self._hot.get(url)
+        if entry is not None:
+            entry["fetched_at"] = now
+        try:
+            with self._lock:
+                self._connect().execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+        except sqlite3.Error as e:
+            logger.error(f"페이지 캐시 갱신 실패: {e}")
+
+    def _evict(self):
+        """총 크기가 max_bytes를 넘으면 최근에 사용되지 않은 항목부터 90%까지 줄입니다. (_lock 보유 상태에서 호출)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * 0.9)
+        removed = 0
+        urls = []
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY accessed_at"):
+            urls.append((url,))
+            removed += size
+            if removed >= target:
+                break
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", urls)
+        for (url,) in urls:
+            self._hot.pop(url)
+        logger.info(f"페이지 캐시 정리: {len(urls)}개, {removed / (1024 * 1024):.1f}MB 제거")
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+def get_page_cache() -> PageCache:
+    """모듈 단위로 공유되는 페이지 캐시를 반환합니다."""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+    return _page_cache
@@ -0,0 +1,132 @@
+import re
+import math
+from collections import Counter
+
+SENTENCE_END_RE = re.compile(r'(?<=[.!?。！？])\s+|\n+')
+WORD_RE = re.compile(r'[a-z0-9]+|[぀-ヿ㐀-鿿가-힣]+')
+CJK_RE = re.compile(r'[぀-ヿ㐀-鿿가-힣]')
+
+def split_passages(text: str, max_chars: int = 400) -> list:
+    """
+    텍스트를 문장 경계 기준으로 max_chars 이하의 단락으로 나눕니다.
+
+    Parameters:
+        text: 원문 텍스트
+        max_chars: 단락 최대 글자 수
+
+    Returns:
+        단락 문자열 목록
+    """
+    passages = []
+    current = ""
+    for sentence in SENTENCE_END_RE.split(text or ""):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        # 문장 하나가 너무 길면 강제로 자름
+        while len(sentence) > max_chars:
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            passages.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        passages.append(current)
+    return passages
+
+def tokenize(text: str) -> list:
+    """
+    검색용 토큰 목록을 만듭니다.
+    영문/숫자는 단어 단위, 한글/한자/가나는 띄어쓰기와 조사 변화에 강하도록 글자 2-gram 단위로 나눕니다.
+    """
+    tokens = []
+    for word in WORD_RE.findall((text or "").lower()):
+        if CJK_RE.match(word):
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+def bm25_scores(query: str, passages: list, k1: float = 1.5, b: float = 0.75) -> list:
+    """
+    쿼리에 대한 각 단락의 BM25 점수를 계산합니다.
+
+    Parameters:
+        query: 검색 쿼리
+        passages: 단락 문자열 목록
+
+    Returns:
+        단락 순서대로의 점수 목록
+    """
+    query_terms = set(tokenize(query))
+    if not passages or not query_terms:
+        return [0.0] * len(passages)
+
+    doc_terms = [Counter(tokenize(p)) for p in passages]
+    doc_lens = [sum(tf.values()) for tf in doc_terms]
+    avg_len = (sum(doc_lens) / len(doc_lens)) or 1.0
+    n = len(passages)
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for tf in doc_terms if term in tf)
+        idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    scores = []
+    for tf, length in zip(doc_terms, doc_lens):
+        score = 0.0
+        norm = k1 * (1 - b + b * length / avg_len)
+        for term in query_terms:
+            freq = tf.get(term)
+            if freq:
+                score += idf[term] * freq * (k1 + 1) / (freq + norm)
+        scores.append(score)
+    return scores
+
+def select_passages(query: str, texts: list, per_page: int = 3, budget_chars: int = 6000, passage_chars: int = 400) -> list:
+    """
+    여러 페이지의 본문에서 쿼리와 관련도가 높은 단락만 골라 전체 글자 수 예산 안으로 줄입니다.
+    IDF는 모든 페이지의 단락을 합쳐 계산하고, 점수 순으로 페이지별 최대 per_page개까지 선택합니다.
+
+    Parameters:
+        query: 검색 쿼리
+        texts: 페이지별 본문 텍스트 목록
+        per_page: 페이지당 최대 단락 수
+        budget_chars: 전체 결과의 최대 글자 수
+        passage_chars: 단락 최대 글자 수
+
+    Returns:
+        페이지별로 선택된 단락을 원문 순서대로 이어 붙인 문자열 목록 (texts와 같은 순서)
+    """
+    passages = []  # (페이지 번호, 페이지 내 순서, 단락)
+    for page_idx, text in enumerate(texts):
+        for pos, passage in enumerate(split_passages(text, passage_chars)):
+            passages.append((page_idx, pos, passage))
+    if not passages:
+        return ["" for _ in texts]
+
+    scores = bm25_scores(query, [p[2] for p in passages])
+    ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+
+    chosen = [[] for _ in texts]
+    used = 0
+    for i in ranked:
+        page_idx, pos, passage = passages[i]
+        if len(chosen[page_idx]) >= per_page:
+            continue
+        if used + len(passage) > budget_chars:
+            continue
+        # 관련 단락이 없는 페이지는 가장 앞쪽 단락 하나만 허용
+        if scores[i] <= 0 and chosen[page_idx]:
+            continue
+        chosen[page_idx].append((pos, passage))
+        used += len(passage)
+
+    return [" … ".join(passage for _, passage in sorted(page)) for page in chosen]
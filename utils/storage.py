@@ -0,0 +1,179 @@
+import io
+import os
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+import aiohttp
+from .media import MediaHandle
+from .janitor import protect, release
+from config import UPLOAD_FOLDER, MAX_CONTENT_LENGTH, UPLOAD_CHUNK_SIZE, MEDIA_MEMORY_LIMIT, ATTACHMENT_DOWNLOAD_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_RE = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+class UploadTooLarge(Exception):
+    """업로드 크기가 MAX_CONTENT_LENGTH를 넘었을 때 발생합니다."""
+
+def _safe_extension(filename: str) -> str:
+    """원본 파일 이름에서 경로에 써도 안전한 소문자 확장자만 남깁니다."""
+    _, ext = os.path.splitext(filename or "")
+    ext = ext.lower()
+    return ext if EXTENSION_RE.match(ext) else ""
+
+class _ChunkWriter:
+    """
+    청크를 임시 파일에 쓰면서 SHA-256을 계산하고, commit 시 내용 해시 경로로 옮기는 저장 단위입니다.
+    (ContentStore.save_stream과 save_attachment가 공유)
+    """
+    def __init__(self, store):
+        self.store = store
+        self.sha = hashlib.sha256()
+        self.size = 0
+        self.chunks = []  # MEDIA_MEMORY_LIMIT를 넘으면 비우고 디스크 경로만 사용
+        self.protected_path = None
+        fd, self.tmp_path = tempfile.mkstemp(dir=store._tmp_dir)
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.store.max_bytes:
+            raise UploadTooLarge(f"업로드 크기 제한 초과: {self.store.max_bytes} 바이트")
+        self.sha.update(chunk)
+        self.file.write(chunk)
+        if self.chunks is not None and self.size <= MEDIA_MEMORY_LIMIT:
+            self.chunks.append(chunk)
+        else:
+            self.chunks = None
+
+    def commit(self, filename: str) -> dict:
+        """임시 파일을 내용 해시 경로로 옮깁니다. 같은 내용이 이미 있으면 기존 파일을 재사용합니다."""
+        self.file.close()
+        digest = self.sha.hexdigest()
+        data = b"".join(self.chunks) if self.chunks is not None else None
+        path = self.store.path_for(digest, _safe_extension(filename))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 기존 파일 재사용 여부를 확인하기 전에 보호해, 진행 중인 정리가 재사용할 원본/파생본을 지우지 않도록 함
+        protect(path)
+        self.protected_path = path
+        if os.path.exists(path):
+            os.remove(self.tmp_path)
+            os.utime(path)  # 최근 사용 시각 갱신
+            logger.info(f"중복 업로드 재사용: {path}")
+            return {"path": path, "sha256": digest, "size": self.size, "deduplicated": True,
+                    "handle": MediaHandle(path, data, filename, digest)}
+        os.replace(self.tmp_path, path)
+        logger.debug(f"업로드 저장: {path} ({self.size} 바이트)")
+        return {"path": path, "sha256": digest, "size": self.size, "deduplicated": False,
+                "handle": MediaHandle(path, data, filename, digest)}
+
+    def abort(self):
+        """실패한 저장의 임시 파일과 보호를 정리합니다."""
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        release(self.protected_path)
+
+class ContentStore:
+    """
+    업로드 파일을 SHA-256 내용 해시로 저장하는 저장소입니다.
+    청크 단위로 임시 파일에 쓰면서 해시를 계산하고, 완료되면 root/ab/cd/<해시><확장자> 경로로 옮깁니다.
+    같은 내용의 파일은 한 번만 저장되며, 이미 있으면 기존 파일을 그대로 사용합니다.
+
+    Parameters:
+        root: 저장 루트 폴더
+        max_bytes: 파일 하나의 최대 크기
+        chunk_size: 스트리밍 읽기 단위 (바이트)
+    """
+    def __init__(self, root: str = UPLOAD_FOLDER, max_bytes: int = MAX_CONTENT_LENGTH, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._tmp_dir = os.path.join(root, ".tmp")
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    def path_for(self, digest: str, ext: str = "") -> str:
+        """해시 앞 4자리로 두 단계 샤딩한 저장 경로"""
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}{ext}")
+
+    def save_stream(self, stream, filename: str = "") -> dict:
+        """
+        파일 객체를 청크 단위로 읽어 저장합니다.
+        MEDIA_MEMORY_LIMIT 이하의 파일은 읽은 청크를 메모리에도 남겨, 이후 소비자가 디스크를 다시 읽지 않도록 합니다.
+        저장한 경로는 중복 확인 전에 저장소 정리 대상에서 제외(protect)되므로, 호출자는 사용이 끝나면 release해야 합니다.
+
+        Parameters:
+            stream: read(n)을 지원하는 바이너리 파일 객체
+            filename: 원본 파일 이름 (확장자만 사용)
+
+        Returns:
+            {"path", "sha256", "size", "deduplicated", "handle"} (handle은 MediaHandle)
+
+        Raises:
+            UploadTooLarge: 크기가 max_bytes를 넘은 경우 (임시 파일은 삭제됨)
+        """
+        writer = _ChunkWriter(self)
+        try:
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return writer.commit(filename)
+        except BaseException:
+            writer.abort()
+            raise
+
+    def save_bytes(self, data: bytes, filename: str = "") -> dict:
+        """메모리에 있는 바이트를 저장합니다. (save_stream과 같은 반환값)"""
+        return self.save_stream(io.BytesIO(data), filename)
+
+    async def save_attachment(self, attachment) -> dict:
+        """
+        디스코드 첨부 파일을 CDN에서 청크 단위로 내려받으며 save_stream과 같은 방식(청크별 SHA-256)으로 저장합니다.
+        크기가 제한을 넘으면 내려받지 않으며, save_stream과 마찬가지로 사용이 끝나면 release해야 합니다.
+
+        Returns:
+            save_stream과 같은 반환값
+        """
+        if attachment.size and attachment.size > self.max_bytes:
+            raise UploadTooLarge(f"업로드 크기 제한 초과: {self.max_bytes} 바이트")
+        writer = await asyncio.to_thread(_ChunkWriter, self)
+        try:
+            timeout = aiohttp.ClientTimeout(total=ATTACHMENT_DOWNLOAD_TIMEOUT)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(attachment.url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(self.chunk_size):
+                        # 디스크 쓰기와 해시 계산은 이벤트 루프 밖에서 수행
+                        await asyncio.to_thread(writer.write, chunk)
+            return await asyncio.to_thread(writer.commit, attachment.filename)
+        except BaseException:
+            writer.abort()
+            raise
+
+    def cleanup_tmp(self, max_age: float = 3600):
+        """중단된 업로드가 남긴 오래된 임시 파일을 삭제합니다."""
+        now = time.time()
+        for name in os.listdir(self._tmp_dir):
+            path = os.path.join(self._tmp_dir, name)
+            try:
+                if now - os.path.getmtime(path) > max_age:
+                    os.remove(path)
+            except OSError:
+                pass
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_content_store() -> ContentStore:
+    """모듈 단위로 공유되는 업로드 저장소를 반환합니다."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ContentStore()
+    return _store
@@ -0,0 +1,383 @@
+import re
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlparse, urljoin
+import lxml.html
+from lxml import etree
+from .web_fetch import get_fetch_engine, fetched_text
+from .page_cache import get_page_cache
+from config import EXTRACT_WORKERS, IFRAME_MAX_DEPTH, IFRAME_MAX_COUNT, IFRAME_TIME_BUDGET, IFRAME_SAME_SITE_ONLY
+
+logger = logging.getLogger(__name__)
+
+# 본문과 무관한 태그 (하위 요소 포함 제거)
+BOILERPLATE_TAGS = ('script', 'style', 'noscript', 'template', 'head',
+                    'button', 'select', 'svg', 'canvas', 'iframe', 'object', 'embed')
+# 보통은 본문 밖이지만 페이지 전체를 감싸기도 하는 태그 (예: ASP.NET의 <form>) - 본문 보호 조건을 확인한 뒤 제거
+LAYOUT_BOILERPLATE_TAGS = frozenset(('nav', 'footer', 'aside', 'form'))
+# class/id 이름으로 판별하는 광고/내비게이션 영역. "layout-with-sidebar"처럼 이름 일부만 겹치는 본문 래퍼는 남기도록
+# 공백으로 나뉜 토큰 전체가 일치할 때만 해당 (menu는 식당 메뉴판과 겹치므로 제외, 사이트 메뉴는 링크 비중으로 걸러짐)
+BOILERPLATE_ATTR_RE = re.compile(
+    r'(^|\s)(nav|navbar|footer|sidebar|comments?|advert|ads?|banner|cookie|popup|modal|share|social|related|breadcrumbs?|gnb|lnb)(\s|$)',
+    re.IGNORECASE
+)
+# 이 비율 이상의 페이지 텍스트를 담은 요소는 boilerplate로 보이더라도 제거하지 않음
+MAX_BOILERPLATE_TEXT_SHARE = 0.5
+# 하나의 텍스트 단락으로 취급할 블록 태그
+BLOCK_TAGS = frozenset(('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'td', 'th', 'dd', 'dt', 'pre', 'blockquote',
+                        'figcaption', 'caption', 'div', 'section', 'article', 'main', 'header', 'table', 'tr',
+                        'ul', 'ol', 'dl', 'body'))
+HEADING_TAGS = frozenset(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+MIN_BLOCK_CHARS = 20
+MAX_LINK_DENSITY = 0.5
+WHITESPACE_RE = re.compile(r'\s+')
+
+# 따라가지 않을 iframe 도메인 (광고, 추적, 소셜 위젯, 동영상 플레이어 등 본문이 없는 임베드)
+IFRAME_DENYLIST = (
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'adservice.google.com',
+    'googletagmanager.com', 'google-analytics.com', 'amazon-adsystem.com', 'adnxs.com', 'criteo.com',
+    'criteo.net', 'taboola.com', 'outbrain.com', 'adsrvr.org', 'rubiconproject.com', 'pubmatic.com',
+    'facebook.com', 'facebook.net', 'twitter.com', 'x.com', 'instagram.com', 'disqus.com',
+    'youtube.com', 'youtube-nocookie.com', 'vimeo.com', 'kakao.com', 'recaptcha.net'
+)
+# 등록 가능 도메인이 세 단계인 2단계 접미사 (예: co.kr, com.au)
+SECOND_LEVEL_SUFFIXES = frozenset(('co', 'or', 'ne', 'go', 'ac', 're', 'pe', 'com', 'net', 'org', 'gov', 'edu'))
+
+def extract_page(html_content: str, base_url: str = None) -> dict:
+    """
+    HTML을 lxml로 한 번만 파싱하여 메인 텍스트, iframe 주소, 링크를 함께 추출합니다.
+    광고/내비게이션 영역을 제거한 뒤, 블록 단위 텍스트 중 링크 비중이 높은 블록을 걸러냅니다.
+    짧은 블록(표 칸, 목록 항목 등)은 버리지 않고 상위 블록에 합쳐 영업시간/가격 같은 정보를 유지합니다.
+    (트리를 한 번 순회하므로 페이지 크기에 선형)
+
+    Parameters:
+        html_content: HTML 문자열
+        base_url: 상대 경로를 절대 경로로 바꿀 때 사용할 기준 URL
+
+    Returns:
+        {"title": 제목, "text": 메인 텍스트, "iframes": iframe URL 목록, "links": [(URL, 링크 텍스트), ...]}
+    """
+    page = {"title": "", "text": "", "iframes": [], "links": []}
+    if not html_content or not html_content.strip():
+        return page
+    try:
+        root = lxml.html.document_fromstring(html_content)
+    except (etree.ParserError, ValueError) as e:
+        logger.error(f"HTML 파싱 실패: {e}")
+        return page
+
+    title = root.findtext('.//title')
+    page["title"] = WHITESPACE_RE.sub(' ', title).strip() if title else ""
+
+    # iframe과 링크는 제거 전에 수집
+    seen = set()
+    boilerplate = []
+    for el in root.iter(etree.Element):
+        tag = el.tag
+        if tag == 'iframe':
+            src = el.get('src', '').strip()
+            if src and not src.startswith(('javascript:', 'about:', 'data:')):
+                src = urljoin(base_url, src) if base_url and not urlparse(src).netloc else src
+                if src not in seen:
+                    seen.add(src)
+                    page["iframes"].append(src)
+        elif tag == 'a':
+            href = el.get('href', '').strip()
+            if href and not href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                page["links"].append((urljoin(base_url, href) if base_url else href, WHITESPACE_RE.sub(' ', el.text_content()).strip()))
+        if tag in LAYOUT_BOILERPLATE_TAGS:
+            boilerplate.append(el)
+        elif tag not in ('html', 'body', 'main', 'article'):
+            attrs = f"{el.get('class', '')} {el.get('id', '')}"
+            if attrs.strip() and BOILERPLATE_ATTR_RE.search(attrs):
+                boilerplate.append(el)
+
+    etree.strip_elements(root, etree.Comment, etree.ProcessingInstruction, *BOILERPLATE_TAGS, with_tail=False)
+    # <main>/<article>을 포함하거나 페이지 텍스트 대부분을 담은 요소는 본문 래퍼로 보고 남김
+    total_chars = len(root.text_content())
+    for el in boilerplate:
+        if el.find('.//main') is not None or el.find('.//article') is not None:
+            continue
+        if total_chars and len(el.text_content()) >= total_chars * MAX_BOILERPLATE_TEXT_SHARE:
+            continue
+        el.drop_tree()
+
+    # 블록 태그마다 버퍼를 열고, 텍스트 노드를 가장 가까운 블록에 누적 (링크 내부 글자 수도 함께 집계)
+    # 블록은 닫힐 때 확정되므로 여는 순서를 기록해 두었다가 문서 순서로 정렬
+    blocks = []
+    stack = [[[], 0, 'html', 0]]  # [텍스트 조각, 링크 글자 수, 태그, 순서]
+    order = 0
+    in_link = 0
+    for event, el in etree.iterwalk(root, events=('start', 'end')):
+        tag = el.tag
+        if event == 'start':
+            if tag in BLOCK_TAGS:
+                order += 1
+                stack.append([[], 0, tag, order])
+            if tag == 'a':
+                in_link += 1
+            if el.text:
+                stack[-1][0].append(el.text)
+                if in_link:
+                    stack[-1][1] += len(el.text)
+        else:
+            if tag == 'a':
+                in_link -= 1
+            if tag in BLOCK_TAGS and len(stack) > 1:
+                block = stack.pop()
+                text = WHITESPACE_RE.sub(' ', ' '.join(block[0])).strip()
+                if tag in HEADING_TAGS or len(text) >= MIN_BLOCK_CHARS:
+                    block[0] = [text]
+                    blocks.append(block)
+                else:
+                    # 짧은 블록은 상위 블록에 합쳐 함께 판정 (링크 글자 수도 넘김)
+                    stack[-1][0].append(text)
+                    stack[-1][1] += block[1]
+            if el.tail:
+                stack[-1][0].append(el.tail)
+                if in_link:
+                    stack[-1][1] += len(el.tail)
+    blocks.append(stack[0])
+    blocks.sort(key=lambda block: block[3])
+
+    texts = []
+    for parts, link_chars, block_tag, _ in blocks:
+        text = WHITESPACE_RE.sub(' ', ' '.join(parts)).strip()
+        if len(text) < 2:
+            continue
+        if block_tag not in HEADING_TAGS and link_chars > len(text) * MAX_LINK_DENSITY:
+            continue
+        texts.append(text)
+    page["text"] = ' '.join(texts)
+    return page
+
+def extract_page_bytes(body: bytes, charset: str = None, base_url: str = None, truncated: bool = False) -> dict:
+    """
+    프로세스 풀 작업 함수: 원본 바이트를 받아 디코딩과 추출을 수행하고 간결한 결과만 돌려줍니다.
+
+    Returns:
+        {"title", "text", "iframes"} 딕셔너리 (링크 목록은 프로세스 간 전송량을 줄이기 위해 제외)
+    """
+    page = extract_page(fetched_text(body, charset, truncated), base_url)
+    return {"title": page["title"], "text": page["text"], "iframes": page["iframes"]}
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def _get_process_pool():
+    """HTML 파싱용 공유 프로세스 풀을 반환합니다. EXTRACT_WORKERS가 0이면 None."""
+    global _process_pool
+    if EXTRACT_WORKERS <= 0:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # 스레드가 여러 개 도는 서버 프로세스에서 fork는 안전하지 않으므로 spawn 사용
+            _process_pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"HTML 추출 프로세스 풀 시작: {EXTRACT_WORKERS}개 워커")
+    return _process_pool
+
+async def parse_page(fetched: dict) -> dict:
+    """fetch 결과를 프로세스 풀에서 파싱합니다. 풀을 쓸 수 없으면 스레드에서 파싱합니다."""
+    global _process_pool
+    loop = asyncio.get_running_loop()
+    args = (fetched["body"], fetched["charset"], fetched["url"], fetched["truncated"])
+    pool = _get_process_pool()
+    if pool is not None:
+        try:
+            return await loop.run_in_executor(pool, extract_page_bytes, *args)
+        except BrokenProcessPool:
+            logger.error("HTML 추출 프로세스 풀이 중단되어 재생성합니다.")
+            with _process_pool_lock:
+                if _process_pool is pool:
+                    _process_pool = None
+    return await loop.run_in_executor(None, extract_page_bytes, *args)
+
+def registrable_domain(host: str) -> str:
+    """호스트의 등록 가능 도메인을 근사합니다. (예: m.blog.naver.com -> naver.com, www.visitkorea.or.kr -> visitkorea.or.kr)"""
+    labels = host.lower().split(':')[0].rstrip('.').split('.')
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+def iframe_allowed(src: str, page_url: str) -> bool:
+    """
+    iframe을 따라갈지 판단합니다.
+
+    Parameters:
+        src: iframe의 절대 URL
+        page_url: iframe을 포함한 페이지의 URL
+
+    Returns:
+        http(s) 주소이고, 거부 목록에 없으며, (IFRAME_SAME_SITE_ONLY이면) 같은 사이트일 때 True
+    """
+    parsed = urlparse(src)
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        return False
+    host = parsed.hostname or ""
+    if any(host == domain or host.endswith('.' + domain) for domain in IFRAME_DENYLIST):
+        return False
+    if IFRAME_SAME_SITE_ONLY:
+        return registrable_domain(host) == registrable_domain(urlparse(page_url).hostname or "")
+    return True
+
+async def _extract_url_text(url: str, visited: set, fetched: dict = None, depth: int = 0, budget: dict = None) -> str:
+    """
+    URL을 가져와 메인 텍스트를 추출하고, iframe 콘텐츠도 추출해 병합합니다.
+    같은 단계의 iframe은 동시에 가져오며, 깊이(IFRAME_MAX_DEPTH), 개수(IFRAME_MAX_COUNT),
+    시간(IFRAME_TIME_BUDGET)은 최상위 페이지 하나를 기준으로 제한합니다.
+
+    Parameters:
+        url: 추출할 URL
+        visited: 이미 방문한 URL 집합 (중복 방지)
+        fetched: 이미 가져온 fetch 결과 (없으면 새로 가져옴)
+        depth: 현재 iframe 깊이 (최상위 페이지는 0)
+        budget: 최상위 페이지 단위로 공유하는 {"count": 남은 iframe 수, "deadline": 종료 시각}
+    """
+    if fetched is None:
+        fetched = await get_fetch_engine().fetch(url)
+    if not fetched["body"]:
+        return ""
+    # HTML 파싱은 CPU 작업이므로 GIL을 피해 워커 프로세스에서 수행 (바이트 입력, 텍스트 출력)
+    page = await parse_page(fetched)
+    main_text = page["text"]
+    if depth >= IFRAME_MAX_DEPTH:
+        return main_text
+    if budget is None:
+        budget = {"count": IFRAME_MAX_COUNT, "deadline": time.monotonic() + IFRAME_TIME_BUDGET}
+
+    srcs = []
+    for src in page["iframes"]:
+        if budget["count"] <= 0:
+            break
+        if src in visited or not iframe_allowed(src, url):
+            continue
+        visited.add(src)
+        budget["count"] -= 1
+        srcs.append(src)
+    timeout = budget["deadline"] - time.monotonic()
+    if not srcs or timeout <= 0:
+        return main_text
+
+    tasks = [asyncio.ensure_future(_extract_url_text(src, visited, depth=depth + 1, budget=budget)) for src in srcs]
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.debug(f"iframe 추출 시간 초과로 {len(pending)}개 제외: {url}")
+
+    # 문서 순서대로 병합
+    iframe_texts = []
+    for task in tasks:
+        if task in done and not task.cancelled() and task.exception() is None and task.result():
+            iframe_texts.append(task.result())
+    if iframe_texts:
+        main_text += " " + " ".join(iframe_texts)
+        main_text = re.sub(r'\s+', ' ', main_text).strip()
+    return main_text
+
+async def process_url(url: str) -> dict:
+    """URL에서 본문 텍스트를 추출하는 함수."""
+    start_time = time.time()
+    result = {"url": url, "text": "", "success": False, "cached": False, "time": 0}
+    loop = asyncio.get_running_loop()
+    page_cache = get_page_cache()
+    try:
+        # 메모리 계층 적중만 루프에서 처리하고, SQLite 조회/기록은 스레드에서 수행 (디스크 지연이 다른 fetch를 막지 않도록)
+        cached = page_cache.peek(url)
+        if cached is None:
+            cached = await loop.run_in_executor(None, page_cache.get, url)
+        if cached is not None and cached["fresh"]:
+            text = cached["text"]
+            result["cached"] = True
+        else:
+            # 캐시가 오래되었으면 조건부 요청으로 변경 여부만 확인
+            headers = {}
+            if cached is not None:
+                if cached["etag"]:
+                    headers["If-None-Match"] = cached["etag"]
+                if cached["last_modified"]:
+                    headers["If-Modified-Since"] = cached["last_modified"]
+            fetched = await get_fetch_engine().fetch(url, headers=headers or None)
+            if fetched["status"] == 304 and cached is not None:
+                loop.run_in_executor(None, page_cache.refresh, url)
+                text = cached["text"]
+                result["cached"] = True
+            else:
+                text = await _extract_url_text(url, {url}, fetched)
+                if text:
+                    # 기록 완료를 기다리지 않음 (결과 반환과 EXTRACT_DEADLINE에 영향 없도록)
+                    loop.run_in_executor(None, page_cache.put, url, text, fetched["etag"], fetched["last_modified"])
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing {url}: {e}")
+        text = ""
+    result["text"] = text
+    result["success"] = bool(text)
+    result["time"] = time.time() - start_time
+    result["length"] = len(text)
+    return result
+
+async def extract_urls(urls: list, first_k: int = None, deadline: float = None) -> tuple:
+    """
+    여러 URL의 본문 텍스트를 동시에 추출합니다.
+    first_k개의 페이지 추출에 성공하거나 deadline이 지나면 남은 작업을 취소하고 바로 반환합니다.
+
+    Parameters:
+        urls: 추출할 URL 목록
+        first_k: 이 개수만큼 추출에 성공하면 종료 (None이면 전부 기다림)
+        deadline: 전체 제한 시간 (초, None이면 제한 없음)
+
+    Returns:
+        ({url: 결과 딕셔너리}, 취소되어 제외된 URL 목록)
+    """
+    tasks = {asyncio.ensure_future(process_url(url)): url for url in urls}
+    results = {}
+    successes = 0
+    end_time = None if deadline is None else time.monotonic() + deadline
+    pending = set(tasks)
+
+    while pending:
+        timeout = None if end_time is None else end_time - time.monotonic()
+        if timeout is not None and timeout <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            result = task.result()
+            results[result["url"]] = result
+            successes += result["success"]
+        if first_k is not None and successes >= first_k:
+            break
+
+    dropped = []
+    for task in pending:
+        task.cancel()
+        dropped.append(tasks[task])
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.info(f"본문 추출 조기 종료: 성공 {successes}개, 제외 {len(dropped)}개")
+    # 입력 순서대로 정렬
+    dropped.sort(key=urls.index)
+    return results, dropped
+
+def extract_urls_sync(urls: list, first_k: int = None, deadline: float = None) -> tuple:
+    """
+    extract_urls의 동기 래퍼 (Gemini 함수 호출 경로에서 사용)
+
+    Parameters:
+        urls: 추출할 URL 목록
+        first_k: 이 개수만큼 추출에 성공하면 종료 (None이면 전부 기다림)
+        deadline: 전체 제한 시간 (초, None이면 제한 없음)
+
+    Returns:
+        ({url: {"url", "text", "success", "cached", "time", "length"}}, 제외된 URL 목록)
+    """
+    if not urls:
+        return {}, []
+    return get_fetch_engine().run(extract_urls(urls, first_k=first_k, deadline=deadline))
@@ -0,0 +1,349 @@
+import re
+import time
+import atexit
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import aiohttp
+from config import (FETCH_TIMEOUT, FETCH_MAX_RETRIES, FETCH_GLOBAL_CONCURRENCY, FETCH_PER_HOST_CONCURRENCY, FETCH_MAX_BYTES,
+                    FETCH_MAX_DEFER, FETCH_MAX_BACKOFF)
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8',
+    'Upgrade-Insecure-Requests': '1',
+    'Cache-Control': 'max-age=0'
+}
+RETRY_DELAY = 0.5   # 초, 지수 백오프의 기본 단위
+RETRY_STATUS = (429, 503)
+THROTTLE_INTERVAL = 1.0  # 제한 응답을 받은 도메인의 최소 요청 간격 (초), 반복되면 두 배씩 증가
+MAX_INTERVAL = 30.0
+CHUNK_SIZE = 64 * 1024
+
+# 텍스트로 처리할 Content-Type
+TEXT_CONTENT_TYPES = ('text/', 'application/xhtml', 'application/xml', 'application/rss', 'application/atom')
+# 본문 앞부분의 매직 바이트로 판별하는 바이너리 형식
+BINARY_SIGNATURES = (
+    b'%PDF', b'\x89PNG', b'GIF8', b'\xff\xd8\xff', b'PK\x03\x04', b'RIFF', b'ID3', b'OggS',
+    b'\x1f\x8b', b'\x1aE\xdf\xa3', b'fLaC', b'Rar!', b'7z\xbc\xaf', b'\xd0\xcf\x11\xe0'
+)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+def is_binary_content(head: bytes, content_type: str = "") -> bool:
+    """
+    Content-Type 헤더와 본문 앞부분으로 바이너리 콘텐츠 여부를 판별합니다.
+
+    Parameters:
+        head: 본문의 앞부분 바이트
+        content_type: 응답의 Content-Type (없으면 빈 문자열)
+
+    Returns:
+        바이너리이면 True
+    """
+    content_type = (content_type or "").lower()
+    if content_type and not content_type.startswith(TEXT_CONTENT_TYPES) and content_type != 'application/octet-stream':
+        return True
+    if head.startswith(BINARY_SIGNATURES) or head[4:8] == b'ftyp':  # ftyp: MP4/MOV/HEIC
+        return True
+    # 텍스트 문서에는 NUL 바이트가 거의 없음 (UTF-16 문서는 BOM으로 예외 처리)
+    if not head.startswith((b'\xff\xfe', b'\xfe\xff')) and head[:1024].count(b'\x00') > 0:
+        return True
+    return False
+
+def decode_html(body: bytes, charset: str = None) -> str:
+    """응답 헤더 또는 <meta> 태그의 문자셋으로 본문을 디코딩합니다."""
+    if not charset:
+        match = META_CHARSET_RE.search(body[:4096])
+        charset = match.group(1).decode('ascii', 'ignore') if match else 'utf-8'
+    try:
+        return body.decode(charset, errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+def truncate_html(text: str) -> str:
+    """잘린 HTML의 끝에 남은 불완전한 태그를 제거합니다. 닫히지 않은 태그는 파서가 보정합니다."""
+    last_open = text.rfind('<')
+    if last_open > text.rfind('>'):
+        text = text[:last_open]
+    return text
+
+def fetched_text(body: bytes, charset: str = None, truncated: bool = False) -> str:
+    """fetch 결과의 본문 바이트를 텍스트로 디코딩하고, 잘린 경우 끝의 불완전한 태그를 정리합니다."""
+    text = decode_html(body, charset)
+    return truncate_html(text) if truncated else text
+
+def parse_retry_after(value: str):
+    """
+    Retry-After 헤더(초 또는 HTTP 날짜)를 대기 시간(초)으로 변환합니다.
+
+    Returns:
+        대기 시간(초) 또는 None (헤더가 없거나 해석할 수 없는 경우)
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+class DomainScheduler:
+    """
+    도메인별 요청 간격과 백오프 상태를 요청 사이에 기억하는 스케줄러입니다.
+    429/503 응답이나 Retry-After를 받은 도메인은 일정 시간 차단하고 요청 간격을 늘리며,
+    성공하면 간격을 점차 줄입니다. 엔진 루프 스레드에서만 사용합니다.
+
+    Parameters:
+        max_defer: 요청 하나가 도메인 차례를 기다릴 최대 시간 (초), 넘으면 요청을 건너뜀
+        max_backoff: 도메인 차단 시간의 상한 (초)
+    """
+    def __init__(self, max_defer: float = FETCH_MAX_DEFER, max_backoff: float = FETCH_MAX_BACKOFF):
+        self.max_defer = max_defer
+        self.max_backoff = max_backoff
+        self._domains = {}  # host -> {"blocked_until", "next_slot", "interval", "strikes"}
+
+    def _state(self, host: str) -> dict:
+        state = self._domains.get(host)
+        if state is None:
+            state = self._domains[host] = {"blocked_until": 0.0, "next_slot": 0.0, "interval": 0.0, "strikes": 0}
+        return state
+
+    def remaining_backoff(self, host: str) -> float:
+        """도메인의 남은 차단 시간(초)을 반환합니다."""
+        state = self._domains.get(host)
+        return max(0.0, state["blocked_until"] - time.monotonic()) if state else 0.0
+
+    async def acquire(self, host: str) -> bool:
+        """
+        도메인의 다음 요청 슬롯을 예약하고 그 시각까지 기다립니다.
+
+        Returns:
+            요청해도 되면 True, 대기 시간이 max_defer를 넘어 건너뛰어야 하면 False
+        """
+        state = self._domains.get(host)
+        if state is None:
+            return True
+        now = time.monotonic()
+        slot = max(now, state["next_slot"], state["blocked_until"])
+        if slot - now > self.max_defer:
+            return False
+        state["next_slot"] = slot + state["interval"]
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        return True
+
+    def penalize(self, host: str, retry_after: float = None):
+        """제한 응답(429/503)을 받은 도메인을 차단하고 요청 간격을 늘립니다."""
+        state = self._state(host)
+        state["strikes"] += 1
+        state["interval"] = min(MAX_INTERVAL, max(THROTTLE_INTERVAL, state["interval"] * 2))
+        if retry_after is None:
+            # Retry-After가 없으면 연속 실패 횟수 기준 지수 백오프 (full jitter)
+            retry_after = random.uniform(RETRY_DELAY, RETRY_DELAY * (2 ** state["strikes"]))
+        blocked_until = time.monotonic() + min(retry_after, self.max_backoff)
+        state["blocked_until"] = max(state["blocked_until"], blocked_until)
+        logger.warning(f"{host} 백오프: {blocked_until - time.monotonic():.1f}초, 요청 간격 {state['interval']:.1f}초")
+
+    def record_success(self, host: str):
+        """성공한 도메인의 요청 간격을 줄이고, 제한이 모두 풀리면 상태를 삭제합니다."""
+        state = self._domains.get(host)
+        if state is None:
+            return
+        state["strikes"] = 0
+        state["interval"] = state["interval"] / 2 if state["interval"] > THROTTLE_INTERVAL / 8 else 0.0
+        if state["interval"] == 0.0 and state["blocked_until"] <= time.monotonic():
+            del self._domains[host]
+
+class FetchEngine:
+    """
+    전용 백그라운드 이벤트 루프에서 동작하는 공유 비동기 HTTP 페치 엔진입니다.
+    커넥션 풀과 keep-alive를 재사용하고, 전체/호스트별 동시 요청 수를 제한합니다.
+
+    Parameters:
+        global_limit: 전체 동시 요청 수
+        per_host_limit: 호스트별 동시 요청 수
+        timeout: 요청당 전체 타임아웃 (초)
+        max_retries: 타임아웃/429/503 발생 시 최대 재시도 횟수
+        max_bytes: 응답 본문을 읽을 최대 바이트 수 (초과분은 잘라냄)
+    """
+    def __init__(self, global_limit: int = FETCH_GLOBAL_CONCURRENCY, per_host_limit: int = FETCH_PER_HOST_CONCURRENCY,
+                 timeout: float = FETCH_TIMEOUT, max_retries: int = FETCH_MAX_RETRIES, max_bytes: int = FETCH_MAX_BYTES):
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_bytes = max_bytes
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._global_sem = None
+        self._host_sems = {}
+        self.scheduler = DomainScheduler()
+        self._start_lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """엔진의 이벤트 루프를 반환합니다. 처음 호출될 때 루프 스레드를 시작합니다."""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="fetch-engine")
+                self._thread.daemon = True
+                self._thread.start()
+        return self._loop
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """루프 안에서 공유 세션을 생성하거나 반환합니다."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.global_limit,
+                limit_per_host=self.per_host_limit,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+                ssl=False  # SSL 인증서 검증 우회 (기존 동작 유지)
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=min(5, self.timeout))
+            )
+            self._global_sem = asyncio.Semaphore(self.global_limit)
+        return self._session
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(self.per_host_limit)
+        return sem
+
+    async def fetch(self, url: str, headers: dict = None) -> dict:
+        """
+        단일 URL을 비동기로 가져옵니다. (재시도 로직 포함)
+        재시도 대기는 도메인 스케줄러가 관리하며, 도메인이 max_defer보다 오래 백오프 중이면 요청하지 않습니다.
+
+        Parameters:
+            url: 가져올 URL
+            headers: 추가 요청 헤더 (예: 조건부 요청용 If-None-Match, If-Modified-Since)
+
+        Returns:
+            {"url", "status", "body", "charset", "etag", "last_modified", "error", "truncated", "time"} 형태의 딕셔너리
+            (본문 텍스트는 fetched_text로 디코딩, 304 응답이면 body는 비어 있음)
+        """
+        start_time = time.time()
+        result = {"url": url, "status": None, "body": b"", "charset": None, "etag": None, "last_modified": None,
+                  "error": None, "truncated": False, "time": 0}
+        session = await self._get_session()
+        host = urlparse(url).netloc
+
+        for attempt in range(self.max_retries + 1):
+            if not await self.scheduler.acquire(host):
+                result["error"] = f"Domain in backoff ({self.scheduler.remaining_backoff(host):.0f}s)"
+                break
+            retry_reason = None
+            try:
+                async with self._global_sem, self._host_semaphore(host):
+                    logger.debug(f"Fetching {url}")
+                    async with session.get(url, headers=headers) as response:
+                        result["status"] = response.status
+                        result["etag"] = response.headers.get('ETag')
+                        result["last_modified"] = response.headers.get('Last-Modified')
+                        if response.status in RETRY_STATUS:
+                            retry_reason = f"Status code {response.status}"
+                            self.scheduler.penalize(host, parse_retry_after(response.headers.get('Retry-After')))
+                        else:
+                            self.scheduler.record_success(host)
+                            if response.status == 304:
+                                break
+                            if response.status == 200:
+                                result["charset"] = response.charset
+                                result["body"], result["error"], result["truncated"] = await self._read_capped(response)
+                            else:
+                                result["error"] = f"Status code {response.status}"
+                            break
+            except asyncio.TimeoutError:
+                retry_reason = "Timeout"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                result["error"] = str(e)
+                break
+
+            result["error"] = retry_reason
+            if attempt < self.max_retries:
+                logger.warning(f"{retry_reason} on {url}. Retrying...")
+                if retry_reason == "Timeout":
+                    await asyncio.sleep(random.uniform(0, RETRY_DELAY * (2 ** attempt)))
+
+        if result["error"]:
+            logger.error(f"Error fetching {url}: {result['error']}")
+        result["time"] = time.time() - start_time
+        return result
+
+    async def _read_capped(self, response) -> tuple:
+        """
+        응답 본문을 청크 단위로 최대 max_bytes까지만 읽습니다.
+        첫 청크에서 바이너리로 판별되면 즉시 읽기를 중단합니다.
+        디코딩은 하지 않고 원본 바이트를 반환합니다. (파싱 단계에서 처리)
+
+        Returns:
+            (본문 바이트, 오류 메시지 또는 None, 잘림 여부)
+        """
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type and is_binary_content(b'', content_type):
+            return b"", f"Skipped binary content ({content_type})", False
+
+        chunks = []
+        size = 0
+        truncated = False
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if not chunks and is_binary_content(chunk[:1024]):
+                return b"", "Skipped binary content (sniffed)", False
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                truncated = True
+                logger.debug(f"Truncated {response.url} at {self.max_bytes} bytes")
+                break
+
+        return b''.join(chunks)[:self.max_bytes], None, truncated
+
+    def run(self, coro, timeout: float = None):
+        """코루틴을 엔진 루프에서 실행하고 결과를 기다리는 동기 래퍼입니다."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def fetch_sync(self, url: str, headers: dict = None) -> dict:
+        """fetch의 동기 버전"""
+        return self.run(self.fetch(url, headers))
+
+    def close(self):
+        """세션과 이벤트 루프를 정리합니다."""
+        if self._loop is None:
+            return
+        if self._session is not None and not self._session.closed:
+            self.run(self._session.close(), timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_fetch_engine() -> FetchEngine:
+    """모듈 단위로 공유되는 페치 엔진을 반환합니다."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = FetchEngine()
+            atexit.register(_engine.close)
+    return _engine
@@ -0,0 +1,150 @@
+import re
+import time
+import logging
+import threading
+import contextvars
+import unicodedata
+import pytz
+from duckduckgo_search import DDGS
+from .cache import TTLCache
+from .local_time import get_timezone_by_gps
+from config import (SEARCH_CACHE_TTL, SEARCH_REGION, SEARCH_RATE_PER_SEC, SEARCH_RATE_BURST,
+                    SEARCH_RATE_WAIT, SEARCH_STALE_TTL)
+
+logger = logging.getLogger(__name__)
+
+QUERY_PUNCT_RE = re.compile(r'[^\w\s]', re.UNICODE)
+
+# 국가 코드 -> DuckDuckGo 지역 코드 (목록에 없는 국가는 SEARCH_REGION 사용)
+DDG_REGIONS = {
+    "KR": "kr-kr", "JP": "jp-jp", "CN": "cn-zh", "TW": "tw-tzh", "HK": "hk-tzh", "SG": "sg-en",
+    "TH": "th-th", "VN": "vn-vi", "MY": "my-en", "ID": "id-en", "PH": "ph-en", "IN": "in-en",
+    "US": "us-en", "CA": "ca-en", "MX": "mx-es", "BR": "br-pt", "AR": "ar-es", "AU": "au-en", "NZ": "nz-en",
+    "GB": "uk-en", "IE": "ie-en", "FR": "fr-fr", "DE": "de-de", "AT": "at-de", "CH": "ch-de", "IT": "it-it",
+    "ES": "es-es", "PT": "pt-pt", "NL": "nl-nl", "BE": "be-fr", "DK": "dk-da", "SE": "se-sv", "NO": "no-no",
+    "FI": "fi-fi", "PL": "pl-pl", "CZ": "cz-cs", "GR": "gr-el", "TR": "tr-tr", "RU": "ru-ru",
+}
+
+class RateLimiter:
+    """
+    토큰 버킷 방식의 스레드 안전 요청 속도 제한기입니다.
+
+    Parameters:
+        rate: 초당 허용 요청 수
+        burst: 순간적으로 허용할 최대 요청 수
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """토큰을 하나 얻을 때까지 기다립니다. timeout 안에 얻지 못하면 False를 반환합니다."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_time = (1 - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait_time > deadline:
+                return False
+            time.sleep(wait_time)
+
+_search_cache = TTLCache(maxsize=2048, ttl=SEARCH_CACHE_TTL)
+# 신선 기간이 지난 결과도 오래 보관해, 속도 제한이나 검색 오류 시 빈 결과 대신 사용
+_stale_cache = TTLCache(maxsize=2048, ttl=SEARCH_STALE_TTL)
+_search_limiter = RateLimiter(SEARCH_RATE_PER_SEC, SEARCH_RATE_BURST)
+# 현재 요청의 검색 지역 (요청 스레드에서 설정, 모델이 호출하는 검색 함수가 참조)
+_search_region = contextvars.ContextVar("search_region", default=None)
+_tz_countries = None
+
+def region_for_location(latitude, longitude) -> str:
+    """
+    위치가 속한 국가의 DuckDuckGo 지역 코드를 반환합니다.
+
+    Parameters:
+        latitude, longitude: 위도와 경도
+
+    Returns:
+        지역 코드 (예: 'kr-kr'), 알 수 없으면 SEARCH_REGION
+    """
+    global _tz_countries
+    if _tz_countries is None:
+        _tz_countries = {}
+        for country, zones in pytz.country_timezones.items():
+            for zone in zones:
+                _tz_countries.setdefault(zone, country)
+    try:
+        tz_name = get_timezone_by_gps(latitude, longitude)
+    except (TypeError, ValueError):
+        return SEARCH_REGION
+    return DDG_REGIONS.get(_tz_countries.get(tz_name), SEARCH_REGION)
+
+def set_search_region(region: str):
+    """
+    현재 요청(컨텍스트)의 검색 지역을 설정합니다. None이면 SEARCH_REGION을 사용합니다.
+    워커 스레드가 다음 요청에 재사용되므로, 요청이 끝나면 반환된 토큰으로 reset_search_region을 호출해야 합니다.
+    """
+    return _search_region.set(region)
+
+def reset_search_region(token):
+    """set_search_region 이전의 검색 지역으로 되돌립니다."""
+    _search_region.reset(token)
+
+def normalize_query(query: str) -> str:
+    """
+    공백, 대소문자, 구두점, 단어 순서만 다른 쿼리가 같은 키가 되도록 정규화합니다.
+
+    Parameters:
+        query: 원본 검색 쿼리
+
+    Returns:
+        정규화된 쿼리 문자열
+    """
+    query = unicodedata.normalize("NFKC", query or "").lower()
+    tokens = QUERY_PUNCT_RE.sub(" ", query).split()
+    return " ".join(sorted(set(tokens)))
+
+def ddg_text_search(query: str, max_results: int = 10, region: str = None) -> list:
+    """
+    DuckDuckGo 텍스트 검색 결과를 캐시와 속도 제한을 적용해 반환합니다.
+    속도 제한 토큰을 SEARCH_RATE_WAIT 안에 얻지 못하거나 검색이 실패하면, 보관 중인 이전 결과를 대신 반환합니다.
+
+    Parameters:
+        query: 검색 쿼리
+        max_results: 최대 결과 수
+        region: 검색 지역 (예: 'wt-wt', 'kr-kr', None이면 set_search_region으로 설정한 현재 요청의 지역)
+
+    Returns:
+        DDGS().text 결과 목록 ({"title", "href", "body"} 딕셔너리)
+    """
+    region = region or _search_region.get() or SEARCH_REGION
+    key = (normalize_query(query), region, max_results)
+    cached = _search_cache.get(key)
+    if cached is not None:
+        logger.debug(f"검색 캐시 사용: {key}")
+        return cached
+
+    # 검색 제공자 쪽 제한에 걸리지 않도록 전체 요청 속도를 제한 (요청 스레드는 짧게만 대기)
+    if not _search_limiter.acquire(timeout=SEARCH_RATE_WAIT):
+        stale = _stale_cache.get(key, [])
+        logger.warning(f"검색 요청 속도 제한으로 건너뜀: {query} (이전 결과 {len(stale)}개 사용)")
+        return stale
+    try:
+        results = list(DDGS().text(query, region=region, max_results=max_results) or [])
+    except Exception as e:
+        stale = _stale_cache.get(key)
+        if stale is None:
+            raise
+        logger.warning(f"검색 실패로 이전 결과 사용: {query} ({e})")
+        return stale
+    if results:
+        _search_cache.set(key, results)
+        _stale_cache.set(key, results)
+    return results
@@ -0,0 +1,184 @@
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from config import WEBDRIVER_POOL_SIZE, WEBDRIVER_MAX_USES, WEBDRIVER_PAGE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def get_driver_path() -> str:
+    """ChromeDriver를 프로세스당 한 번만 설치하고 경로를 반환합니다."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+            logger.info(f"ChromeDriver 설치됨: {_driver_path}")
+    return _driver_path
+
+def chrome_options() -> Options:
+    """헤드리스 Chrome 공통 옵션"""
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+    return options
+
+class WebDriverPool:
+    """
+    미리 띄워 둔 헤드리스 Chrome 드라이버를 재사용하는 풀입니다.
+    꺼낼 때 상태를 확인해 응답하지 않는 드라이버는 교체하고,
+    max_uses번 사용한 드라이버는 메모리 누수를 막기 위해 종료 후 새로 만듭니다.
+
+    Parameters:
+        size: 동시에 유지할 최대 드라이버 수
+        max_uses: 드라이버 하나를 재사용할 최대 횟수
+        page_timeout: 페이지 로드 타임아웃 (초)
+    """
+    def __init__(self, size: int = WEBDRIVER_POOL_SIZE, max_uses: int = WEBDRIVER_MAX_USES, page_timeout: float = WEBDRIVER_PAGE_TIMEOUT):
+        self.size = size
+        self.max_uses = max_uses
+        self.page_timeout = page_timeout
+        self._idle = []  # 최근에 쓴 드라이버부터 재사용 (스택)
+        self._total = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _create(self) -> dict:
+        start = time.time()
+        driver = webdriver.Chrome(service=Service(get_driver_path()), options=chrome_options())
+        driver.set_page_load_timeout(self.page_timeout)
+        logger.info(f"웹드라이버 시작: {time.time() - start:.2f}초")
+        return {"driver": driver, "uses": 0, "created": time.time()}
+
+    def _quit(self, entry: dict):
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+        try:
+            entry["driver"].quit()
+        except Exception as e:
+            logger.warning(f"웹드라이버 종료 실패: {e}")
+
+    @staticmethod
+    def _healthy(entry: dict) -> bool:
+        """브라우저 세션이 살아 있는지 확인합니다."""
+        try:
+            entry["driver"].execute_script("return 1")
+            return bool(entry["driver"].window_handles)
+        except Exception:
+            return False
+
+    def acquire(self, timeout: float = 60) -> dict:
+        """
+        사용 가능한 드라이버를 꺼냅니다. 유휴 드라이버가 없고 풀이 가득 찼으면 반환될 때까지 기다립니다.
+
+        Returns:
+            {"driver", "uses", "created"} 형태의 항목 (release로 반환)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._total >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("사용 가능한 웹드라이버가 없습니다.")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._total += 1
+            if entry is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            if self._healthy(entry):
+                return entry
+            logger.warning("응답하지 않는 웹드라이버를 교체합니다.")
+            self._quit(entry)
+
+    def release(self, entry: dict, healthy: bool = True):
+        """드라이버를 풀에 반환합니다. 오류가 났거나 사용 횟수를 넘었으면 종료합니다."""
+        entry["uses"] += 1
+        if self._closed or not healthy or entry["uses"] >= self.max_uses:
+            self._quit(entry)
+            return
+        try:
+            # 이전 검색 페이지의 스크립트가 계속 실행되지 않도록 빈 페이지로 이동
+            entry["driver"].get("about:blank")
+        except Exception:
+            self._quit(entry)
+            return
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout: float = 60):
+        """드라이버를 빌려 쓰는 컨텍스트 매니저. 블록에서 예외가 나면 해당 드라이버는 폐기됩니다."""
+        entry = self.acquire(timeout)
+        healthy = False
+        try:
+            yield entry["driver"]
+            healthy = True
+        finally:
+            self.release(entry, healthy)
+
+    def warm(self, count: int = None):
+        """드라이버를 미리 띄워 첫 검색의 시작 지연을 없앱니다."""
+        entries = [self.acquire() for _ in range(min(count or self.size, self.size))]
+        for entry in entries:
+            entry["uses"] -= 1  # 예열은 사용 횟수에 포함하지 않음
+            self.release(entry)
+
+    def close(self):
+        """유휴 드라이버를 모두 종료합니다. 사용 중인 드라이버는 반환될 때 종료됩니다."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._quit(entry)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_webdriver_pool() -> WebDriverPool:
+    """모듈 단위로 공유되는 웹드라이버 풀을 반환합니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WebDriverPool()
+            atexit.register(_pool.close)
+    return _pool
+
+def start_webdriver_warmup():
+    """공유 웹드라이버 풀을 백그라운드 스레드에서 예열합니다. (Chrome 시작을 서버 시작과 겹치게 처리)"""
+    def run():
+        start = time.time()
+        try:
+            get_webdriver_pool().warm()
+            logger.info(f"웹드라이버 풀 예열 완료: {time.time() - start:.1f}초")
+        except Exception as e:
+            logger.error(f"웹드라이버 풀 예열 실패: {e}")
+
+    warm_thread = threading.Thread(target=run, name="webdriver-warmup")
+    warm_thread.daemon = True
+    warm_thread.start()
+    return warm_thread